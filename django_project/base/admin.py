@@ -23,7 +23,8 @@ from .models import (
     Domain,
     Organisation,
     SitePreferences,
-    ProjectFlatpage
+    ProjectFlatpage,
+    BackgroundJob
 )
 from .forms import ProjectFlatpageForm
 
@@ -101,9 +102,18 @@ class GeneralFlatPageAdmin(FlatPageAdmin):
         return qs.exclude(id__in=project_flatpage_ids)
 
 
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'kind', 'status', 'progress', 'attempts', 'created_by',
+        'date_created', 'date_finished')
+    list_filter = ('kind', 'status')
+    search_fields = ('key',)
+
+
 admin.site.register(Project, ProjectAdmin)
 admin.site.register(Domain)
 admin.site.register(Organisation, OrganisationAdmin)
 admin.site.register(SitePreferences, PreferencesAdmin)
 admin.site.register(FlatPage, GeneralFlatPageAdmin)
 admin.site.register(ProjectFlatpage, ProjectFlatPageAdmin)
+admin.site.register(BackgroundJob, BackgroundJobAdmin)
@@ -0,0 +1,145 @@
+# coding=utf-8
+"""Status API of the background jobs.
+
+Views doing long work queue a job and answer at once, either with
+``enqueued_job_response`` for AJAX calls or with ``job_progress_page``, a
+page polling the job then downloading its file or going to the next page.
+The session which queued a job can poll it, logged in or not.
+"""
+
+import os
+
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from rest_framework.views import APIView
+from base.jobs import job_result_root
+from base.models.background_job import BackgroundJob
+
+# Session key listing the jobs queued by the session.
+SESSION_JOBS = 'background_jobs'
+
+# Number of jobs remembered by a session.
+MAX_SESSION_JOBS = 50
+
+
+def remember_job(request, job):
+    """Let the session of a request poll a job it queued."""
+
+    session = getattr(request, 'session', None)
+    if session is None:
+        return
+    jobs = session.get(SESSION_JOBS, [])
+    if job.pk not in jobs:
+        session[SESSION_JOBS] = (jobs + [job.pk])[-MAX_SESSION_JOBS:]
+
+
+def get_user_job(request, pk):
+    """Return a job of the current user or session, any job for staff.
+
+    :raises: Http404
+    """
+    job = get_object_or_404(BackgroundJob, pk=pk)
+    if request.user.is_staff:
+        return job
+    if request.user.is_authenticated and job.created_by_id == request.user.pk:
+        return job
+    session = getattr(request, 'session', None)
+    if session is not None and job.pk in session.get(SESSION_JOBS, []):
+        return job
+    raise Http404('Sorry! We could not find your job!')
+
+
+def job_status_url(job):
+    return reverse('background-job-status', kwargs={'pk': job.pk})
+
+
+def job_status(job):
+    """Return the status of a job as sent to the pages polling it.
+
+    :rtype: dict
+    """
+
+    download_url = None
+    if job.status == BackgroundJob.DONE and job.result_file:
+        download_url = reverse(
+            'background-job-download', kwargs={'pk': job.pk})
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'error': job.error,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'download_url': download_url,
+    }
+
+
+def enqueued_job_response(request, job):
+    """Answer an AJAX call which queued a job with the URL polling it."""
+
+    remember_job(request, job)
+    return JsonResponse({
+        'status': job.status,
+        'job': job.pk,
+        'status_url': job_status_url(job),
+    })
+
+
+def job_progress_page(request, job, title, back_url, done_url=None,
+                      **context):
+    """Render a page polling a job.
+
+    The page downloads the file of the job once it is done, or goes to
+    done_url when the job produces no file.
+
+    :param title: Title of the page.
+    :type title: str
+
+    :param back_url: URL of the page the user came from.
+    :type back_url: str
+
+    :param done_url: URL to go to once the job is done.
+    :type done_url: str
+
+    :param context: Extra context of the template.
+    """
+
+    remember_job(request, job)
+    context.update({
+        'job': job,
+        'title': title,
+        'back_url': back_url,
+        'done_url': done_url,
+    })
+    return render(request, 'background_job/progress.html', context)
+
+
+class BackgroundJobStatus(APIView):
+    """API to poll the progress of a background job.
+    Only the user or session who queued the job and staff users can view
+    this.
+
+    """
+
+    def get(self, request, pk):
+        return JsonResponse(job_status(get_user_job(request, pk)))
+
+
+class BackgroundJobDownload(APIView):
+    """API to download the file produced by a background job."""
+
+    def get(self, request, pk):
+        job = get_user_job(request, pk)
+        if job.status != BackgroundJob.DONE or not job.result_file:
+            raise Http404('Sorry! This job has no file to download.')
+        pathname = os.path.join(job_result_root(), job.result_file)
+        if not os.path.exists(pathname):
+            raise Http404('Sorry! The file of this job has expired.')
+        return FileResponse(
+            open(pathname, 'rb'),
+            as_attachment=True,
+            filename=job.payload.get(
+                'filename', os.path.basename(pathname)))
@@ -0,0 +1,13 @@
+# coding=utf-8
+"""Configuration of the base app."""
+
+from django.apps import AppConfig
+
+
+class BaseConfig(AppConfig):
+    """Base application configuration."""
+    name = 'base'
+
+    def ready(self):
+        import base.signals.domain  # noqa
+        import base.signals.navigation  # noqa
@@ -0,0 +1,126 @@
+# coding=utf-8
+"""Per-process routing table of the approved custom domains.
+
+Every request from a host outside VALID_DOMAIN is routed by its custom
+domain. The approved domains and the project names they are checked against
+are loaded once per process into dicts, so resolving a host costs no query.
+
+Changes to domains and projects replace a version stamp in the default
+cache (see base.signals.domain), each process compares it with the stamp of
+its table and reloads the table when another process changed it. The cache
+must be shared by the processes, see CACHES in core.settings.prod. A stamp
+missing from the cache (e.g. culled) reloads the table too.
+"""
+
+import uuid
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from base.models.custom_domain import Domain
+from base.models.project import Project
+
+ROUTING_VERSION_KEY = 'domain-routing:version'
+
+DomainRoute = namedtuple(
+    'DomainRoute',
+    ['domain', 'role', 'project_id', 'project_slug', 'organisation_id'])
+
+
+class DomainRoutingTable(object):
+    """Approved custom domains by host and project ids by name."""
+
+    def __init__(self, routes, project_names, version=None):
+        self.routes = routes
+        self.project_names = project_names
+        self.version = version
+
+    @classmethod
+    def load(cls, version=None):
+        """Read the routing table from the database.
+
+        :param version: Version stamp of the shared cache at load time.
+        :type version: str
+
+        :rtype: DomainRoutingTable
+        """
+
+        routes = {}
+        for values in Domain.objects.filter(approved=True).values_list(
+                'domain', 'role', 'project_id', 'project__slug',
+                'organisation_id'):
+            route = DomainRoute(*values)
+            routes[route.domain] = route
+        project_names = {}
+        for project_id, name in Project.objects.values_list('id', 'name'):
+            project_names.setdefault(name.lower(), set()).add(project_id)
+        return cls(routes, project_names, version)
+
+    def route(self, host):
+        """Return the route of a host, None when it is not approved.
+
+        :param host: The requested host, with or without its port.
+        :type host: str
+
+        :rtype: DomainRoute, None
+        """
+
+        return self.routes.get(host.split(':')[0])
+
+    def is_other_project(self, name, project_id):
+        """Whether a project other than project_id is named name.
+
+        Names are compared case insensitively.
+        """
+
+        return bool(
+            self.project_names.get(name.lower(), set()) - {project_id})
+
+
+_table = None
+
+
+def routing_table():
+    """Return the routing table of this process, reloading it when stale.
+
+    :rtype: DomainRoutingTable
+    """
+
+    global _table
+    version = cache.get(ROUTING_VERSION_KEY)
+    table = _table
+    if table is not None and version is not None:
+        if version == table.version:
+            return table
+    if version is None:
+        # Stamp the reloaded table, so the next requests do not reload it.
+        cache.add(ROUTING_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(ROUTING_VERSION_KEY)
+    table = DomainRoutingTable.load(version)
+    _table = table
+    return table
+
+
+def invalidate_routing_table():
+    """Reload the routing table of every process on their next request."""
+
+    global _table
+    _table = None
+    cache.set(ROUTING_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def request_domain_route(request):
+    """Return the custom domain route of a request.
+
+    The route resolved by CheckDomainMiddleware is reused when the request
+    went through it.
+
+    :param request: The incoming HTTP request.
+    :type request: HttpRequest
+
+    :rtype: DomainRoute, None
+    """
+
+    if not hasattr(request, 'domain_route'):
+        request.domain_route = routing_table().route(request.get_host())
+    return request.domain_route
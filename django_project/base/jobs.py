@@ -0,0 +1,263 @@
+# coding=utf-8
+"""Registry and runner of background jobs.
+
+Apps register job functions in their ``jobs`` module::
+
+    @register_job('changes.version_rst_export')
+    def export_version_rst(job):
+        ...
+        return 'relative/path/of/the/result.zip'
+
+A job function receives the BackgroundJob, reports progress with
+``job.set_progress`` and may return the path of the file it produced,
+relative to ``job_result_root``, e.g. one from ``job_result_path``. That
+folder is not served by the web server, the files are only downloaded
+through the background job views, which check who queued the job. An
+exception queues the job again after a growing delay while it has attempts
+left, and marks it failed otherwise.
+
+``run_worker`` runs the jobs in a number of threads, each claiming jobs
+with its own database connection, and regularly deletes the jobs finished
+for longer than BACKGROUND_JOB_RETENTION_DAYS with their files.
+"""
+
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from base.models.background_job import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+_job_functions = {}
+
+
+def register_job(kind):
+    """Register the decorated function as the runner of a job kind."""
+
+    def decorator(function):
+        _job_functions[kind] = function
+        return function
+    return decorator
+
+
+def autodiscover_jobs():
+    """Import the jobs module of every installed app."""
+
+    autodiscover_modules('jobs')
+
+
+def job_result_root():
+    """Return the folder of the files produced by the jobs.
+
+    :rtype: str
+    """
+
+    return settings.BACKGROUND_JOB_RESULT_ROOT
+
+
+def job_result_path(job, filename):
+    """Return the absolute path of a file produced by a job.
+
+    The folder of the job is created, it is deleted with the job.
+
+    :param job: The job.
+    :type job: BackgroundJob
+
+    :param filename: Name of the file.
+    :type filename: str
+
+    :rtype: str
+    """
+
+    folder = os.path.join(job_result_root(), str(job.pk))
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, filename)
+
+
+def retry_delay(attempts):
+    """Return the seconds to wait before running a failed job again."""
+
+    delay = getattr(settings, 'BACKGROUND_JOB_RETRY_DELAY', 60)
+    return delay * 2 ** max(0, attempts - 1)
+
+
+def prune_jobs(days=None):
+    """Delete the jobs finished a number of days ago and their files.
+
+    :param days: Days a finished job is kept, the
+        BACKGROUND_JOB_RETENTION_DAYS setting by default.
+    :type days: int
+
+    :returns: The number of jobs deleted.
+    :rtype: int
+    """
+
+    if days is None:
+        days = getattr(settings, 'BACKGROUND_JOB_RETENTION_DAYS', 7)
+    pks = list(BackgroundJob.objects.filter(
+        status__in=[BackgroundJob.DONE, BackgroundJob.FAILED],
+        date_finished__lt=timezone.now() - timedelta(days=days),
+    ).values_list('pk', flat=True))
+    # The files go first, a download of a job being deleted is then told
+    # its file expired.
+    for pk in pks:
+        shutil.rmtree(
+            os.path.join(job_result_root(), str(pk)), ignore_errors=True)
+    BackgroundJob.objects.filter(pk__in=pks).delete()
+    return len(pks)
+
+
+def _prune():
+    try:
+        count = prune_jobs()
+        if count:
+            logger.info('Deleted %s finished background jobs', count)
+    except Exception:
+        logger.exception('Failed to delete the finished background jobs')
+    finally:
+        connection.close()
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome.
+
+    Nothing is recorded when the lease of the job was lost meanwhile, the
+    job then belongs to the worker which claimed it again.
+
+    :param job: A job in the running state.
+    :type job: BackgroundJob
+    """
+
+    function = _job_functions.get(job.kind)
+    try:
+        if function is None:
+            raise LookupError('No job registered as %s' % job.kind)
+        result_file = function(job)
+    except Exception as e:
+        logger.exception('Background job %s failed', job)
+        job.error = str(e) or e.__class__.__name__
+        if function is not None and job.attempts < job.max_attempts:
+            job.status = BackgroundJob.QUEUED
+            job.run_after = timezone.now() + timedelta(
+                seconds=retry_delay(job.attempts))
+        else:
+            job.status = BackgroundJob.FAILED
+    else:
+        job.status = BackgroundJob.DONE
+        job.progress = 100
+        job.error = ''
+        if result_file:
+            job.result_file = result_file
+    if job.status != BackgroundJob.QUEUED:
+        job.date_finished = timezone.now()
+    updated = BackgroundJob.objects.filter(
+        pk=job.pk, status=BackgroundJob.RUNNING, worker=job.worker,
+        attempts=job.attempts,
+    ).update(
+        status=job.status, progress=job.progress,
+        result_file=job.result_file, error=job.error,
+        run_after=job.run_after, date_finished=job.date_finished,
+        lease_expires=None)
+    if not updated:
+        logger.warning('Background job %s was claimed again', job)
+    return job
+
+
+def run_pending_jobs(max_jobs=None, worker='', visibility_timeout=None):
+    """Claim and run due jobs until none is left.
+
+    :param max_jobs: Stop after this many jobs, None to drain the queue.
+    :type max_jobs: int
+
+    :param worker: Name of the worker, recorded on the claimed jobs.
+    :type worker: str
+
+    :param visibility_timeout: Seconds a claimed job is leased to the
+        worker, see BackgroundJob.claim.
+    :type visibility_timeout: int
+
+    :returns: The number of jobs run.
+    :rtype: int
+    """
+
+    count = 0
+    while max_jobs is None or count < max_jobs:
+        job = BackgroundJob.claim(worker, visibility_timeout)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def _work(name, stop, once, poll_interval, visibility_timeout):
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            count = run_pending_jobs(
+                worker=name, visibility_timeout=visibility_timeout)
+            if count:
+                logger.info('%s ran %s background jobs', name, count)
+            if once:
+                break
+            if not count:
+                stop.wait(poll_interval)
+    finally:
+        connection.close()
+
+
+def run_worker(concurrency=1, poll_interval=2.0, once=False,
+               visibility_timeout=None, stop=None, prune_interval=None):
+    """Run due jobs in a number of threads until stopped.
+
+    :param concurrency: Number of jobs run at the same time.
+    :type concurrency: int
+
+    :param poll_interval: Seconds a thread waits when no job is due.
+    :type poll_interval: float
+
+    :param once: Return once no job is due instead of polling.
+    :type once: bool
+
+    :param visibility_timeout: Seconds a claimed job is leased to its
+        thread, see BackgroundJob.claim.
+    :type visibility_timeout: int
+
+    :param stop: Set to stop the threads after their current job.
+    :type stop: threading.Event
+
+    :param prune_interval: Seconds between deletions of the old finished
+        jobs, None to keep them.
+    :type prune_interval: float
+    """
+
+    if stop is None:
+        stop = threading.Event()
+    prefix = '%s:%s' % (socket.gethostname(), os.getpid())
+    threads = [
+        threading.Thread(
+            target=_work,
+            name='%s:%s' % (prefix, index),
+            args=(
+                '%s:%s' % (prefix, index), stop, once, poll_interval,
+                visibility_timeout))
+        for index in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    next_prune = time.monotonic()
+    for thread in threads:
+        while thread.is_alive():
+            if prune_interval and time.monotonic() >= next_prune:
+                _prune()
+                next_prune = time.monotonic() + prune_interval
+            thread.join(1)
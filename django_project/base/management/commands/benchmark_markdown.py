@@ -0,0 +1,79 @@
+# coding=utf-8
+"""A command to time the markdown rendering of a large changelog."""
+
+import time
+
+import markdown
+from django.core.management.base import BaseCommand
+from base.markdown_cache import DEFAULT_EXTENSIONS, MarkdownRenderCache
+
+ENTRY_DESCRIPTION = (
+    'Entry {number} adds a new option to the **processing toolbox**.\n'
+    'It is available from the menu and from the `Ctrl+{number}` shortcut.'
+    '\n\n'
+    '* first change of entry {number}\n'
+    '* second change, see [the issue](https://example.com/{number})\n\n'
+    '| Option | Default |\n'
+    '| ------ | ------- |\n'
+    '| size   | {number}    |\n\n'
+    '```\n'
+    'processing.run("native:{number}", {{}})\n'
+    '```\n'
+)
+
+
+class Command(BaseCommand):
+    """Render the entry descriptions of a version with and without cache.
+
+    The descriptions are generated, nothing is read from the database.
+    """
+
+    help = 'Time the markdown rendering of the entries of a version.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entries',
+            type=int,
+            default=500,
+            help='Number of entries of the version.')
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Number of times the version is rendered.')
+
+    def _time(self, label, render, descriptions, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for description in descriptions:
+                render(description)
+            timings.append(time.perf_counter() - start)
+        self.stdout.write('%-24s %8.1f ms' % (label, 1000 * min(timings)))
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+        :param args:  Not used
+        :param options: entries and repeat.
+        """
+        descriptions = [
+            ENTRY_DESCRIPTION.format(number=number)
+            for number in range(options['entries'])]
+        repeat = options['repeat']
+
+        def uncached(description):
+            return markdown.markdown(
+                description,
+                extensions=list(DEFAULT_EXTENSIONS),
+                safe_mode=True,
+                enable_attributes=False)
+
+        cache = MarkdownRenderCache()
+
+        self.stdout.write('Rendering %s entries, best of %s:' % (
+            len(descriptions), repeat))
+        self._time('new converter', uncached, descriptions, repeat)
+        self._time('pooled converter', cache.convert, descriptions, repeat)
+        for description in descriptions:
+            cache.render(description)
+        self._time('cached', cache.render, descriptions, repeat)
@@ -0,0 +1,30 @@
+# coding=utf-8
+"""A command to delete the old finished background jobs."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from base.jobs import prune_jobs
+
+
+class Command(BaseCommand):
+    """Delete the jobs finished some days ago and the files they produced.
+
+    The run_worker command does it regularly, this runs it once.
+    """
+
+    help = 'Delete the old finished background jobs and their files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'BACKGROUND_JOB_RETENTION_DAYS', 7),
+            help='Days a finished job is kept.')
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+        :param args:  Not used
+        :param options: days a finished job is kept.
+        """
+        count = prune_jobs(options['days'])
+        self.stdout.write('Deleted %s background jobs.' % count)
@@ -0,0 +1,72 @@
+# coding=utf-8
+"""A command to run the queued background jobs."""
+
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from base.jobs import autodiscover_jobs, run_worker
+
+
+class Command(BaseCommand):
+    """Run queued background jobs, polling the queue for new ones.
+
+    SIGTERM and SIGINT stop the worker once its running jobs are done.
+    The worker also deletes the old finished jobs, see prune_background_jobs.
+    """
+
+    help = 'Run the background jobs queued in the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run the queued jobs then exit instead of polling.')
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when the queue is empty.')
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=getattr(settings, 'BACKGROUND_JOB_CONCURRENCY', 1),
+            help='Number of jobs run at the same time.')
+        parser.add_argument(
+            '--visibility-timeout',
+            type=int,
+            default=None,
+            help=(
+                'Seconds without progress after which a running job is '
+                'given to another worker.'))
+        parser.add_argument(
+            '--prune-interval',
+            type=float,
+            default=getattr(settings, 'BACKGROUND_JOB_PRUNE_INTERVAL', None),
+            help=(
+                'Seconds between deletions of the old finished jobs, 0 to '
+                'keep them.'))
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+        :param args:  Not used
+        :param options: once, poll_interval, concurrency,
+            visibility_timeout and prune_interval.
+        """
+        autodiscover_jobs()
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write('Stopping after the running jobs.')
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        run_worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+            visibility_timeout=options['visibility_timeout'],
+            stop=stop,
+            prune_interval=options['prune_interval'])
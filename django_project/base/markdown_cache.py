@@ -0,0 +1,245 @@
+# coding=utf-8
+"""Process level cache of the HTML rendered from markdown.
+
+The base_markdown filter is run over every entry of a changelog and every
+part of a worksheet, mostly on text which has not changed since the last
+page was rendered. The rendered HTML is kept in an LRU cache keyed by the
+SHA-1 digest of the text and the markdown extensions, so an edited text is
+rendered again on the next page. When MARKDOWN_CACHE_ALIAS names a Django
+cache, renders are also shared with the other processes through it.
+
+Building a markdown converter loads its extensions, so converters are
+pooled per extension set and reset between uses instead of being built
+for every text.
+
+Models storing the HTML of their markdown keep the markdown_digest of the
+text it was rendered from, to render it again only when that changes.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import markdown
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+
+# Extensions of the markdown rendered by the base_markdown filter.
+DEFAULT_EXTENSIONS = ('nl2br', 'markdown.extensions.tables', 'fenced_code')
+
+# Default maximum size of the rendered HTML kept in memory.
+DEFAULT_CACHE_BYTES = 8 * 1024 * 1024
+
+# Maximum number of idle converters kept per extension set.
+MAX_POOLED_CONVERTERS = 8
+
+
+def _render_key(text, extensions):
+    digest = hashlib.sha1()
+    digest.update('\0'.join(extensions).encode('utf-8'))
+    digest.update(b'\0\0')
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def markdown_digest(text):
+    """Return the digest of a text rendered by render_markdown.
+
+    The digest changes with the text and with the markdown extensions.
+
+    :rtype: str
+    """
+
+    return _render_key(text or '', DEFAULT_EXTENSIONS)
+
+
+def _table_classes(html):
+    return html.replace(
+        '<table>', '<table class="table table-striped table-bordered"')
+
+
+def _shared_cache():
+    """Return the Django cache shared by the processes, if there is one."""
+
+    alias = getattr(settings, 'MARKDOWN_CACHE_ALIAS', None)
+    if not alias:
+        return None
+    try:
+        return caches[alias]
+    except InvalidCacheBackendError:
+        return None
+
+
+class MarkdownRenderCache(object):
+    """LRU cache of rendered markdown with a byte limit."""
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._converters = {}
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return getattr(
+            settings, 'MARKDOWN_CACHE_BYTES', DEFAULT_CACHE_BYTES)
+
+    def _acquire_converter(self, extensions):
+        with self._lock:
+            pool = self._converters.get(extensions)
+            if pool:
+                return pool.pop()
+        return markdown.Markdown(
+            extensions=list(extensions),
+            safe_mode=True,
+            enable_attributes=False)
+
+    def _release_converter(self, extensions, converter):
+        # Clear the state left by the last text (e.g. footnotes, the
+        # references of links) before the converter is reused.
+        converter.reset()
+        with self._lock:
+            pool = self._converters.setdefault(extensions, [])
+            if len(pool) < MAX_POOLED_CONVERTERS:
+                pool.append(converter)
+
+    def convert(self, text, extensions=DEFAULT_EXTENSIONS):
+        """Render markdown to HTML with a pooled converter, uncached.
+
+        :param text: The markdown.
+        :type text: str
+
+        :param extensions: Names of the markdown extensions.
+        :type extensions: tuple
+
+        :returns: The HTML.
+        :rtype: str
+        """
+
+        extensions = tuple(extensions)
+        converter = self._acquire_converter(extensions)
+        try:
+            return converter.convert(text)
+        finally:
+            self._release_converter(extensions, converter)
+
+    def render(self, text, extensions=DEFAULT_EXTENSIONS, postprocess=None):
+        """Return the HTML of markdown, rendered once per text.
+
+        :param text: The markdown.
+        :type text: str
+
+        :param extensions: Names of the markdown extensions.
+        :type extensions: tuple
+
+        :param postprocess: Called with the rendered HTML, returns the HTML
+            which is cached. The same text must always be given the same
+            postprocess function.
+        :type postprocess: callable
+
+        :returns: The HTML.
+        :rtype: str
+        """
+
+        extensions = tuple(extensions)
+        key = _render_key(text, extensions)
+
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+
+        shared = _shared_cache()
+        shared_key = 'markdown:{}'.format(key)
+        html = shared.get(shared_key) if shared is not None else None
+        if html is None:
+            html = self.convert(text, extensions)
+            if postprocess is not None:
+                html = postprocess(html)
+            if shared is not None:
+                shared.set(
+                    shared_key, html,
+                    getattr(settings, 'MARKDOWN_CACHE_TIMEOUT', None))
+            with self._lock:
+                self.misses += 1
+        else:
+            with self._lock:
+                self.shared_hits += 1
+
+        # Characters are counted, close enough to the memory used.
+        nbytes = len(html)
+        if nbytes > self.max_bytes:
+            return html
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = html
+                self.size += nbytes
+            self._evict()
+        return html
+
+    def _evict(self):
+        """Drop the least recently used renders until under the limit."""
+
+        max_bytes = self.max_bytes
+        while self.size > max_bytes and self._entries:
+            _, html = self._entries.popitem(last=False)
+            self.size -= len(html)
+            self.evictions += 1
+
+    def clear(self):
+        """Empty the cache and the converter pool, reset the counters."""
+
+        with self._lock:
+            self._entries.clear()
+            self._converters.clear()
+            self.size = 0
+            self.hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Return the counters of the cache.
+
+        :returns: Hits, hits of the shared cache, misses, evictions, number
+            of entries and bytes used.
+        :rtype: dict
+        """
+
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'pid': os.getpid(),
+            }
+
+
+markdown_cache = MarkdownRenderCache()
+
+
+def render_markdown(text):
+    """Return the HTML of markdown as shown by the base_markdown filter.
+
+    :param text: The markdown.
+    :type text: str
+
+    :rtype: str
+    """
+
+    return markdown_cache.render(
+        text or '', extensions=DEFAULT_EXTENSIONS, postprocess=_table_classes)
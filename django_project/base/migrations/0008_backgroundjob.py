@@ -0,0 +1,41 @@
+# Generated by Django 3.2.13 on 2026-10-18 11:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('base', '0007_project_external_reviewer_invitation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(help_text='Name of the registered job function to run.', max_length=100)),
+                ('key', models.CharField(blank=True, db_index=True, default='', help_text='Identifies jobs doing the same work, such a job is only queued once at a time.', max_length=255)),
+                ('payload', models.JSONField(blank=True, default=dict, help_text='Arguments of the job.')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='Percentage of the job done.')),
+                ('message', models.CharField(blank=True, default='', help_text='Last progress message of the job.', max_length=255)),
+                ('result_file', models.CharField(blank=True, default='', help_text='File produced by the job, relative to MEDIA_ROOT.', max_length=255)),
+                ('error', models.TextField(blank=True, default='')),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_started', models.DateTimeField(blank=True, null=True)),
+                ('date_finished', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date_created'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['status', 'date_created'], name='base_job_status_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.13 on 2026-10-18 15:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Number of times the job was claimed by a worker.'),
+        ),
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='max_attempts',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Number of times the job is run before it is failed, only jobs safe to run again should be retried.'),
+        ),
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='run_after',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='The job is not claimed before this time.'),
+        ),
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='lease_expires',
+            field=models.DateTimeField(blank=True, help_text='Another worker may claim the running job after this time.', null=True),
+        ),
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='worker',
+            field=models.CharField(blank=True, default='', help_text='Worker which claimed the job.', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['status', 'run_after'], name='base_job_claim_idx'),
+        ),
+    ]
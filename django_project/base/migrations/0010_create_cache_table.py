@@ -0,0 +1,24 @@
+# coding=utf-8
+"""Create the table of the database cache shared by the processes."""
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Only creates the tables of the DatabaseCache backends in CACHES, if
+    # any, and skips the existing ones.
+    call_command(
+        'createcachetable', database=schema_editor.connection.alias,
+        verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_backgroundjob_retries'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0010_create_cache_table'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='result_file',
+            field=models.CharField(blank=True, default='', help_text='File produced by the job, relative to BACKGROUND_JOB_RESULT_ROOT.', max_length=255),
+        ),
+    ]
@@ -3,3 +3,4 @@ from base.models.custom_domain import *  # noqa
 from base.models.custom_flatpage import *  # noqa
 from base.models.organisation import *  # noqa
 from base.models.site_preferences import *  # noqa
+from base.models.background_job import *  # noqa
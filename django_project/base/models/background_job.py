@@ -0,0 +1,266 @@
+# coding=utf-8
+"""Background jobs run off-request by the run_worker command.
+
+The queue is the BackgroundJob table, workers claim jobs with
+``SELECT ... FOR UPDATE SKIP LOCKED`` so no broker is needed.
+
+A claimed job is leased to its worker for a visibility timeout, renewed
+every time the job reports progress. A job whose lease expired, because its
+worker was killed, is claimed again by another worker while it has attempts
+left, and failed otherwise.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+
+class BackgroundJob(models.Model):
+    """A unit of work queued in the database and run by a worker."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (QUEUED, _('Queued')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    )
+
+    kind = models.CharField(
+        help_text=_('Name of the registered job function to run.'),
+        max_length=100
+    )
+
+    key = models.CharField(
+        help_text=_(
+            'Identifies jobs doing the same work, such a job is only queued '
+            'once at a time.'),
+        max_length=255,
+        blank=True,
+        default='',
+        db_index=True
+    )
+
+    payload = models.JSONField(
+        help_text=_('Arguments of the job.'),
+        default=dict,
+        blank=True
+    )
+
+    status = models.CharField(
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        max_length=10
+    )
+
+    progress = models.PositiveSmallIntegerField(
+        help_text=_('Percentage of the job done.'),
+        default=0
+    )
+
+    message = models.CharField(
+        help_text=_('Last progress message of the job.'),
+        max_length=255,
+        blank=True,
+        default=''
+    )
+
+    result_file = models.CharField(
+        help_text=_(
+            'File produced by the job, relative to '
+            'BACKGROUND_JOB_RESULT_ROOT.'),
+        max_length=255,
+        blank=True,
+        default=''
+    )
+
+    error = models.TextField(
+        blank=True,
+        default=''
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        help_text=_('Number of times the job was claimed by a worker.'),
+        default=0
+    )
+
+    max_attempts = models.PositiveSmallIntegerField(
+        help_text=_(
+            'Number of times the job is run before it is failed, only jobs '
+            'safe to run again should be retried.'),
+        default=1
+    )
+
+    run_after = models.DateTimeField(
+        help_text=_('The job is not claimed before this time.'),
+        default=timezone.now
+    )
+
+    lease_expires = models.DateTimeField(
+        help_text=_(
+            'Another worker may claim the running job after this time.'),
+        null=True,
+        blank=True
+    )
+
+    worker = models.CharField(
+        help_text=_('Worker which claimed the job.'),
+        max_length=255,
+        blank=True,
+        default=''
+    )
+
+    created_by = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(null=True, blank=True)
+    date_finished = models.DateTimeField(null=True, blank=True)
+
+    objects = models.Manager()
+
+    class Meta:
+        ordering = ['-date_created']
+        indexes = [
+            models.Index(
+                fields=['status', 'date_created'],
+                name='base_job_status_idx'),
+            models.Index(
+                fields=['status', 'run_after'],
+                name='base_job_claim_idx'),
+        ]
+
+    def __str__(self):
+        return '%s #%s (%s)' % (self.kind, self.pk, self.status)
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    @classmethod
+    def enqueue(cls, kind, payload=None, key='', user=None, max_attempts=1):
+        """Queue a job, reusing a pending job doing the same work.
+
+        :param kind: Name of the registered job function.
+        :type kind: str
+
+        :param payload: JSON serialisable arguments of the job.
+        :type payload: dict
+
+        :param key: Identifies the work done, a queued or running job with
+            the same kind and key is returned instead of a new one.
+        :type key: str
+
+        :param user: User requesting the job.
+        :type user: django.contrib.auth.models.User
+
+        :param max_attempts: Number of times the job is run before it is
+            failed.
+        :type max_attempts: int
+
+        :rtype: BackgroundJob
+        """
+
+        if key:
+            job = cls.objects.filter(
+                kind=kind, key=key, status__in=[cls.QUEUED, cls.RUNNING]
+            ).first()
+            if job:
+                return job
+        if user is not None and not user.is_authenticated:
+            user = None
+        return cls.objects.create(
+            kind=kind, key=key, payload=payload or {}, created_by=user,
+            max_attempts=max(1, max_attempts))
+
+    @classmethod
+    def claim(cls, worker='', visibility_timeout=None):
+        """Mark the oldest job due to run running and return it.
+
+        Due jobs are the queued jobs whose run_after passed and the running
+        jobs whose lease expired. Rows locked by other workers are skipped,
+        so each job is claimed by one worker only. Expired jobs without
+        attempts left are failed.
+
+        :param worker: Name of the claiming worker.
+        :type worker: str
+
+        :param visibility_timeout: Seconds the job is leased to the worker,
+            the BACKGROUND_JOB_VISIBILITY_TIMEOUT setting by default.
+        :type visibility_timeout: int
+
+        :returns: The claimed job, None when no job is due.
+        :rtype: BackgroundJob, None
+        """
+
+        if visibility_timeout is None:
+            visibility_timeout = job_visibility_timeout()
+        while True:
+            now = timezone.now()
+            due = models.Q(status=cls.QUEUED, run_after__lte=now)
+            expired = models.Q(status=cls.RUNNING, lease_expires__lt=now)
+            with transaction.atomic():
+                job = cls.objects.select_for_update(skip_locked=True).filter(
+                    due | expired).order_by('run_after').first()
+                if job is None:
+                    return None
+                lost = job.status == cls.RUNNING
+                if lost and job.attempts >= job.max_attempts:
+                    job.status = cls.FAILED
+                    job.error = 'The worker running the job stopped.'
+                    job.date_finished = now
+                    job.save(update_fields=[
+                        'status', 'error', 'date_finished'])
+                    continue
+                job.status = cls.RUNNING
+                job.attempts += 1
+                job.worker = worker
+                job.date_started = now
+                job.lease_expires = now + timedelta(
+                    seconds=visibility_timeout)
+                job.save(update_fields=[
+                    'status', 'attempts', 'worker', 'date_started',
+                    'lease_expires'])
+            job.visibility_timeout = visibility_timeout
+            return job
+
+    def set_progress(self, progress, message=''):
+        """Record the progress of the running job and renew its lease.
+
+        :param progress: Percentage of the job done.
+        :type progress: int
+
+        :param message: Short description of the current step.
+        :type message: str
+        """
+
+        self.progress = max(0, min(100, int(progress)))
+        self.message = message[:255]
+        jobs = BackgroundJob.objects.filter(pk=self.pk)
+        updates = {'progress': self.progress, 'message': self.message}
+        if self.status == self.RUNNING:
+            # Only the worker holding the lease renews it.
+            jobs = jobs.filter(worker=self.worker, attempts=self.attempts)
+            self.lease_expires = timezone.now() + timedelta(
+                seconds=getattr(
+                    self, 'visibility_timeout', job_visibility_timeout()))
+            updates['lease_expires'] = self.lease_expires
+        jobs.update(**updates)
+
+
+def job_visibility_timeout():
+    """Return the seconds a claimed job is leased to its worker."""
+
+    return getattr(settings, 'BACKGROUND_JOB_VISIBILITY_TIMEOUT', 10 * 60)
@@ -0,0 +1,16 @@
+# coding=utf-8
+"""Signals refreshing the custom domain routing table."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
+
+from base.domain_routing import invalidate_routing_table
+from base.models import Domain, Project
+
+
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def routing_changed(sender, instance, **kwargs):
+    invalidate_routing_table()
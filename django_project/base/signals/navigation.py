@@ -0,0 +1,53 @@
+# coding=utf-8
+"""Signals invalidating the cached navigation state of the pages."""
+
+from django.contrib.flatpages.models import FlatPage
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch.dispatcher import receiver
+
+from base.models import Project, ProjectFlatpage
+from certification.models import CertifyingOrganisation
+from changes.models import SponsorshipLevel, SponsorshipPeriod, Sponsor
+from core.nav_cache import invalidate_project_nav, invalidate_site_nav
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    invalidate_site_nav()
+    invalidate_project_nav(instance.pk)
+
+
+@receiver(m2m_changed, sender=Project.sponsorship_managers.through)
+def sponsorship_managers_changed(sender, instance, **kwargs):
+    if isinstance(instance, Project):
+        invalidate_project_nav(instance.pk)
+    else:
+        # The managers were changed from the user side.
+        for project_id in kwargs.get('pk_set') or []:
+            invalidate_project_nav(project_id)
+
+
+@receiver(post_save, sender=FlatPage)
+@receiver(post_delete, sender=FlatPage)
+def flatpage_changed(sender, instance, **kwargs):
+    invalidate_site_nav()
+
+
+@receiver(post_save, sender=ProjectFlatpage)
+@receiver(post_delete, sender=ProjectFlatpage)
+def project_flatpage_changed(sender, instance, **kwargs):
+    invalidate_site_nav()
+    invalidate_project_nav(instance.project_id)
+
+
+@receiver(post_save, sender=SponsorshipLevel)
+@receiver(post_delete, sender=SponsorshipLevel)
+@receiver(post_save, sender=SponsorshipPeriod)
+@receiver(post_delete, sender=SponsorshipPeriod)
+@receiver(post_save, sender=Sponsor)
+@receiver(post_delete, sender=Sponsor)
+@receiver(post_save, sender=CertifyingOrganisation)
+@receiver(post_delete, sender=CertifyingOrganisation)
+def pending_object_changed(sender, instance, **kwargs):
+    invalidate_project_nav(instance.project_id)
@@ -1,25 +1,18 @@
-import markdown
 from django import template
 from django.contrib.staticfiles import finders
 from django.template.defaultfilters import stringfilter
 from django.utils.encoding import force_text as force_unicode
 from django.utils.safestring import mark_safe
 
+from base.markdown_cache import render_markdown
+
 register = template.Library()
 
 
 @register.filter(name='base_markdown', is_safe=True)
 @stringfilter
 def base_markdown(value):
-    extensions = ["nl2br", "markdown.extensions.tables", "fenced_code"]
-    html_output = markdown.markdown(
-        force_unicode(value),
-        extensions=extensions,
-        safe_mode=True,
-        enable_attributes=False)
-    html_output = html_output.replace(
-        '<table>', '<table class="table table-striped table-bordered"')
-    return mark_safe(html_output)
+    return mark_safe(render_markdown(force_unicode(value)))
 
 
 @register.filter(name='is_gif', is_safe=True)
@@ -0,0 +1,206 @@
+# coding=utf-8
+"""Tests for background jobs."""
+
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.client import Client
+from django.utils import timezone
+from django.urls import reverse
+from base.api_views.background_job import remember_job
+from base.jobs import (
+    job_result_path,
+    register_job,
+    run_job,
+    run_pending_jobs,
+)
+from base.models import BackgroundJob
+from core.model_factories import UserF
+
+
+@register_job('base.tests.add')
+def add_job(job):
+    job.set_progress(50, 'Adding')
+    job.payload['total'] = job.payload['a'] + job.payload['b']
+    job.save(update_fields=['payload'])
+
+
+@register_job('base.tests.file')
+def file_job(job):
+    pathname = job_result_path(job, 'result.txt')
+    with open(pathname, 'w') as result:
+        result.write('done')
+    return 'result.txt'
+
+
+@register_job('base.tests.fail')
+def fail_job(job):
+    raise ValueError('Broken job')
+
+
+@register_job('base.tests.flaky')
+def flaky_job(job):
+    if job.attempts < 2:
+        raise ValueError('Try again')
+
+
+class TestBackgroundJobs(TestCase):
+    """Tests that background jobs are queued and run."""
+
+    def setUp(self):
+        """Set up before each test."""
+        self.user = UserF.create(username='jobowner')
+        self.user.set_password('password')
+        self.user.save()
+
+    def test_enqueue_reuses_pending_job(self):
+        job = BackgroundJob.enqueue('base.tests.add', {'a': 1, 'b': 2}, 'k')
+        self.assertEqual(
+            BackgroundJob.enqueue('base.tests.add', {'a': 1, 'b': 2}, 'k'),
+            job)
+        self.assertNotEqual(
+            BackgroundJob.enqueue('base.tests.add', {'a': 1, 'b': 2}),
+            job)
+
+    def test_run_pending_jobs(self):
+        done = BackgroundJob.enqueue('base.tests.add', {'a': 1, 'b': 2})
+        failed = BackgroundJob.enqueue('base.tests.fail')
+        unknown = BackgroundJob.enqueue('base.tests.unknown')
+
+        self.assertEqual(run_pending_jobs(), 3)
+        self.assertEqual(run_pending_jobs(), 0)
+
+        done.refresh_from_db()
+        self.assertEqual(done.status, BackgroundJob.DONE)
+        self.assertEqual(done.progress, 100)
+        self.assertEqual(done.payload['total'], 3)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, BackgroundJob.FAILED)
+        self.assertEqual(failed.error, 'Broken job')
+        unknown.refresh_from_db()
+        self.assertEqual(unknown.status, BackgroundJob.FAILED)
+
+    @override_settings(VALID_DOMAIN=['testserver', ])
+    def test_job_status(self):
+        job = BackgroundJob.enqueue(
+            'base.tests.add', {'a': 1, 'b': 2}, user=self.user)
+        url = reverse('background-job-status', kwargs={'pk': job.pk})
+        client = Client()
+        client.login(username='jobowner', password='password')
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], BackgroundJob.QUEUED)
+
+        other_user = UserF.create(username='other')
+        other_user.set_password('password')
+        other_user.save()
+        client.login(username='other', password='password')
+        self.assertEqual(client.get(url).status_code, 404)
+
+    @override_settings(BACKGROUND_JOB_RETRY_DELAY=60)
+    def test_failed_job_is_retried(self):
+        job = BackgroundJob.enqueue('base.tests.flaky', max_attempts=2)
+
+        self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.QUEUED)
+        self.assertEqual(job.error, 'Try again')
+        self.assertGreater(
+            job.run_after, timezone.now() + timedelta(seconds=50))
+        # The job is not due yet.
+        self.assertEqual(run_pending_jobs(), 0)
+
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            run_after=timezone.now())
+        self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.DONE)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.error, '')
+
+    def test_expired_job_is_claimed_again(self):
+        job = BackgroundJob.enqueue(
+            'base.tests.add', {'a': 1, 'b': 2}, max_attempts=2)
+        lost = BackgroundJob.claim('lost-worker', visibility_timeout=60)
+        self.assertEqual(lost, job)
+        self.assertIsNone(BackgroundJob.claim('other-worker'))
+
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            lease_expires=timezone.now() - timedelta(seconds=1))
+        claimed = BackgroundJob.claim('other-worker')
+        self.assertEqual(claimed, job)
+        self.assertEqual(claimed.attempts, 2)
+
+        # The worker which lost the job does not record its outcome.
+        run_job(lost)
+        claimed.refresh_from_db()
+        self.assertEqual(claimed.status, BackgroundJob.RUNNING)
+        self.assertEqual(claimed.worker, 'other-worker')
+
+        run_job(claimed)
+        claimed.refresh_from_db()
+        self.assertEqual(claimed.status, BackgroundJob.DONE)
+
+    def test_expired_job_without_attempts_left_fails(self):
+        job = BackgroundJob.enqueue('base.tests.add', {'a': 1, 'b': 2})
+        BackgroundJob.claim('lost-worker')
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            lease_expires=timezone.now() - timedelta(seconds=1))
+
+        self.assertIsNone(BackgroundJob.claim('other-worker'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.FAILED)
+
+    def test_progress_renews_the_lease(self):
+        BackgroundJob.enqueue('base.tests.add', {'a': 1, 'b': 2})
+        job = BackgroundJob.claim('worker', visibility_timeout=60)
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            lease_expires=timezone.now())
+
+        job.set_progress(10, 'Working')
+        job.refresh_from_db()
+        self.assertGreater(
+            job.lease_expires, timezone.now() + timedelta(seconds=50))
+
+    @override_settings(VALID_DOMAIN=['testserver', ])
+    def test_session_polls_its_jobs(self):
+        job = BackgroundJob.enqueue('base.tests.add', {'a': 1, 'b': 2})
+        url = reverse('background-job-status', kwargs={'pk': job.pk})
+        client = Client()
+        self.assertEqual(client.get(url).status_code, 404)
+
+        session = client.session
+        request = type('Request', (object,), {'session': session})()
+        remember_job(request, job)
+        session.save()
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['attempts'], 0)
+
+    def test_old_finished_jobs_are_pruned(self):
+        result_root = tempfile.mkdtemp()
+        with override_settings(BACKGROUND_JOB_RESULT_ROOT=result_root):
+            old = BackgroundJob.enqueue('base.tests.file')
+            recent = BackgroundJob.enqueue('base.tests.file')
+            queued = BackgroundJob.enqueue('base.tests.add', {'a': 1, 'b': 2})
+            run_pending_jobs(max_jobs=2)
+            BackgroundJob.objects.filter(pk=old.pk).update(
+                date_finished=timezone.now() - timedelta(days=8))
+            BackgroundJob.objects.filter(pk=queued.pk).update(
+                date_created=timezone.now() - timedelta(days=8))
+
+            out = StringIO()
+            call_command('prune_background_jobs', days=7, stdout=out)
+
+            self.assertIn('Deleted 1 background jobs', out.getvalue())
+            self.assertEqual(
+                os.listdir(result_root), [str(recent.pk)])
+        shutil.rmtree(result_root)
+        self.assertEqual(
+            set(BackgroundJob.objects.values_list('pk', flat=True)),
+            {recent.pk, queued.pk})
@@ -0,0 +1,88 @@
+# coding=utf-8
+"""Test for the markdown render cache."""
+
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from base.markdown_cache import MarkdownRenderCache, markdown_cache
+from base.templatetags.custom_markup import base_markdown
+
+
+class TestMarkdownRenderCache(SimpleTestCase):
+    """Test the process level cache of rendered markdown."""
+
+    def test_render_is_reused(self):
+        cache = MarkdownRenderCache(max_bytes=1024 * 1024)
+        first = cache.render('Some **bold** text')
+        with mock.patch.object(cache, 'convert') as convert:
+            second = cache.render('Some **bold** text')
+        convert.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(first, '<p>Some <strong>bold</strong> text</p>')
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+
+    def test_extensions_are_part_of_the_key(self):
+        cache = MarkdownRenderCache(max_bytes=1024 * 1024)
+        text = 'first line\nsecond line'
+        with_nl2br = cache.render(text, extensions=('nl2br',))
+        without_nl2br = cache.render(text, extensions=())
+        self.assertIn('<br />', with_nl2br)
+        self.assertNotIn('<br />', without_nl2br)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_least_recently_used_render_is_evicted(self):
+        cache = MarkdownRenderCache(max_bytes=len('<p>one</p>'))
+        cache.render('one')
+        cache.render('two')
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['evictions'], 1)
+        cache.render('two')
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_converters_are_pooled_and_reset(self):
+        cache = MarkdownRenderCache()
+        cache.convert('[link][ref]\n\n[ref]: https://example.com')
+        html = cache.convert('[link][ref]')
+        # The reference of the first text is not kept by the converter.
+        self.assertNotIn('https://example.com', html)
+        self.assertEqual(len(cache._converters), 1)
+
+    @override_settings(
+        MARKDOWN_CACHE_ALIAS='markdown',
+        CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'markdown': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'markdown-tests'}})
+    def test_renders_are_shared(self):
+        caches['markdown'].clear()
+        MarkdownRenderCache().render('*shared*')
+        cache = MarkdownRenderCache()
+        with mock.patch.object(cache, 'convert') as convert:
+            html = cache.render('*shared*')
+        convert.assert_not_called()
+        self.assertEqual(html, '<p><em>shared</em></p>')
+        self.assertEqual(cache.stats()['shared_hits'], 1)
+
+    def test_base_markdown(self):
+        markdown_cache.clear()
+        text = '| a | b |\n| - | - |\n| 1 | 2 |'
+        html = base_markdown(text)
+        self.assertIn('<table class="table table-striped', html)
+        self.assertEqual(base_markdown(text), html)
+        self.assertEqual(markdown_cache.stats()['hits'], 1)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command(
+            'benchmark_markdown', entries=5, repeat=1, stdout=out)
+        self.assertIn('Rendering 5 entries', out.getvalue())
+        self.assertIn('cached', out.getvalue())
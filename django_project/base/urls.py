@@ -43,6 +43,10 @@ from .views import (
     project_flatpage
 )
 from .api_views.stripe_intent import StripeIntent
+from .api_views.background_job import (
+    BackgroundJobDownload,
+    BackgroundJobStatus,
+)
 
 urlpatterns = [
     # basic app views
@@ -152,6 +156,12 @@ urlpatterns = [
     url(regex='^stripe-intent/(?P<amount>[\d-]+)/$',
         view=StripeIntent.as_view(),
         name='stripe-intent'),
+    url(regex=r'^background-job/(?P<pk>\d+)/$',
+        view=BackgroundJobStatus.as_view(),
+        name='background-job-status'),
+    url(regex=r'^background-job/(?P<pk>\d+)/download/$',
+        view=BackgroundJobDownload.as_view(),
+        name='background-job-download'),
 
     # Project flatpage urls
     url(r'^(?P<project_slug>[\w-]+)/flatpage(?P<url>.*)$',
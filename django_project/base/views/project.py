@@ -16,7 +16,8 @@ from django.views.generic import (
 from braces.views import LoginRequiredMixin, StaffuserRequiredMixin
 from pure_pagination.mixins import PaginationMixin
 from changes.models import Version
-from ..models import Project, Domain
+from ..domain_routing import request_domain_route
+from ..models import Project
 from ..forms import ProjectForm, ScreenshotFormset
 from vota.models import Committee, Ballot
 from changes.models import SponsorshipPeriod
@@ -120,13 +121,10 @@ class ProjectListView(ProjectMixin, PaginationMixin, ListView):
             projects_qs = Project.public_objects.all()
 
         # filter project query set for custom domain
-        try:
-            domain = self.request.get_host().split(':')[0]
-            custom_domain = Domain.objects.get(domain=domain, approved=True)
-            main_organisation = custom_domain.organisation
-            projects_qs = projects_qs.filter(organisation=main_organisation)
-        except Domain.DoesNotExist:
-            projects_qs = projects_qs
+        custom_domain = request_domain_route(self.request)
+        if custom_domain is not None:
+            projects_qs = projects_qs.filter(
+                organisation_id=custom_domain.organisation_id)
 
         return projects_qs
 
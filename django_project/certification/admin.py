@@ -4,6 +4,7 @@
 from django.contrib.gis import admin
 from simple_history.admin import SimpleHistoryAdmin
 from certification.models.certificate import Certificate
+from certification.models.certificate_email import CertificateEmail
 from certification.models.certificate_type import CertificateType
 from certification.models.course import Course
 from certification.models.training_center import TrainingCenter
@@ -39,6 +40,15 @@ class CertificateAdmin(admin.ModelAdmin):
         return query_set
 
 
+class CertificateEmailAdmin(admin.ModelAdmin):
+    """Certificate email admin model."""
+
+    list_display = ('email', 'course', 'status', 'date_sent')
+    list_filter = ('status',)
+    search_fields = ('email', 'course__name',)
+    raw_id_fields = ('course', 'attendee', 'job')
+
+
 class CertificateTypeAdmin(admin.ModelAdmin):
     """CertificateType admin model."""
 
@@ -196,6 +206,7 @@ class ExternalReviewerAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Certificate, CertificateAdmin)
+admin.site.register(CertificateEmail, CertificateEmailAdmin)
 admin.site.register(CertificateType, CertificateTypeAdmin)
 admin.site.register(Attendee, AttendeeAdmin)
 admin.site.register(Course, CourseAdmin)
@@ -0,0 +1,16 @@
+# coding=utf-8
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView, Response
+from ..certificate_assets import asset_cache
+
+
+class CertificateAssetCacheStats(APIView):
+    """API to get the hit/miss counters of the certificate asset cache.
+
+    Counters are per process, the response includes the process id.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(asset_cache.stats())
@@ -0,0 +1,252 @@
+# coding=utf-8
+"""Emails sent to the attendees of a course with their certificate link.
+
+The emails of a course are sent by the ``certification.email_attendees``
+background job. Every email is recorded as a CertificateEmail row first,
+then the emails are sent over one mail connection in batches, pausing
+between batches so the mail server is not flooded. A refused address only
+fails its own email.
+
+A row is marked sending before its email is handed to the mail server and
+saved with the outcome right after, so a retried job only sends the emails
+still pending. An email the interrupted job was sending is failed rather
+than sent twice.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.mail import EmailMessage, get_connection
+from django.core.validators import validate_email
+from django.utils import timezone
+
+from .models.certificate import Certificate
+from .models.certificate_email import CertificateEmail
+
+logger = logging.getLogger(__name__)
+
+EMAIL_ATTENDEES = 'certification.email_attendees'
+
+CERTIFICATE_EMAIL = (
+    'Dear {firstname} {lastname},\n\n'
+    'Congratulations!\n'
+    'Your certificate from the following course '
+    'has been issued.\n\n'
+    'Course type: {coursetype}\n'
+    'Course date: {start_date} to {end_date}\n'
+    'Training center: {training_center}\n'
+    'Certifying organisation: {organisation}\n\n'
+    'You may print the certificate '
+    'by visiting:\n'
+    'http://{domain}/en/{project_slug}/certifyingorganisation/'
+    '{organisation_slug}/course/'
+    '{course_slug}/print/{pk}/\n\n'
+    'Sincerely,\n{convener_firstname} {convener_lastname}'
+)
+
+
+def _no_progress(percentage, message):
+    pass
+
+
+def email_attendees_key(course):
+    """Return the background job key of the emails of a course."""
+
+    return 'email-attendees:{}'.format(course.pk)
+
+
+def paid_attendees(course):
+    """Return the attendees of a course with a paid certificate.
+
+    :rtype: list
+    """
+
+    return [
+        certificate.attendee for certificate in
+        Certificate.objects.filter(
+            is_paid=True, course=course).select_related('attendee')]
+
+
+def certificate_email(course, attendee, site):
+    """Return the subject and the body of the email of an attendee."""
+
+    data = {
+        'firstname': attendee.firstname,
+        'lastname': attendee.surname,
+        'coursetype': course.course_type,
+        'start_date': course.start_date.strftime('%d %B %Y'),
+        'end_date': course.end_date.strftime('%d %B %Y'),
+        'training_center': course.training_center,
+        'organisation': course.certifying_organisation.name,
+        'domain': site,
+        'project_slug': course.certifying_organisation.project.slug,
+        'organisation_slug': course.certifying_organisation.slug,
+        'course_slug': course.slug,
+        'pk': attendee.pk,
+        'convener_firstname': course.course_convener.user.first_name,
+        'convener_lastname': course.course_convener.user.last_name}
+    return (
+        'Certificate from {} Course'.format(course.course_type),
+        CERTIFICATE_EMAIL.format(**data))
+
+
+def queue_certificate_emails(course, job=None):
+    """Record the emails of the attendees with a paid certificate.
+
+    The attendees are loaded with one query and the emails are created in
+    bulk. The emails already recorded for the job are reused.
+
+    :param job: The background job sending the emails.
+    :type job: base.models.BackgroundJob
+
+    :returns: The pending emails, with their attendee loaded.
+    :rtype: list of CertificateEmail
+    """
+
+    if job is not None:
+        recorded = CertificateEmail.objects.filter(job=job)
+        if recorded.exists():
+            # The previous attempt stopped while sending these, they may
+            # have been delivered.
+            recorded.filter(status=CertificateEmail.SENDING).update(
+                status=CertificateEmail.FAILED,
+                error='Interrupted while sending, it may have been sent.')
+            return list(recorded.filter(
+                status=CertificateEmail.PENDING).select_related('attendee'))
+    emails = [
+        CertificateEmail(
+            course=course,
+            attendee=certificate.attendee,
+            job=job,
+            email=certificate.attendee.email)
+        for certificate in Certificate.objects.filter(
+            is_paid=True, course=course).select_related(
+            'attendee').order_by('pk')]
+    return CertificateEmail.objects.bulk_create(emails)
+
+
+def _deliver(connection, course, site, email):
+    """Send one email, recording whether it was delivered."""
+
+    try:
+        validate_email(email.email)
+    except ValidationError:
+        email.status = CertificateEmail.FAILED
+        email.error = 'Invalid email address.'
+        return
+    subject, body = certificate_email(course, email.attendee, site)
+    message = EmailMessage(
+        subject, body, settings.DEFAULT_FROM_EMAIL, [email.email],
+        connection=connection)
+    try:
+        connection.send_messages([message])
+    except Exception as e:
+        logger.warning('Could not send the certificate email to %s: %s',
+                       email.email, e)
+        email.status = CertificateEmail.FAILED
+        email.error = str(e) or e.__class__.__name__
+        # The connection may be broken, start a new one.
+        connection.close()
+        try:
+            connection.open()
+        except Exception:
+            logger.warning('Could not reopen the mail connection')
+        return
+    email.status = CertificateEmail.SENT
+    email.error = ''
+    email.date_sent = timezone.now()
+
+
+def send_certificate_emails(
+        course, site, emails, connection=None, batch_size=None,
+        batch_delay=None, progress=None):
+    """Send recorded certificate emails over one connection, in batches.
+
+    Each email is marked sending before it is sent and its outcome is saved
+    right after, emails which are no longer pending are skipped.
+
+    :param emails: Pending emails, see queue_certificate_emails.
+    :type emails: list of CertificateEmail
+
+    :param connection: Mail connection, a new one of the EMAIL_BACKEND
+        setting by default.
+
+    :param batch_size: Emails sent between pauses, the
+        CERTIFICATE_EMAIL_BATCH_SIZE setting by default.
+    :type batch_size: int
+
+    :param batch_delay: Seconds paused between batches, the
+        CERTIFICATE_EMAIL_BATCH_DELAY setting by default.
+    :type batch_delay: float
+
+    :param progress: Called with a percentage and a message.
+    :type progress: callable
+
+    :returns: The numbers of sent and failed emails.
+    :rtype: tuple
+    """
+
+    if progress is None:
+        progress = _no_progress
+    if batch_size is None:
+        batch_size = getattr(settings, 'CERTIFICATE_EMAIL_BATCH_SIZE', 50)
+    if batch_delay is None:
+        batch_delay = getattr(settings, 'CERTIFICATE_EMAIL_BATCH_DELAY', 1)
+    if connection is None:
+        connection = get_connection()
+
+    sent = 0
+    failed = 0
+    connection.open()
+    try:
+        for start in range(0, len(emails), batch_size):
+            if start and batch_delay:
+                time.sleep(batch_delay)
+            batch = emails[start:start + batch_size]
+            for email in batch:
+                if email.status != CertificateEmail.PENDING:
+                    continue
+                marked = CertificateEmail.objects.filter(
+                    pk=email.pk, status=CertificateEmail.PENDING).update(
+                    status=CertificateEmail.SENDING)
+                if not marked:
+                    continue
+                _deliver(connection, course, site, email)
+                email.save(update_fields=['status', 'error', 'date_sent'])
+                if email.status == CertificateEmail.SENT:
+                    sent += 1
+                else:
+                    failed += 1
+            done = start + len(batch)
+            progress(
+                100 * done // len(emails),
+                'Processed {} of {} emails'.format(done, len(emails)))
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def email_course_attendees(course, site, job=None, progress=None):
+    """Send every attendee with a paid certificate the link to it.
+
+    :param course: The course, with its course type, training center,
+        certifying organisation and convener loaded.
+    :type course: certification.models.Course
+
+    :param site: Domain of the certificate links.
+    :type site: str
+
+    :param job: The background job sending the emails.
+    :type job: base.models.BackgroundJob
+
+    :param progress: Called with a percentage and a message.
+    :type progress: callable
+
+    :returns: The numbers of sent and failed emails.
+    :rtype: tuple
+    """
+
+    emails = queue_certificate_emails(course, job)
+    return send_certificate_emails(course, site, emails, progress=progress)
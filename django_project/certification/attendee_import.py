@@ -0,0 +1,214 @@
+# coding=utf-8
+"""Bulk import of the attendees of a course from a CSV roster.
+
+Rows are parsed while the upload is read and imported in batches. Each
+batch resolves its existing attendees and course attendees with one query
+each and creates the missing ones with bulk_create, the whole import runs
+in one transaction so a failure never leaves a half imported roster.
+"""
+
+import codecs
+import csv
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models.attendee import (
+    Attendee,
+    AttendeeNameCounter,
+    attendee_name,
+    attendee_slug,
+)
+from .models.certifying_organisation import validate_email_address
+from .models.course_attendee import CourseAttendee
+
+IMPORT_BATCH_SIZE = 500
+
+CREATED = 'created'
+ADDED = 'added'
+ALREADY_IN_COURSE = 'already in course'
+INVALID = 'invalid'
+
+
+class AttendeeImportRow(object):
+    """Outcome of the import of one row of the roster."""
+
+    def __init__(self, line, firstname, surname, email):
+        self.line = line
+        self.firstname = firstname
+        self.surname = surname
+        self.email = email
+        self.status = None
+        self.error = ''
+        self.attendee = None
+
+    @property
+    def key(self):
+        return self.firstname, self.surname, self.email
+
+    def __str__(self):
+        if self.error:
+            return 'Line {}: {}'.format(self.line, self.error)
+        return 'Line {}: {} {} {}'.format(
+            self.line, self.firstname, self.surname, self.status)
+
+
+class AttendeeImportReport(object):
+    """Row level report of a roster import."""
+
+    def __init__(self):
+        self.rows = []
+
+    def _count(self, *statuses):
+        return len([row for row in self.rows if row.status in statuses])
+
+    @property
+    def attendee_count(self):
+        """Number of attendees created."""
+        return self._count(CREATED)
+
+    @property
+    def course_attendee_count(self):
+        """Number of attendees added to the course."""
+        return self._count(CREATED, ADDED)
+
+    @property
+    def existing_attendee_count(self):
+        """Number of rows whose attendee was already in the course."""
+        return self._count(ALREADY_IN_COURSE)
+
+    @property
+    def invalid_rows(self):
+        return [row for row in self.rows if row.status == INVALID]
+
+
+def read_attendee_rows(attendees_file, encoding='utf-8'):
+    """Parse a roster file incrementally.
+
+    The first three columns are the first name, surname and email of the
+    attendee, whatever their header.
+
+    :param attendees_file: The uploaded CSV file.
+    :type attendees_file: django.core.files.File
+
+    :returns: An iterator of AttendeeImportRow.
+    """
+
+    reader = csv.reader(codecs.iterdecode(attendees_file, encoding))
+    next(reader, None)  # header
+    for row in reader:
+        if not any(value.strip() for value in row):
+            continue
+        values = [value.strip() for value in row[:3]]
+        values += [''] * (3 - len(values))
+        yield AttendeeImportRow(reader.line_num, *values)
+
+
+def _validate(row):
+    if not row.firstname or not row.surname or not row.email:
+        return 'First name, surname and email are required.'
+    try:
+        validate_email_address(row.email)
+    except ValidationError as e:
+        return ' '.join(e.messages)
+    return ''
+
+
+def import_attendees(rows, course, certifying_organisation, author,
+                     batch_size=IMPORT_BATCH_SIZE):
+    """Create the attendees of a roster and add them to a course.
+
+    Attendees are matched on first name, surname and email within the
+    certifying organisation, missing ones are created.
+
+    :param rows: Rows of the roster, see read_attendee_rows.
+    :type rows: iterable
+
+    :param course: The course the attendees are added to.
+    :type course: certification.models.Course
+
+    :param certifying_organisation: Organisation of the attendees.
+    :type certifying_organisation: certification.models.CertifyingOrganisation
+
+    :param author: User importing the roster.
+    :type author: django.contrib.auth.models.User
+
+    :rtype: AttendeeImportReport
+    """
+
+    report = AttendeeImportReport()
+    # Attendees of the previous batches, by key.
+    imported = {}
+    rows = iter(rows)
+    with transaction.atomic():
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            _import_batch(
+                batch, imported, course, certifying_organisation, author)
+            report.rows.extend(batch)
+    return report
+
+
+def _import_batch(batch, imported, course, certifying_organisation, author):
+    valid_rows = []
+    for row in batch:
+        row.error = _validate(row)
+        if row.error:
+            row.status = INVALID
+        else:
+            valid_rows.append(row)
+
+    emails = set(row.email for row in valid_rows)
+    for attendee in Attendee.objects.filter(
+            certifying_organisation=certifying_organisation,
+            email__in=emails):
+        key = (attendee.firstname, attendee.surname, attendee.email)
+        imported.setdefault(key, attendee)
+
+    new_attendees = {}
+    for row in valid_rows:
+        if row.key not in imported and row.key not in new_attendees:
+            new_attendees[row.key] = Attendee(
+                firstname=row.firstname,
+                surname=row.surname,
+                email=row.email,
+                certifying_organisation=certifying_organisation,
+                author=author)
+    if new_attendees:
+        names = {}
+        for attendee in new_attendees.values():
+            name = (attendee.firstname, attendee.surname)
+            names[name] = names.get(name, 0) + 1
+        counts = AttendeeNameCounter.allocate_many(names)
+        for attendee in new_attendees.values():
+            name = (attendee.firstname, attendee.surname)
+            attendee.slug = attendee_slug(
+                attendee_name(attendee.firstname, attendee.surname,
+                              counts[name]))
+            counts[name] += 1
+        Attendee.objects.bulk_create(new_attendees.values())
+        imported.update(new_attendees)
+
+    attendee_ids = set(imported[row.key].pk for row in valid_rows)
+    in_course = set(CourseAttendee.objects.filter(
+        course=course, attendee__in=attendee_ids
+    ).values_list('attendee', flat=True))
+
+    course_attendees = []
+    for row in valid_rows:
+        attendee = imported[row.key]
+        row.attendee = attendee
+        if attendee.pk in in_course:
+            row.status = ALREADY_IN_COURSE
+            continue
+        in_course.add(attendee.pk)
+        course_attendees.append(CourseAttendee(
+            attendee=attendee, course=course, author=author))
+        if row.key in new_attendees:
+            row.status = CREATED
+        else:
+            row.status = ADDED
+    CourseAttendee.objects.bulk_create(course_attendees)
@@ -0,0 +1,189 @@
+# coding=utf-8
+"""Process level cache of the images drawn on certificates.
+
+Logos, signatures and certificate backgrounds are shared by every
+certificate of a course, so each image is decoded once per process and
+reused by the following certificates. Entries are keyed by file path and
+modification time, so a replaced image is picked up on the next render.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from reportlab.lib.utils import ImageReader
+
+# Default maximum size of the decoded images kept in memory.
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Maximum number of file digests remembered.
+MAX_DIGESTS = 4096
+
+
+def _image_path(image):
+    """Return the filesystem path of an image field file, if it has one.
+
+    :param image: An image field file, a path or an in-memory image.
+
+    :returns: The absolute path, or None when the image is not a file on
+        the local filesystem.
+    :rtype: str
+    """
+
+    if isinstance(image, str):
+        return image
+    try:
+        return image.path
+    except (AttributeError, NotImplementedError, ValueError,
+            SuspiciousFileOperation):
+        return None
+
+
+class CertificateAssetCache(object):
+    """LRU cache of decoded certificate images with a byte limit."""
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return getattr(
+            settings, 'CERTIFICATE_ASSET_CACHE_BYTES', DEFAULT_CACHE_BYTES)
+
+    def image_reader(self, image):
+        """Return a reportlab ImageReader for an image, decoded once.
+
+        :param image: An image field file, a path or a PIL image.
+
+        :returns: The image reader, or None when there is no image.
+        :rtype: ImageReader
+        """
+
+        if not image:
+            return None
+
+        pathname = _image_path(image)
+        try:
+            key = (pathname, os.path.getmtime(pathname))
+        except (TypeError, OSError):
+            # Not a local file (e.g. an uploaded preview background),
+            # nothing to key it on.
+            return ImageReader(image)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        reader = ImageReader(pathname)
+        # Force decoding now so that later certificates reuse the pixels.
+        reader.getRGBData()
+        width, height = reader.getSize()
+        # RGB data plus an eventual alpha channel.
+        nbytes = width * height * 4
+        if nbytes > self.max_bytes:
+            return reader
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (reader, nbytes)
+                self.size += nbytes
+            self._evict()
+        return reader
+
+    def file_digest(self, image):
+        """Return the SHA-1 hex digest of the content of an image file.
+
+        Digests are remembered per path, modification time and size, so an
+        unchanged file is only read once per process.
+
+        :param image: An image field file or a path.
+
+        :returns: The digest, the file name when the file can not be read
+            or an empty string when there is no image.
+        :rtype: str
+        """
+
+        if not image:
+            return ''
+
+        pathname = _image_path(image)
+        try:
+            stat = os.stat(pathname)
+        except (TypeError, OSError):
+            return getattr(image, 'name', '') or ''
+        key = (pathname, stat.st_mtime, stat.st_size)
+
+        with self._lock:
+            digest = self._digests.get(key)
+            if digest is not None:
+                self._digests.move_to_end(key)
+                return digest
+
+        sha = hashlib.sha1()
+        with open(pathname, 'rb') as image_file:
+            for chunk in iter(lambda: image_file.read(64 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with self._lock:
+            self._digests[key] = digest
+            while len(self._digests) > MAX_DIGESTS:
+                self._digests.popitem(last=False)
+        return digest
+
+    def _evict(self):
+        """Drop the least recently used images until under the limit."""
+
+        max_bytes = self.max_bytes
+        while self.size > max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.size -= nbytes
+            self.evictions += 1
+
+    def clear(self):
+        """Empty the cache and reset its counters."""
+
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Return the counters of the cache.
+
+        :returns: Hits, misses, evictions, number of entries and bytes used.
+        :rtype: dict
+        """
+
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'pid': os.getpid(),
+            }
+
+
+asset_cache = CertificateAssetCache()
@@ -0,0 +1,103 @@
+# coding=utf-8
+"""Bulk issuance of the certificates of a course.
+
+All missing certificates of a course are created in one transaction with
+a constant number of queries, whatever the number of attendees.
+"""
+
+from django.db import transaction
+
+from base.models.project import Project
+from .models.certificate import (
+    Certificate,
+    CertificateSequence,
+    certificate_id_prefix,
+)
+from .models.certifying_organisation import CertifyingOrganisation
+from .models.course_attendee import CourseAttendee
+
+
+class IssuedCertificates(object):
+    """Outcome of a bulk issuance."""
+
+    def __init__(self, certificates, credits_used, remaining_credits):
+        self.certificates = certificates
+        self.credits_used = credits_used
+        self.remaining_credits = remaining_credits
+
+    @property
+    def paid(self):
+        return [
+            certificate for certificate in self.certificates
+            if certificate.is_paid]
+
+    @property
+    def unpaid(self):
+        return [
+            certificate for certificate in self.certificates
+            if not certificate.is_paid]
+
+
+def issue_course_certificates(course, author):
+    """Create the missing certificates of every attendee of a course.
+
+    Certificates are paid with the credits of the certifying organisation
+    as long as it has enough of them, the remaining ones are issued
+    unpaid. Certificate IDs are allocated in one block from the
+    CertificateSequence of the project.
+
+    :param course: The course.
+    :type course: certification.models.Course
+
+    :param author: User issuing the certificates.
+    :type author: django.contrib.auth.models.User
+
+    :returns: The created certificates and the credits used.
+    :rtype: IssuedCertificates
+    """
+
+    with transaction.atomic():
+        project = Project.objects.get(
+            pk=course.certifying_organisation.project_id)
+        organisation = CertifyingOrganisation.objects.select_for_update(
+        ).get(pk=course.certifying_organisation_id)
+
+        attendee_ids = list(
+            CourseAttendee.objects.filter(course=course).exclude(
+                attendee__in=Certificate.objects.filter(
+                    course=course).values('attendee')
+            ).order_by('pk').values_list('attendee', flat=True))
+        if not attendee_ids:
+            return IssuedCertificates(
+                [], 0, organisation.organisation_credits)
+
+        prefix = certificate_id_prefix(project)
+        number = CertificateSequence.allocate(
+            project, len(attendee_ids)) - 1
+        credits = organisation.organisation_credits or 0
+        cost = project.certificate_credit or 0
+
+        certificates = []
+        credits_used = 0
+        for attendee_id in attendee_ids:
+            number += 1
+            remaining_credits = credits - cost
+            is_paid = remaining_credits >= 0
+            if is_paid:
+                credits = remaining_credits
+                credits_used += cost
+            certificates.append(Certificate(
+                certificateID='{}{}'.format(prefix, number),
+                author=author,
+                attendee_id=attendee_id,
+                course=course,
+                is_paid=is_paid))
+
+        Certificate.objects.bulk_create(certificates)
+        if credits_used:
+            CertifyingOrganisation.objects.filter(
+                pk=organisation.pk).update(organisation_credits=credits)
+        else:
+            credits = organisation.organisation_credits
+
+    return IssuedCertificates(certificates, credits_used, credits)
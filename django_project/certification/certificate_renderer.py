@@ -0,0 +1,571 @@
+# coding=utf-8
+"""Certificate PDF rendering for certification app.
+
+The single certificate renderer (:func:`generate_pdf`) draws one certificate
+on a reportlab canvas. :func:`render_certificates` drives it for a batch of
+certificates, fanning the work out over a process pool and writing every
+file atomically so that a half written PDF is never served.
+
+The certificates of a whole course are rendered again and archived by the
+``certification.regenerate_certificates`` and
+``certification.certificates_zip`` background jobs.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+from common.zip_stream import stream_zip
+from .certificate_assets import asset_cache
+from .models.certificate import Certificate
+
+logger = logging.getLogger(__name__)
+
+REGENERATE_CERTIFICATES = 'certification.regenerate_certificates'
+CERTIFICATES_ZIP = 'certification.certificates_zip'
+
+DEFAULT_WORDING = 'Has attended and completed the course:'
+
+# Bump when the layout drawn by generate_pdf changes, so that every cached
+# certificate PDF is rendered again.
+LAYOUT_VERSION = 1
+
+
+def register_fonts():
+    """Register the fonts used on the certificate with reportlab.
+
+    Fonts are parsed once per process, later calls are no-ops.
+    """
+
+    registered = pdfmetrics.getRegisteredFontNames()
+    if 'Noto-Bold' in registered and 'Noto-Regular' in registered:
+        return
+    try:
+        font_folder = os.path.join(
+            settings.STATIC_ROOT, 'fonts/times-new-roman')
+        bold_ttf_file = os.path.join(
+            font_folder, 'Times New Roman Gras 700.ttf')
+        regular_ttf_file = os.path.join(
+            font_folder, 'Times New Roman 400.ttf')
+        pdfmetrics.registerFont(TTFont('Noto-Bold', bold_ttf_file))
+        pdfmetrics.registerFont(TTFont('Noto-Regular', regular_ttf_file))
+    except (TTFError, KeyError):
+        pass
+
+
+def generate_pdf(
+        pathname, project, course, attendee, certificate, current_site,
+        wording=DEFAULT_WORDING):
+    """Create the PDF object, using the response object as its file."""
+
+    register_fonts()
+
+    page = canvas.Canvas(pathname, pagesize=landscape(A4))
+    width, height = A4
+    center = height * 0.5
+    convener_name = \
+        '{} {}'.format(
+            course.course_convener.user.first_name,
+            course.course_convener.user.last_name)
+
+    if course.course_convener.title:
+        convener_name = \
+            '{} {}'.format(
+                course.course_convener.title,
+                convener_name)
+
+    if course.course_convener.degree:
+        convener_name = \
+            '{}, {}'.format(
+                convener_name,
+                course.course_convener.degree)
+
+    course_duration = \
+        'From {} {} {} to {} {} {}'.format(
+            course.start_date.day,
+            course.start_date.strftime('%B'),
+            course.start_date.year,
+            course.end_date.day,
+            course.end_date.strftime('%B'),
+            course.end_date.year)
+
+    if course.course_type.instruction_hours:
+        course_duration = \
+            '{} ({} hours of instruction)'.format(
+                course_duration,
+                course.course_type.instruction_hours)
+
+    project_logo = asset_cache.image_reader(project.image_file)
+    organisation_logo = asset_cache.image_reader(
+        course.certifying_organisation.logo)
+    project_representative_signature = asset_cache.image_reader(
+        project.project_representative_signature)
+    convener_signature = asset_cache.image_reader(
+        course.course_convener.signature)
+    background = asset_cache.image_reader(course.template_certificate)
+
+    # Certificate margin.
+    margin_right = height - 50
+    margin_left = 50
+    margin_bottom = 50
+    max_left = margin_right - 100
+
+    # Draw things on the PDF. Here's where the PDF generation happens.
+    # See the ReportLab documentation for the full list of functionality.
+    if background is not None:
+        page.drawImage(
+            background, 0, 0, height=width, width=height,
+            preserveAspectRatio=True, mask='auto')
+    page.setFillColorRGB(0.1, 0.1, 0.1)
+    page.setFont('Noto-Regular', 18)
+
+    if project_logo is not None:
+        page.drawImage(
+            project_logo, 50, 450, width=100, height=100,
+            preserveAspectRatio=True, mask='auto')
+
+    if organisation_logo is not None:
+        page.drawImage(
+            organisation_logo, max_left, 450, height=100, width=100,
+            preserveAspectRatio=True, anchor='c', mask='auto')
+
+    page.setFont('Noto-Bold', 26)
+    page.drawCentredString(center, 480, 'Certificate of Completion')
+
+    page.setFont('Noto-Bold', 26)
+
+    page.drawCentredString(
+        center, 400, '%s %s' % (
+            attendee.firstname,
+            attendee.surname))
+    page.setFont('Noto-Regular', 16)
+    page.drawCentredString(
+        center, 370, wording)
+    page.setFont('Noto-Bold', 20)
+    page.drawCentredString(
+            center, 335, course.course_type.name)
+    page.setFont('Noto-Regular', 16)
+    page.drawCentredString(
+        center, 300, 'With a trained competence in:')
+    page.setFont('Noto-Bold', 14)
+    page.drawCentredString(
+        center, 280, '{}'.format(course.trained_competence))
+    page.setFont('Noto-Regular', 16)
+    page.drawCentredString(
+        center, 250, '{}'.format(course_duration))
+
+    page.setFillColorRGB(0.1, 0.1, 0.1)
+    page.drawCentredString(
+        center, 220, 'Convened by {} at {}'.format(
+            convener_name,
+            course.training_center))
+
+    if project_representative_signature is not None:
+        page.drawImage(
+            project_representative_signature,
+            (margin_left + 100),
+            (margin_bottom + 70),
+            width=100,
+            height=70,
+            preserveAspectRatio=True,
+            anchor='s',
+            mask='auto')
+
+    if convener_signature is not None:
+        page.drawImage(
+            convener_signature, (margin_right - 200), (margin_bottom + 70),
+            width=100, height=70, preserveAspectRatio=True, anchor='s',
+            mask='auto')
+
+    page.setFont('Noto-Regular', 12)
+    if project.project_representative:
+        page.drawCentredString(
+            (margin_left + 150), (margin_bottom + 60),
+            '{} {}'.format(
+                project.project_representative.first_name,
+                project.project_representative.last_name))
+    page.drawCentredString(
+        (margin_right - 150), (margin_bottom + 60),
+        '{}'.format(convener_name))
+    page.line(
+        (margin_left + 70), (margin_bottom + 55),
+        (margin_left + 230), (margin_bottom + 55))
+    page.line(
+        (margin_right - 70), (margin_bottom + 55),
+        (margin_right - 230), (margin_bottom + 55))
+    page.setFont('Noto-Regular', 13)
+    page.drawCentredString(
+        (margin_left + 150),
+        (margin_bottom + 40),
+        'Project Representative')
+    page.drawCentredString(
+        (margin_right - 150), (margin_bottom + 40), 'Course Convener')
+
+    # Footnotes.
+    page.setFont('Noto-Regular', 14)
+    page.drawString(
+        margin_left,
+        margin_bottom - 10,
+        'ID: {}'.format(certificate.certificateID))
+    page.setFont('Noto-Regular', 8)
+    page.drawString(
+        margin_left, (margin_bottom - 20),
+        'You can verify this certificate by visiting '
+        'http://{}/en/{}/certificate/{}/.'
+        ''.format(current_site, project.slug, certificate.certificateID))
+
+    # Close the PDF object cleanly.
+    page.showPage()
+    page.save()
+
+
+def certificate_pdf_folder(project):
+    """Return the folder where the certificate PDFs of a project live.
+
+    :param project: The project owning the certificates.
+    :type project: base.models.Project
+
+    :returns: Absolute path of the folder.
+    :rtype: str
+    """
+
+    project_folder = (project.name.lower()).replace(' ', '_')
+    return os.path.join(settings.MEDIA_ROOT, 'pdf', project_folder)
+
+
+def certificate_pdf_path(project, certificate):
+    """Return the path of the cached PDF file of a certificate.
+
+    :param project: The project owning the certificate.
+    :type project: base.models.Project
+
+    :param certificate: The certificate.
+    :type certificate: certification.models.Certificate
+
+    :returns: Absolute path of the PDF file.
+    :rtype: str
+    """
+
+    filename = '{}.{}'.format(certificate.certificateID, 'pdf')
+    return os.path.join(certificate_pdf_folder(project), filename)
+
+
+def certificate_wording(course):
+    """Return the wording printed on the certificates of a course."""
+
+    if course.certificate_type is not None:
+        return course.certificate_type.wording
+    return DEFAULT_WORDING
+
+
+def certificate_fingerprint(
+        project, course, attendee, certificate, current_site,
+        wording=DEFAULT_WORDING):
+    """Return a fingerprint of everything generate_pdf draws.
+
+    Two certificates with the same fingerprint render to the same PDF, so
+    a cached PDF can be served as long as its fingerprint is unchanged.
+
+    :returns: SHA-1 hex digest.
+    :rtype: str
+    """
+
+    convener = course.course_convener
+    representative = project.project_representative
+    values = [
+        LAYOUT_VERSION,
+        certificate.certificateID,
+        attendee.firstname,
+        attendee.surname,
+        wording,
+        course.course_type.name,
+        course.course_type.instruction_hours,
+        course.trained_competence,
+        course.start_date.isoformat(),
+        course.end_date.isoformat(),
+        '{}'.format(course.training_center),
+        convener.user.first_name,
+        convener.user.last_name,
+        convener.title,
+        convener.degree,
+        project.slug,
+        current_site,
+        representative.first_name if representative else None,
+        representative.last_name if representative else None,
+        asset_cache.file_digest(project.image_file),
+        asset_cache.file_digest(project.project_representative_signature),
+        asset_cache.file_digest(course.certifying_organisation.logo),
+        asset_cache.file_digest(convener.signature),
+        asset_cache.file_digest(course.template_certificate),
+    ]
+    return hashlib.sha1(repr(values).encode('utf-8')).hexdigest()
+
+
+def render_certificate_pdf(
+        pathname, project, course, attendee, certificate, current_site,
+        wording=DEFAULT_WORDING):
+    """Render a certificate PDF and atomically move it to its pathname.
+
+    The PDF is written to a temporary file in the target folder which is
+    renamed over ``pathname`` once it is complete, so readers never see a
+    partially written certificate.
+    """
+
+    folder = os.path.dirname(pathname)
+    if not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+
+    file_descriptor, temp_pathname = tempfile.mkstemp(
+        dir=folder, prefix='.', suffix='.pdf.tmp')
+    os.close(file_descriptor)
+    try:
+        generate_pdf(
+            temp_pathname, project, course, attendee, certificate,
+            current_site, wording)
+        os.replace(temp_pathname, pathname)
+    except BaseException:
+        if os.path.exists(temp_pathname):
+            os.remove(temp_pathname)
+        raise
+
+
+def ensure_certificate_pdf(project, course, certificate, current_site):
+    """Return the path of an up to date PDF of a certificate.
+
+    The cached PDF is rendered again when it is missing or when its
+    fingerprint no longer matches the certificate content.
+
+    :returns: Absolute path of the PDF file.
+    :rtype: str
+    """
+
+    wording = certificate_wording(course)
+    pathname = certificate_pdf_path(project, certificate)
+    fingerprint = certificate_fingerprint(
+        project, course, certificate.attendee, certificate, current_site,
+        wording)
+    if certificate.pdf_fingerprint == fingerprint and \
+            os.path.exists(pathname):
+        return pathname
+
+    render_certificate_pdf(
+        pathname, project, course, certificate.attendee, certificate,
+        current_site, wording)
+    certificate.pdf_fingerprint = fingerprint
+    Certificate.objects.filter(pk=certificate.pk).update(
+        pdf_fingerprint=fingerprint)
+    return pathname
+
+
+class CertificateRenderResult(object):
+    """Outcome of rendering one certificate in a batch."""
+
+    def __init__(
+            self, certificate_id, pathname, fingerprint='', error=None):
+        self.certificate_id = certificate_id
+        self.pathname = pathname
+        self.fingerprint = fingerprint
+        self.error = error
+
+    @property
+    def success(self):
+        return self.error is None
+
+    def __str__(self):
+        if self.success:
+            return '{}: OK'.format(self.certificate_id)
+        return '{}: {}'.format(self.certificate_id, self.error)
+
+
+def _render_task(task):
+    """Render a single certificate of a batch.
+
+    This is the unit of work sent to the process pool, so it must be a
+    module level function and must never raise.
+    """
+
+    project, course, certificate, current_site, wording = task
+    pathname = certificate_pdf_path(project, certificate)
+    try:
+        fingerprint = certificate_fingerprint(
+            project, course, certificate.attendee, certificate,
+            current_site, wording)
+        render_certificate_pdf(
+            pathname, project, course, certificate.attendee, certificate,
+            current_site, wording)
+    except Exception as e:
+        logger.exception(
+            'Failed to render certificate %s', certificate.certificateID)
+        return CertificateRenderResult(
+            certificate.certificateID, pathname, error=repr(e))
+    return CertificateRenderResult(
+        certificate.certificateID, pathname, fingerprint)
+
+
+def render_workers():
+    """Return the configured number of certificate rendering processes."""
+
+    workers = getattr(settings, 'CERTIFICATE_RENDER_WORKERS', None)
+    if workers is None:
+        workers = min(4, os.cpu_count() or 1)
+    return max(1, int(workers))
+
+
+def render_certificates(
+        project, course, certificates, current_site, workers=None):
+    """Render the PDFs of many certificates of a course.
+
+    Certificates are rendered in a pool of ``workers`` processes. With one
+    worker, or a single certificate, rendering happens in this process.
+
+    :param project: The project owning the course.
+    :type project: base.models.Project
+
+    :param course: The course of the certificates. Its convener, course
+        type, training center and certifying organisation should already
+        be loaded (select_related) as workers do not share this process'
+        database connection.
+    :type course: certification.models.Course
+
+    :param certificates: Certificates to render, with their attendee
+        loaded.
+    :type certificates: iterable
+
+    :param current_site: Domain printed on the certificate.
+    :type current_site: str
+
+    :param workers: Number of rendering processes. Defaults to the
+        CERTIFICATE_RENDER_WORKERS setting.
+    :type workers: int
+
+    :returns: One result per certificate, in input order.
+    :rtype: list of CertificateRenderResult
+    """
+
+    if workers is None:
+        workers = render_workers()
+    certificates = list(certificates)
+    wording = certificate_wording(course)
+    tasks = [
+        (project, course, certificate, current_site, wording)
+        for certificate in certificates
+    ]
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        results = [_render_task(task) for task in tasks]
+    else:
+        # Jobs run in threads of the worker, a forked process would
+        # inherit the database connections and locks of the other threads.
+        # Spawned processes start afresh and set Django up again.
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup) as executor:
+            results = list(executor.map(_render_task, tasks))
+
+    # Remember what the rendered PDFs contain.
+    rendered = []
+    for certificate, result in zip(certificates, results):
+        if result.success:
+            certificate.pdf_fingerprint = result.fingerprint
+            rendered.append(certificate)
+    Certificate.objects.bulk_update(rendered, ['pdf_fingerprint'])
+    return results
+
+
+def _no_progress(percentage, message):
+    pass
+
+
+def course_certificates_key(course):
+    """Return the background job key of the certificates of a course."""
+
+    return 'course-certificates:{}'.format(course.pk)
+
+
+def regenerate_course_certificates(
+        project, course, current_site, progress=None):
+    """Render the PDFs of all the certificates of a course again.
+
+    Certificates are rendered in batches of a few per rendering process,
+    reporting the progress after each batch.
+
+    :param progress: Called with a percentage and a message.
+    :type progress: callable
+
+    :returns: The results of the certificates which failed to render.
+    :rtype: list of CertificateRenderResult
+    """
+
+    if progress is None:
+        progress = _no_progress
+    certificates = list(Certificate.objects.filter(
+        course=course).select_related('attendee').order_by('pk'))
+    batch_size = 4 * render_workers()
+    failed = []
+    for start in range(0, len(certificates), batch_size):
+        batch = certificates[start:start + batch_size]
+        results = render_certificates(
+            project, course, batch, current_site)
+        failed.extend(result for result in results if not result.success)
+        done = start + len(batch)
+        progress(
+            100 * done // len(certificates),
+            'Rendered {} of {} certificates'.format(
+                done, len(certificates)))
+    return failed
+
+
+def build_certificates_zip(
+        pathname, project, course, current_site, progress=None):
+    """Write a zip archive of all the certificates of a course.
+
+    Certificates without an up to date PDF are rendered first.
+
+    :param pathname: Absolute path of the archive.
+    :type pathname: str
+
+    :param progress: Called with a percentage and a message.
+    :type progress: callable
+    """
+
+    if progress is None:
+        progress = _no_progress
+    certificates = list(Certificate.objects.filter(
+        course=course).select_related('attendee').order_by('pk'))
+    zip_subdir = '%s' % course.name
+
+    def certificate_files():
+        for index, certificate in enumerate(certificates):
+            certificate_pathname = ensure_certificate_pdf(
+                project, course, certificate, current_site)
+            progress(
+                100 * index // len(certificates),
+                'Added {} of {} certificates'.format(
+                    index + 1, len(certificates)))
+            yield (
+                os.path.join(
+                    zip_subdir, os.path.basename(certificate_pathname)),
+                certificate_pathname)
+
+    folder = os.path.dirname(pathname)
+    file_descriptor, temp_pathname = tempfile.mkstemp(
+        dir=folder, prefix='.', suffix='.zip.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as archive:
+            for chunk in stream_zip(certificate_files()):
+                archive.write(chunk)
+        os.replace(temp_pathname, pathname)
+    except BaseException:
+        if os.path.exists(temp_pathname):
+            os.remove(temp_pathname)
+        raise
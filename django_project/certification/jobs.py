@@ -0,0 +1,65 @@
+# coding=utf-8
+"""Background jobs of the certification app, run by the run_worker command."""
+
+import os
+
+from base.jobs import job_result_path, job_result_root, register_job
+from base.models.project import Project
+from .attendee_email import EMAIL_ATTENDEES, email_course_attendees
+from .certificate_renderer import (
+    CERTIFICATES_ZIP,
+    REGENERATE_CERTIFICATES,
+    build_certificates_zip,
+    regenerate_course_certificates,
+)
+from .models import Course
+
+
+def _course(job):
+    # Everything drawn on the certificates is loaded up front, the
+    # renderer processes do not query the database.
+    return Course.objects.select_related(
+        'course_convener__user', 'course_type', 'training_center',
+        'certifying_organisation__project', 'certificate_type').get(
+        pk=job.payload['course'])
+
+
+def _project(job):
+    return Project.objects.select_related('project_representative').get(
+        pk=job.payload['project'])
+
+
+@register_job(REGENERATE_CERTIFICATES)
+def regenerate_certificates(job):
+    """Render the PDFs of the certificates of a course again."""
+
+    failed = regenerate_course_certificates(
+        _project(job), _course(job), job.payload['site'], job.set_progress)
+    if failed:
+        raise RuntimeError(
+            'Failed to regenerate {} certificates: {}'.format(
+                len(failed),
+                ', '.join(result.certificate_id for result in failed)))
+
+
+@register_job(CERTIFICATES_ZIP)
+def certificates_zip(job):
+    """Build the zip archive of the certificates of a course."""
+
+    pathname = job_result_path(job, 'certificates.zip')
+    build_certificates_zip(
+        pathname, _project(job), _course(job), job.payload['site'],
+        job.set_progress)
+    return os.path.relpath(pathname, job_result_root())
+
+
+@register_job(EMAIL_ATTENDEES)
+def email_attendees(job):
+    """Email the attendees of a course the link to their certificate."""
+
+    sent, failed = email_course_attendees(
+        _course(job), job.payload['site'], job, job.set_progress)
+    message = 'Sent {} emails'.format(sent)
+    if failed:
+        message += ', {} could not be sent'.format(failed)
+    job.set_progress(100, message)
@@ -0,0 +1,88 @@
+# coding=utf-8
+"""Command to regenerate the certificate PDFs of a course or a project.
+
+The PDFs are rendered in a pool of worker processes, see
+certification.certificate_renderer.render_certificates.
+
+"""
+
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand, CommandError
+from base.models.project import Project
+from ...certificate_renderer import render_certificates
+from ...models.certificate import Certificate
+from ...models.course import Course
+
+
+class Command(BaseCommand):
+    """Regenerate the certificate PDFs of a project, optionally limited to
+    one course.
+
+    """
+
+    help = 'Regenerate the PDF of every certificate in a project or course.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'project_slug',
+            help='Slug of the project owning the certificates.')
+        parser.add_argument(
+            '--course',
+            dest='course_slug',
+            default=None,
+            help='Only regenerate the certificates of this course.')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of rendering processes. Defaults to the '
+                 'CERTIFICATE_RENDER_WORKERS setting.')
+        parser.add_argument(
+            '--domain',
+            default=None,
+            help='Domain printed in the verification link of the '
+                 'certificates. Defaults to the current Site.')
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.select_related(
+                'project_representative').get(slug=options['project_slug'])
+        except Project.DoesNotExist:
+            raise CommandError(
+                'Project "%s" does not exist.' % options['project_slug'])
+
+        domain = options['domain'] or Site.objects.get_current().domain
+
+        courses = Course.objects.filter(
+            certifying_organisation__project=project
+        ).select_related(
+            'course_convener__user', 'course_type', 'training_center',
+            'certifying_organisation', 'certificate_type')
+        if options['course_slug']:
+            courses = courses.filter(slug=options['course_slug'])
+            if not courses.exists():
+                raise CommandError(
+                    'Course "%s" does not exist.' % options['course_slug'])
+
+        rendered = 0
+        failed = 0
+        for course in courses:
+            certificates = Certificate.objects.filter(
+                course=course).select_related('attendee')
+            if not certificates:
+                continue
+            self.stdout.write('Regenerating certificates of %s' % course)
+            results = render_certificates(
+                project, course, certificates, domain,
+                workers=options['workers'])
+            for result in results:
+                if result.success:
+                    rendered += 1
+                else:
+                    failed += 1
+                    self.stderr.write(str(result))
+
+        self.stdout.write(
+            '%s certificates regenerated, %s failed.' % (rendered, failed))
+        if failed:
+            raise CommandError('Some certificates could not be regenerated.')
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certification', '0024_auto_20220605_0612'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='pdf_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Fingerprint of the content of the cached PDF. Empty when the PDF needs to be rendered again.', max_length=40),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.13 on 2026-10-18 10:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_certificate_sequences(apps, schema_editor):
+    """Start the sequence of every project at its highest certificate."""
+
+    Project = apps.get_model('base', 'Project')
+    Certificate = apps.get_model('certification', 'Certificate')
+    CertificateSequence = apps.get_model(
+        'certification', 'CertificateSequence')
+
+    project_names = dict(Project.objects.values_list('pk', 'name'))
+    last_numbers = {}
+    certificates = Certificate.objects.values_list(
+        'course__certifying_organisation__project', 'certificateID')
+    for project_id, certificate_id in certificates.iterator():
+        if project_id not in project_names:
+            continue
+        prefix = '{}-'.format(str(project_names[project_id]).replace(' ', ''))
+        number = str(certificate_id).replace(prefix, '', 1)
+        if not (certificate_id.startswith(prefix) and number.isdigit()):
+            continue
+        last_numbers[project_id] = max(
+            last_numbers.get(project_id, 0), int(number))
+
+    CertificateSequence.objects.bulk_create([
+        CertificateSequence(project_id=project_id, last_number=last_number)
+        for project_id, last_number in last_numbers.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_project_external_reviewer_invitation'),
+        ('certification', '0025_certificate_pdf_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateSequence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_number', models.PositiveIntegerField(default=0, help_text='Last certificate number issued in the project.')),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='certificate_sequence', to='base.project')),
+            ],
+        ),
+        migrations.RunPython(
+            backfill_certificate_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.13 on 2026-10-18 12:10
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_attendee_name_counters(apps, schema_editor):
+    """Start the counter of every name at its number of attendees."""
+
+    Attendee = apps.get_model('certification', 'Attendee')
+    AttendeeNameCounter = apps.get_model(
+        'certification', 'AttendeeNameCounter')
+
+    names = Attendee.objects.order_by().values(
+        'firstname', 'surname').annotate(count=Count('pk'))
+    AttendeeNameCounter.objects.bulk_create((
+        AttendeeNameCounter(
+            firstname=name['firstname'],
+            surname=name['surname'],
+            count=name['count'])
+        for name in names.iterator()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certification', '0026_certificatesequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendeeNameCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('firstname', models.CharField(max_length=200)),
+                ('surname', models.CharField(max_length=200)),
+                ('count', models.PositiveIntegerField(default=0, help_text='Number of attendees registered with this name.')),
+            ],
+            options={
+                'unique_together': {('firstname', 'surname')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='attendee',
+            index=models.Index(fields=['firstname', 'surname'], name='certification_attendee_name'),
+        ),
+        migrations.RunPython(
+            backfill_attendee_name_counters, migrations.RunPython.noop),
+    ]
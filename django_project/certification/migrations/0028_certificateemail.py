@@ -0,0 +1,33 @@
+# Generated by Django 3.2.13 on 2026-10-18 15:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_backgroundjob_retries'),
+        ('certification', '0027_attendeenamecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateEmail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.CharField(help_text='Address the email is sent to.', max_length=200)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True, default='')),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_sent', models.DateTimeField(blank=True, null=True)),
+                ('attendee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='certification.attendee')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='certification.course')),
+                ('job', models.ForeignKey(blank=True, help_text='Background job sending the email.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='base.backgroundjob')),
+            ],
+            options={
+                'ordering': ['pk'],
+                'unique_together': {('job', 'attendee')},
+            },
+        ),
+    ]
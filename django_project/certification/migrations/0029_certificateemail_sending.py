@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certification', '0028_certificateemail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificateemail',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
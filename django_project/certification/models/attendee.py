@@ -4,7 +4,10 @@
 """
 
 from django.urls import reverse
-from django.db import models
+from functools import reduce
+from operator import or_
+from django.db import models, transaction
+from django.db.models import Count, Q
 from django.utils.translation import ugettext_lazy as _
 from django.utils.text import slugify
 from django.contrib.auth.models import User
@@ -25,17 +28,31 @@ def increment_slug(_firstname, _surname):
 
     """
 
-    registered_attendee = Attendee.objects.all()
-    new_name = '%s %s' % (_firstname, _surname)
-    for attendee in registered_attendee:
-        if _firstname == attendee.firstname and _surname == attendee.surname:
-            _name = Attendee.objects.filter(
-                firstname=_firstname, surname=_surname)
-            count = _name.count() + 1
-            new_name = '%s %s %s' % (_firstname, _surname, count)
-            break
+    count = AttendeeNameCounter.allocate(_firstname, _surname)
+    return attendee_name(_firstname, _surname, count)
 
-    return new_name
+
+def attendee_name(_firstname, _surname, count):
+    """Return the name the slug of an attendee is made of.
+
+    :param count: Number of attendees registered before with this name.
+    :type count: int
+    """
+
+    if not count:
+        return '%s %s' % (_firstname, _surname)
+    return '%s %s %s' % (_firstname, _surname, count + 1)
+
+
+def attendee_slug(name):
+    """Return the slug of an attendee from its name, see attendee_name."""
+
+    words = name.split()
+    filtered_words = [word for word in
+                      words if word.lower() not in STOP_WORDS]
+    # unidecode() represents special characters (unicode data) in ASCII
+    new_list = unidecode(' '.join(filtered_words))
+    return slugify(new_list)[:50]
 
 
 class Attendee(models.Model):
@@ -80,16 +97,16 @@ class Attendee(models.Model):
         unique_together = [
             'firstname', 'surname', 'email', 'certifying_organisation',
         ]
+        indexes = [
+            models.Index(
+                fields=['firstname', 'surname'],
+                name='certification_attendee_name'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.pk:
             name = increment_slug(self.firstname, self.surname)
-            words = name.split()
-            filtered_words = [word for word in
-                              words if word.lower() not in STOP_WORDS]
-            # unidecode() represents special characters (unicode data) in ASCII
-            new_list = unidecode(' '.join(filtered_words))
-            self.slug = slugify(new_list)[:50]
+            self.slug = attendee_slug(name)
         super(Attendee, self).save(*args, **kwargs)
 
     def __unicode__(self):
@@ -107,3 +124,95 @@ class Attendee(models.Model):
         return reverse('attendee-detail', kwargs={
             'slug': self.slug,
         })
+
+
+class AttendeeNameCounter(models.Model):
+    """Number of attendees registered with a first name and surname.
+
+    Slugs of attendees sharing a name are numbered from this counter, it
+    is incremented under a row lock so concurrent registrations never get
+    the same number.
+    """
+
+    firstname = models.CharField(max_length=200)
+    surname = models.CharField(max_length=200)
+    count = models.PositiveIntegerField(
+        help_text=_('Number of attendees registered with this name.'),
+        default=0
+    )
+    objects = models.Manager()
+
+    class Meta:
+        unique_together = ['firstname', 'surname']
+
+    def __str__(self):
+        return '%s %s: %s' % (self.firstname, self.surname, self.count)
+
+    @classmethod
+    def allocate(cls, firstname, surname, count=1):
+        """Reserve numbers for new attendees with a name.
+
+        :param count: How many attendees are registered.
+        :type count: int
+
+        :returns: Number of attendees registered before with this name,
+            the new attendees take the following numbers.
+        :rtype: int
+        """
+
+        name = (firstname, surname)
+        return cls.allocate_many({name: count})[name]
+
+    @classmethod
+    def allocate_many(cls, names):
+        """Reserve numbers for new attendees with several names at once.
+
+        :param names: How many attendees are registered per
+            (firstname, surname) pair.
+        :type names: dict
+
+        :returns: Number of attendees registered before, per name.
+        :rtype: dict
+        """
+
+        if not names:
+            return {}
+
+        def names_filter(pairs):
+            return reduce(or_, (
+                Q(firstname=firstname, surname=surname)
+                for firstname, surname in pairs))
+
+        with transaction.atomic():
+            counters = {
+                (counter.firstname, counter.surname): counter
+                for counter in cls.objects.select_for_update().filter(
+                    names_filter(names))
+            }
+            missing = [name for name in names if name not in counters]
+            if missing:
+                # First registration since the counters exist, they start
+                # from the attendees already registered with these names.
+                registered = {
+                    (row['firstname'], row['surname']): row['count']
+                    for row in Attendee.objects.filter(
+                        names_filter(missing)).order_by().values(
+                        'firstname', 'surname').annotate(count=Count('pk'))
+                }
+                cls.objects.bulk_create([
+                    cls(firstname=firstname, surname=surname,
+                        count=registered.get((firstname, surname), 0))
+                    for firstname, surname in missing
+                ], ignore_conflicts=True)
+                counters.update({
+                    (counter.firstname, counter.surname): counter
+                    for counter in cls.objects.select_for_update().filter(
+                        names_filter(missing))
+                })
+
+            allocated = {}
+            for name, count in names.items():
+                allocated[name] = counters[name].count
+                counters[name].count += count
+            cls.objects.bulk_update(counters.values(), ['count'])
+        return allocated
@@ -3,37 +3,52 @@
 
 """
 
+import re
 from django.urls import reverse
-from django.db import models
+from django.db import models, transaction
+from django.db.models import IntegerField, Max
+from django.db.models.functions import Cast, Substr
 from django.contrib.auth.models import User
 from django.utils.translation import ugettext_lazy as _
 from .course import Course
 from .attendee import Attendee
 
 
-def increment_id(project):
-    """Increment the certificate ID."""
+def certificate_id_prefix(project):
+    """Return the prefix of the certificate IDs of a project.
+
+    Certificate IDs are the project name without spaces, a dash and a
+    number increasing within the project, e.g. QGIS-12.
+    """
+
+    return '{}-'.format(str(project.name).replace(' ', ''))
+
+
+def last_certificate_number(project):
+    """Return the highest certificate number issued in a project.
+
+    This scans the certificates of the project, it is only used to
+    initialise the CertificateSequence of the project.
 
-    last_certificate = Certificate.objects.filter(
-        course__certifying_organisation__project=project
-    ).count()
+    :returns: The highest number, 0 when no certificate was issued.
+    :rtype: int
+    """
 
-    if last_certificate == 0:
-        return '1'
+    prefix = certificate_id_prefix(project)
+    last_number = Certificate.objects.filter(
+        course__certifying_organisation__project=project,
+        certificateID__regex=r'^{}[0-9]+$'.format(re.escape(prefix))
+    ).annotate(
+        number=Cast(
+            Substr('certificateID', len(prefix) + 1), IntegerField())
+    ).aggregate(last_number=Max('number'))['last_number']
+    return last_number or 0
 
-    # get the latest certificate ID within a project
-    list_certificates = Certificate.objects.filter(
-        course__certifying_organisation__project=project
-    ).values_list('certificateID', flat=True)
-    certificate_array = []
-    for certificate in list_certificates:
-        number = '{}-'.format(str(project.name).replace(' ', ''))
-        certificate_number = str(certificate).replace(number, '')
-        certificate_array.append(int(certificate_number))
 
-    new_int_id = max(certificate_array) + 1
+def increment_id(project):
+    """Increment the certificate ID."""
 
-    return new_int_id
+    return CertificateSequence.allocate(project)
 
 
 class Certificate(models.Model):
@@ -57,6 +72,15 @@ class Certificate(models.Model):
         null=True
     )
 
+    pdf_fingerprint = models.CharField(
+        help_text=_('Fingerprint of the content of the cached PDF. '
+                    'Empty when the PDF needs to be rendered again.'),
+        max_length=40,
+        blank=True,
+        default='',
+        editable=False
+    )
+
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     attendee = models.ForeignKey(Attendee, on_delete=models.CASCADE)
@@ -89,3 +113,65 @@ class Certificate(models.Model):
         return reverse('certificate-detail', kwargs={
             'slug': self.certificateID,
         })
+
+
+class CertificateSequence(models.Model):
+    """Last certificate number issued in a project.
+
+    Certificate numbers are allocated from this row under a row lock, so
+    allocation cost does not depend on the number of certificates and
+    concurrent issuance never hands out the same number twice.
+    """
+
+    project = models.OneToOneField(
+        'base.Project',
+        on_delete=models.CASCADE,
+        related_name='certificate_sequence'
+    )
+
+    last_number = models.PositiveIntegerField(
+        help_text=_('Last certificate number issued in the project.'),
+        default=0
+    )
+
+    objects = models.Manager()
+
+    def __str__(self):
+        return '%s: %s' % (self.project, self.last_number)
+
+    @classmethod
+    def allocate(cls, project, count=1):
+        """Allocate the next certificate numbers of a project.
+
+        :param project: The project.
+        :type project: base.models.Project
+
+        :param count: How many numbers to allocate.
+        :type count: int
+
+        :returns: The first allocated number, the following ones are
+            consecutive.
+        :rtype: int
+        """
+
+        with transaction.atomic():
+            try:
+                sequence = cls.objects.select_for_update().get(
+                    project=project)
+            except cls.DoesNotExist:
+                # First certificate issued since the sequence exists, lock
+                # the project so that it is initialised only once.
+                project = type(project).objects.select_for_update().get(
+                    pk=project.pk)
+                sequence, _ = cls.objects.select_for_update().get_or_create(
+                    project=project,
+                    defaults={
+                        'last_number': last_certificate_number(project)
+                    })
+            first_number = sequence.last_number + 1
+            sequence.last_number += count
+            sequence.save(update_fields=['last_number'])
+        return first_number
+
+
+from certification.signals.certificate import *  # noqa
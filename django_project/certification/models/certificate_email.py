@@ -0,0 +1,65 @@
+# coding=utf-8
+"""Delivery status of the certificate emails sent to course attendees.
+
+"""
+
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+from base.models.background_job import BackgroundJob
+from certification.models.attendee import Attendee
+from certification.models.course import Course
+
+
+class CertificateEmail(models.Model):
+    """The email telling an attendee their certificate was issued."""
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (SENDING, _('Sending')),
+        (SENT, _('Sent')),
+        (FAILED, _('Failed')),
+    )
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    attendee = models.ForeignKey(Attendee, on_delete=models.CASCADE)
+
+    job = models.ForeignKey(
+        BackgroundJob,
+        help_text=_('Background job sending the email.'),
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+
+    email = models.CharField(
+        help_text=_('Address the email is sent to.'),
+        max_length=200
+    )
+
+    status = models.CharField(
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        max_length=10
+    )
+
+    error = models.TextField(
+        blank=True,
+        default=''
+    )
+
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_sent = models.DateTimeField(null=True, blank=True)
+
+    objects = models.Manager()
+
+    class Meta:
+        ordering = ['pk']
+        unique_together = (('job', 'attendee'),)
+
+    def __str__(self):
+        return '%s (%s)' % (self.email, self.status)
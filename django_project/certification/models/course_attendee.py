@@ -3,10 +3,48 @@
 
 """
 
+from datetime import timedelta, datetime
+
 from django.db import models
+from django.db.models import OuterRef, Subquery
 from django.contrib.auth.models import User
 from certification.models.course import Course
 from certification.models.attendee import Attendee
+from certification.models.certificate import Certificate
+
+# Days during which an attendee can be edited after their certificate is
+# issued.
+ATTENDEE_EDITABLE_DAYS = 7
+
+
+def course_attendees_with_certificates(course):
+    """Return the attendees of a course with the state of their certificate.
+
+    Each course attendee is annotated with ``certificate_pk``,
+    ``certificateID``, ``certificate_is_paid`` and ``certificate_issue_date``
+    from correlated subqueries, all None when the attendee has no
+    certificate, so listing a course takes one query whatever its size.
+
+    :param course: The course.
+    :type course: certification.models.Course
+
+    :rtype: QuerySet
+    """
+
+    certificates = Certificate.objects.filter(
+        course=OuterRef('course'), attendee=OuterRef('attendee'))
+
+    def certificate_field(name):
+        return Subquery(certificates.values(name)[:1])
+
+    return CourseAttendee.objects.filter(course=course).select_related(
+        'attendee'
+    ).annotate(
+        certificate_pk=certificate_field('pk'),
+        certificateID=certificate_field('certificateID'),
+        certificate_is_paid=certificate_field('is_paid'),
+        certificate_issue_date=certificate_field('issue_date'),
+    ).order_by('pk')
 
 
 class CourseAttendee(models.Model):
@@ -23,5 +61,21 @@ class CourseAttendee(models.Model):
     def save(self, *args, **kwargs):
         super(CourseAttendee, self).save(*args, **kwargs)
 
+    @property
+    def editable(self):
+        """Whether the attendee can still be edited.
+
+        Only available on course_attendees_with_certificates results. An
+        attendee is editable until a week after their certificate is issued.
+        """
+
+        if self.certificate_pk is None:
+            return True
+        if not self.certificate_issue_date:
+            return False
+        editable_until = self.certificate_issue_date + timedelta(
+            days=ATTENDEE_EDITABLE_DAYS)
+        return editable_until > datetime.today().date()
+
     def __unicode__(self):
         return '%s: %s' % (self.course.name, str(self.id))
@@ -0,0 +1,55 @@
+# coding=utf-8
+"""Signal for certificate model.
+
+The cached PDF of a certificate is marked dirty when anything printed on
+it changes, it is rendered again on the next request.
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch.dispatcher import receiver
+
+from certification.models.attendee import Attendee
+from certification.models.certificate import Certificate
+from certification.models.certifying_organisation import (
+    CertifyingOrganisation)
+from certification.models.course import Course
+from certification.models.course_convener import CourseConvener
+
+
+def invalidate_certificate_pdfs(**filters):
+    """Mark the cached PDF of the certificates matching filters dirty."""
+
+    Certificate.objects.filter(**filters).exclude(
+        pdf_fingerprint='').update(pdf_fingerprint='')
+
+
+@receiver(post_save, sender=Course)
+def course_post_save(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_certificate_pdfs(course=instance)
+
+
+@receiver(post_save, sender=Attendee)
+def attendee_post_save(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_certificate_pdfs(attendee=instance)
+
+
+@receiver(post_save, sender=CourseConvener)
+def course_convener_post_save(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_certificate_pdfs(course__course_convener=instance)
+
+
+@receiver(post_save, sender=CertifyingOrganisation)
+def certifying_organisation_post_save(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_certificate_pdfs(
+            course__certifying_organisation=instance)
+
+
+@receiver(post_save, sender='base.Project')
+def project_post_save(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_certificate_pdfs(
+            course__certifying_organisation__project=instance)
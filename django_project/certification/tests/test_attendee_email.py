@@ -0,0 +1,160 @@
+# coding=utf-8
+"""Test for the batched certificate emails of course attendees."""
+
+import logging
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from base.models import BackgroundJob
+from certification.attendee_email import (
+    EMAIL_ATTENDEES,
+    email_course_attendees,
+    queue_certificate_emails,
+    send_certificate_emails,
+)
+from certification.models import CertificateEmail
+from certification.tests.model_factories import (
+    AttendeeF,
+    CertificateF,
+    CourseF,
+)
+
+
+class RefusingEmailBackend(EmailBackend):
+    """Local memory backend refusing the addresses of example.org."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            for address in message.to:
+                if address.endswith('@example.org'):
+                    raise SMTPRecipientsRefused(
+                        {address: (550, b'No such user')})
+        return super(RefusingEmailBackend, self).send_messages(messages)
+
+
+class WorkerLost(BaseException):
+    """The worker process stopping, not caught like an error."""
+
+
+class CrashingEmailBackend(EmailBackend):
+    """Local memory backend stopping the worker on crash.com addresses."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            for address in message.to:
+                if address.endswith('@crash.com'):
+                    raise WorkerLost()
+        return super(CrashingEmailBackend, self).send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CERTIFICATE_EMAIL_BATCH_DELAY=0)
+class TestAttendeeEmail(TestCase):
+    """Test sending the certificate emails of a course."""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.course = CourseF.create()
+
+    def _certificates(self, count, domain='example.com', is_paid=True):
+        return [CertificateF.create(
+            course=self.course,
+            certificateID='ProjectTest-{}-{}'.format(domain, number),
+            is_paid=is_paid,
+            attendee=AttendeeF.create(
+                email='attendee{}@{}'.format(number, domain)),
+        ) for number in range(count)]
+
+    def test_emails_are_sent_to_paid_attendees(self):
+        certificates = self._certificates(3)
+        self._certificates(1, domain='unpaid.com', is_paid=False)
+
+        sent, failed = email_course_attendees(self.course, 'testserver')
+
+        self.assertEqual((sent, failed), (3, 0))
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [[certificate.attendee.email] for certificate in certificates])
+        self.assertEqual(
+            CertificateEmail.objects.filter(
+                status=CertificateEmail.SENT).count(), 3)
+
+    def test_one_connection_for_all_the_batches(self):
+        self._certificates(5)
+        emails = queue_certificate_emails(self.course)
+        with mock.patch(
+                'certification.attendee_email.get_connection',
+                wraps=mail.get_connection) as get_connection, \
+                mock.patch('time.sleep') as sleep:
+            send_certificate_emails(
+                self.course, 'testserver', emails, batch_size=2,
+                batch_delay=1)
+        self.assertEqual(get_connection.call_count, 1)
+        # Three batches, with a pause between each.
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_failures_are_recorded_per_recipient(self):
+        self._certificates(2)
+        self._certificates(1, domain='example.org')
+        invalid = self._certificates(1, domain='invalid')[0]
+        invalid.attendee.email = 'not an address'
+        invalid.attendee.save()
+
+        with override_settings(
+                EMAIL_BACKEND='certification.tests.test_attendee_email.'
+                              'RefusingEmailBackend'):
+            sent, failed = email_course_attendees(self.course, 'testserver')
+
+        self.assertEqual((sent, failed), (2, 2))
+        self.assertEqual(len(mail.outbox), 2)
+        refused = CertificateEmail.objects.get(
+            email='attendee0@example.org')
+        self.assertEqual(refused.status, CertificateEmail.FAILED)
+        self.assertIn('No such user', refused.error)
+        self.assertEqual(
+            CertificateEmail.objects.get(email='not an address').status,
+            CertificateEmail.FAILED)
+
+    def test_retried_job_sends_pending_emails(self):
+        self._certificates(3)
+        job = BackgroundJob.enqueue(EMAIL_ATTENDEES)
+        emails = queue_certificate_emails(self.course, job)
+        send_certificate_emails(self.course, 'testserver', emails[:1])
+
+        email_course_attendees(self.course, 'testserver', job)
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CertificateEmail.objects.filter(
+            job=job, status=CertificateEmail.SENT).count(), 3)
+
+    def test_interrupted_job_does_not_send_twice(self):
+        self._certificates(1)
+        self._certificates(1, domain='crash.com')
+        self._certificates(1, domain='example.net')
+        job = BackgroundJob.enqueue(EMAIL_ATTENDEES)
+        with override_settings(
+                EMAIL_BACKEND='certification.tests.test_attendee_email.'
+                              'CrashingEmailBackend'):
+            with self.assertRaises(WorkerLost):
+                email_course_attendees(self.course, 'testserver', job)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            CertificateEmail.objects.get(
+                email='attendee0@example.com').status,
+            CertificateEmail.SENT)
+
+        sent, failed = email_course_attendees(self.course, 'testserver', job)
+
+        self.assertEqual((sent, failed), (1, 0))
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['attendee0@example.com'], ['attendee0@example.net']])
+        interrupted = CertificateEmail.objects.get(
+            email='attendee0@crash.com')
+        self.assertEqual(interrupted.status, CertificateEmail.FAILED)
+        self.assertIn('Interrupted', interrupted.error)
@@ -0,0 +1,91 @@
+# coding=utf-8
+"""Test for bulk attendee import."""
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from core.model_factories import UserF
+from certification.attendee_import import (
+    ADDED,
+    ALREADY_IN_COURSE,
+    CREATED,
+    INVALID,
+    import_attendees,
+    read_attendee_rows,
+)
+from certification.models import Attendee, CourseAttendee
+from certification.tests.model_factories import (
+    AttendeeF,
+    CourseAttendeeF,
+    CourseF,
+)
+
+
+class TestImportAttendees(TestCase):
+    """Test importing a roster of attendees into a course."""
+
+    def setUp(self):
+        """Set up before each test."""
+
+        self.user = UserF.create()
+        self.course = CourseF.create()
+        self.organisation = self.course.certifying_organisation
+
+    def import_csv(self, content, batch_size=500):
+        roster = SimpleUploadedFile('roster.csv', content.encode('utf-8'))
+        return import_attendees(
+            read_attendee_rows(roster), self.course, self.organisation,
+            self.user, batch_size=batch_size)
+
+    def test_import_attendees(self):
+        existing = AttendeeF.create(
+            firstname='Tim', surname='Sutton', email='tim@example.com',
+            certifying_organisation=self.organisation)
+        in_course = AttendeeF.create(
+            firstname='Anita', surname='Hapsari', email='anita@example.com',
+            certifying_organisation=self.organisation)
+        CourseAttendeeF.create(course=self.course, attendee=in_course)
+
+        report = self.import_csv(
+            'firstname,surname,email\n'
+            'Tim,Sutton,tim@example.com\n'
+            'Anita,Hapsari,anita@example.com\n'
+            'Dimas,Ciputra,dimas@example.com\n'
+            'Dimas,Ciputra,dimas@example.com\n'
+            'Broken,Email,not an email\n'
+            '\n'
+            'Dimas,Ciputra,other@example.com\n',
+            batch_size=2)
+
+        self.assertEqual(
+            [row.status for row in report.rows],
+            [ADDED, ALREADY_IN_COURSE, CREATED, ALREADY_IN_COURSE, INVALID,
+             CREATED])
+        self.assertEqual(report.rows[4].line, 6)
+        self.assertEqual(report.attendee_count, 2)
+        self.assertEqual(report.course_attendee_count, 3)
+        self.assertEqual(report.existing_attendee_count, 2)
+        self.assertEqual(report.rows[0].attendee, existing)
+        self.assertEqual(
+            CourseAttendee.objects.filter(course=self.course).count(), 4)
+        self.assertEqual(
+            sorted(Attendee.objects.filter(
+                firstname='Dimas').values_list('slug', flat=True)),
+            ['dimas-ciputra', 'dimas-ciputra-2'])
+
+    def test_constant_number_of_queries(self):
+        def roster(start, count):
+            return 'firstname,surname,email\n' + ''.join(
+                'Attendee,{0},attendee{0}@example.com\n'.format(number)
+                for number in range(start, start + count))
+
+        with CaptureQueriesContext(connection) as small_roster:
+            self.import_csv(roster(0, 20))
+        with CaptureQueriesContext(connection) as large_roster:
+            report = self.import_csv(roster(20, 400))
+
+        self.assertEqual(report.attendee_count, 400)
+        self.assertEqual(
+            len(small_roster.captured_queries),
+            len(large_roster.captured_queries))
@@ -0,0 +1,63 @@
+# coding=utf-8
+"""Test for certificate asset cache."""
+
+import os
+import tempfile
+from PIL import Image
+from django.test import SimpleTestCase
+from certification.certificate_assets import CertificateAssetCache
+
+
+class TestCertificateAssetCache(SimpleTestCase):
+    """Test the process level cache of certificate images."""
+
+    def setUp(self):
+        """Set up before each test."""
+
+        self.images = []
+        for color in ((255, 0, 0), (0, 255, 0)):
+            temp_file = tempfile.NamedTemporaryFile(suffix='.png')
+            Image.new('RGB', (10, 10), color).save(temp_file, 'png')
+            temp_file.flush()
+            self.images.append(temp_file)
+
+    def tearDown(self):
+        """Tear down after each test."""
+
+        for temp_file in self.images:
+            temp_file.close()
+
+    def test_image_reader_is_reused(self):
+        cache = CertificateAssetCache(max_bytes=1024 * 1024)
+        first = cache.image_reader(self.images[0].name)
+        second = cache.image_reader(self.images[0].name)
+        self.assertIs(first, second)
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['bytes'], 10 * 10 * 4)
+
+    def test_modified_image_is_reloaded(self):
+        cache = CertificateAssetCache(max_bytes=1024 * 1024)
+        first = cache.image_reader(self.images[0].name)
+        mtime = os.path.getmtime(self.images[0].name)
+        os.utime(self.images[0].name, (mtime + 10, mtime + 10))
+        second = cache.image_reader(self.images[0].name)
+        self.assertIsNot(first, second)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_least_recently_used_image_is_evicted(self):
+        cache = CertificateAssetCache(max_bytes=10 * 10 * 4)
+        cache.image_reader(self.images[0].name)
+        cache.image_reader(self.images[1].name)
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['evictions'], 1)
+        cache.image_reader(self.images[1].name)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_empty_image(self):
+        cache = CertificateAssetCache()
+        self.assertIsNone(cache.image_reader(None))
+        self.assertEqual(cache.stats()['misses'], 0)
@@ -0,0 +1,92 @@
+# coding=utf-8
+"""Test for bulk certificate issuance."""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from base.tests.model_factories import ProjectF
+from core.model_factories import UserF
+from certification.certificate_issuance import issue_course_certificates
+from certification.models import Certificate
+from certification.tests.model_factories import (
+    CertificateF,
+    CertifyingOrganisationF,
+    CourseAttendeeF,
+    CourseF,
+)
+
+
+class TestIssueCourseCertificates(TestCase):
+    """Test issuing all certificates of a course at once."""
+
+    def setUp(self):
+        """Set up before each test.
+
+        A certificate costs 3 credits, the organisation has 10 credits.
+        """
+
+        self.user = UserF.create()
+        self.project = ProjectF.create(
+            name='Test Project', certificate_credit=3)
+        self.organisation = CertifyingOrganisationF.create(
+            project=self.project, organisation_credits=10)
+        self.course = CourseF.create(
+            certifying_organisation=self.organisation)
+
+    def test_issue_course_certificates(self):
+        course_attendees = [
+            CourseAttendeeF.create(course=self.course) for _ in range(4)]
+
+        issued = issue_course_certificates(self.course, self.user)
+
+        self.assertEqual(len(issued.certificates), 4)
+        self.assertEqual(len(issued.paid), 3)
+        self.assertEqual(issued.credits_used, 9)
+        self.organisation.refresh_from_db()
+        self.assertEqual(self.organisation.organisation_credits, 1)
+        certificates = Certificate.objects.filter(
+            course=self.course).order_by('int_id')
+        self.assertEqual(
+            [certificate.certificateID for certificate in certificates],
+            ['TestProject-1', 'TestProject-2', 'TestProject-3',
+             'TestProject-4'])
+        self.assertEqual(
+            [certificate.attendee for certificate in certificates],
+            [course_attendee.attendee for course_attendee in course_attendees])
+        self.assertEqual(
+            [certificate.is_paid for certificate in certificates],
+            [True, True, True, False])
+
+    def test_existing_certificates_are_kept(self):
+        course_attendee = CourseAttendeeF.create(course=self.course)
+        CertificateF.create(
+            course=self.course, attendee=course_attendee.attendee)
+        CourseAttendeeF.create(course=self.course)
+
+        issued = issue_course_certificates(self.course, self.user)
+
+        self.assertEqual(len(issued.certificates), 1)
+        self.assertEqual(issued.certificates[0].certificateID,
+                         'TestProject-2')
+        self.assertEqual(
+            Certificate.objects.filter(course=self.course).count(), 2)
+
+    def test_constant_number_of_queries(self):
+        self.organisation.organisation_credits = 1000
+        self.organisation.save()
+        for _ in range(3):
+            CourseAttendeeF.create(course=self.course)
+        with CaptureQueriesContext(connection) as small_course:
+            issue_course_certificates(self.course, self.user)
+
+        other_course = CourseF.create(
+            certifying_organisation=self.organisation)
+        for _ in range(30):
+            CourseAttendeeF.create(course=other_course)
+        with CaptureQueriesContext(connection) as large_course:
+            issued = issue_course_certificates(other_course, self.user)
+
+        self.assertEqual(len(issued.paid), 30)
+        self.assertEqual(
+            len(small_course.captured_queries),
+            len(large_course.captured_queries))
@@ -0,0 +1,88 @@
+# coding=utf-8
+"""Test for certificate batch renderer."""
+
+import os
+import shutil
+import tempfile
+from mock import patch
+from django.test import TestCase, override_settings
+from certification.certificate_renderer import (
+    certificate_pdf_path,
+    render_certificates,
+)
+from certification.tests.model_factories import (
+    CertificateF,
+    CourseF,
+)
+
+
+def fake_generate_pdf(pathname, project, course, attendee, certificate,
+                      current_site, wording):
+    with open(pathname, 'wb') as pdf:
+        pdf.write(b'%PDF ' + certificate.certificateID.encode())
+
+
+class TestRenderCertificates(TestCase):
+    """Test rendering all certificates of a course."""
+
+    def setUp(self):
+        """Set up before each test."""
+
+        self.media_root = tempfile.mkdtemp()
+        self.course = CourseF.create()
+        self.project = self.course.certifying_organisation.project
+        self.certificates = [
+            CertificateF.create(course=self.course),
+            CertificateF.create(course=self.course),
+        ]
+
+    def tearDown(self):
+        """Tear down after each test."""
+
+        shutil.rmtree(self.media_root)
+
+    @patch('certification.certificate_renderer.generate_pdf',
+           side_effect=fake_generate_pdf)
+    def test_render_certificates(self, mock_generate_pdf):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            results = render_certificates(
+                self.project, self.course, self.certificates, 'testserver',
+                workers=1)
+            pathname = certificate_pdf_path(
+                self.project, self.certificates[0])
+            self.assertTrue(os.path.exists(pathname))
+            leftovers = [
+                name for name in os.listdir(os.path.dirname(pathname))
+                if name.endswith('.tmp')]
+
+        self.assertEqual(mock_generate_pdf.call_count, 2)
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(
+            [result.certificate_id for result in results],
+            [certificate.certificateID for certificate in self.certificates])
+        self.assertEqual(leftovers, [])
+        for certificate in self.certificates:
+            certificate.refresh_from_db()
+            self.assertNotEqual(certificate.pdf_fingerprint, '')
+
+    @patch('certification.certificate_renderer.generate_pdf',
+           side_effect=IOError('disk full'))
+    def test_render_certificates_failure(self, mock_generate_pdf):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            pathname = certificate_pdf_path(
+                self.project, self.certificates[0])
+            os.makedirs(os.path.dirname(pathname))
+            with open(pathname, 'wb') as pdf:
+                pdf.write(b'old')
+            results = render_certificates(
+                self.project, self.course, self.certificates[:1],
+                'testserver', workers=1)
+            with open(pathname, 'rb') as pdf:
+                content = pdf.read()
+
+        self.certificates[0].refresh_from_db()
+        self.assertEqual(self.certificates[0].pdf_fingerprint, '')
+        self.assertFalse(results[0].success)
+        self.assertIn('disk full', results[0].error)
+        # The previous certificate is kept when rendering fails.
+        self.assertEqual(content, b'old')
@@ -1,9 +1,11 @@
 # coding=utf-8
 """Test for models."""
 
+from django.db import connection
 from django.db.utils import IntegrityError
 from django.core.exceptions import ValidationError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from certification.tests.model_factories import (
     CertificateF,
     CertificateTypeF,
@@ -16,6 +18,8 @@ from certification.tests.model_factories import (
     CourseAttendeeF,
     StatusF, ExternalReviewerF, ChecklistF
 )
+from certification.models.attendee import Attendee, AttendeeNameCounter
+from certification.models.certificate import Certificate, CertificateSequence
 from certification.models.certificate_type import CertificateType
 from core.model_factories import UserF
 
@@ -127,6 +131,34 @@ class CertificateSetUp(SetUpMixin, TestCase):
         # check if deleted.
         self.assertTrue(model.pk is None)
 
+    def test_Certificate_id_sequence(self):
+        """Test certificate IDs are allocated from the project sequence."""
+
+        course = CourseF.create()
+        project = course.certifying_organisation.project
+        prefix = project.name.replace(' ', '')
+        first = CertificateF.create(course=course)
+        second = CertificateF.create(course=course)
+
+        self.assertEqual(first.certificateID, '%s-1' % prefix)
+        self.assertEqual(second.certificateID, '%s-2' % prefix)
+        self.assertEqual(
+            CertificateSequence.objects.get(project=project).last_number, 2)
+
+    def test_Certificate_id_sequence_initialisation(self):
+        """Test the sequence starts after the existing certificates."""
+
+        course = CourseF.create()
+        project = course.certifying_organisation.project
+        prefix = project.name.replace(' ', '')
+        model = CertificateF.create(course=course)
+        Certificate.objects.filter(pk=model.pk).update(
+            certificateID='%s-41' % prefix)
+        CertificateSequence.objects.filter(project=project).delete()
+
+        model = CertificateF.create(course=course)
+
+        self.assertEqual(model.certificateID, '%s-42' % prefix)
 
 
 class CertificateTypeSetUp(SetUpMixin, TestCase):
@@ -238,6 +270,71 @@ class TestAttendee(TestCase):
             self.assertEqual(model.__dict__.get(key), val)
 
 
+class TestAttendeeSlug(TestCase):
+    """Test slugs of attendees sharing a name."""
+
+    def setUp(self):
+        """Set up before test."""
+
+        self.organisation = CertifyingOrganisationF.create()
+        self.user = UserF.create()
+
+    def create_attendee(self, email='anita@example.com'):
+        attendee = Attendee(
+            firstname='Anita', surname='Hapsari', email=email,
+            certifying_organisation=self.organisation, author=self.user)
+        attendee.save()
+        return attendee
+
+    def test_Attendee_slug_increment(self):
+        """Test attendees with the same name get numbered slugs."""
+
+        self.assertEqual(self.create_attendee('a@example.com').slug,
+                         'anita-hapsari')
+        self.assertEqual(self.create_attendee('b@example.com').slug,
+                         'anita-hapsari-2')
+        self.assertEqual(self.create_attendee('c@example.com').slug,
+                         'anita-hapsari-3')
+
+    def test_Attendee_slug_counter_initialisation(self):
+        """Test the counter starts from the attendees already registered."""
+
+        self.create_attendee('a@example.com')
+        self.create_attendee('b@example.com')
+        AttendeeNameCounter.objects.all().delete()
+
+        self.assertEqual(self.create_attendee('c@example.com').slug,
+                         'anita-hapsari-3')
+
+    def test_Attendee_save_cost(self):
+        """Test saving an attendee does not scan the attendees.
+
+        The queries run to save an attendee are the same with a few hundred
+        attendees registered as with none, and only read matching rows.
+        """
+
+        self.create_attendee('a@example.com')
+        with CaptureQueriesContext(connection) as empty_table:
+            self.create_attendee('b@example.com')
+
+        Attendee.objects.bulk_create((
+            Attendee(
+                firstname='Attendee %s' % number, surname='Surname',
+                email='attendee%s@example.com' % number, slug='attendee',
+                certifying_organisation=self.organisation, author=self.user)
+            for number in range(300)
+        ))
+        with CaptureQueriesContext(connection) as full_table:
+            self.create_attendee('c@example.com')
+
+        self.assertEqual(
+            [query['sql'].split()[0] for query in empty_table],
+            [query['sql'].split()[0] for query in full_table])
+        for query in full_table:
+            if 'FROM "certification_attendee"' in query['sql']:
+                self.assertIn('WHERE', query['sql'])
+
+
 class TestCourse(TestCase):
     """Test course model."""
 
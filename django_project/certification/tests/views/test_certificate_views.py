@@ -1,12 +1,19 @@
 # coding=utf-8
+import os
+import shutil
 import tempfile
 import logging
-from mock import patch, MagicMock
+import zipfile
+from io import BytesIO
+from mock import patch
 from PIL import Image
+from django.core import mail
 from django.urls import reverse
 from django.test.client import RequestFactory
 from django.test import TestCase, override_settings
 from django.test.client import Client
+from base.jobs import autodiscover_jobs, run_pending_jobs
+from base.models import BackgroundJob
 from base.tests.model_factories import ProjectF
 from core.model_factories import UserF
 from certification.tests.model_factories import (
@@ -18,10 +25,13 @@ from certification.tests.model_factories import (
     CourseTypeF,
     AttendeeF
 )
-from certification.views.certificate import (
-    regenerate_certificate,
-    regenerate_all_certificate
-)
+from certification.certificate_renderer import REGENERATE_CERTIFICATES
+from certification.views.certificate import regenerate_certificate
+
+
+def fake_generate_pdf(pathname, *args):
+    with open(pathname, 'wb') as pdf:
+        pdf.write(b'%PDF')
 
 
 class TestCertificateView(TestCase):
@@ -97,22 +107,48 @@ class TestCertificateView(TestCase):
         self.user.delete()
 
     @override_settings(VALID_DOMAIN=['testserver', ])
-    @patch('os.path.exists')
-    @patch('os.makedirs')
-    @patch('builtins.open', create=True)
-    def test_generate_certificate(
-            self, mock_open, mock_make_dirs, mock_exists):
-        mock_open.return_value = MagicMock()
-        mock_exists.return_value = False
-        client = Client(HTTP_HOST='testserver')
-        client.login(username='anita', password='password')
-        response = client.get(reverse('print-certificate', kwargs={
+    def test_generate_certificate(self):
+        media_root = tempfile.mkdtemp()
+        with override_settings(MEDIA_ROOT=media_root):
+            client = Client(HTTP_HOST='testserver')
+            client.login(username='anita', password='password')
+            response = client.get(reverse('print-certificate', kwargs={
+                'project_slug': self.project.slug,
+                'organisation_slug': self.certifying_organisation.slug,
+                'course_slug': self.course.slug,
+                'pk': self.attendee.pk
+            }))
+            response.close()
+        shutil.rmtree(media_root)
+        self.assertEqual(response.status_code, 200)
+        self.certificate.refresh_from_db()
+        self.assertNotEqual(self.certificate.pdf_fingerprint, '')
+
+    @override_settings(VALID_DOMAIN=['testserver', ])
+    @patch('certification.certificate_renderer.generate_pdf',
+           side_effect=fake_generate_pdf)
+    def test_generate_certificate_uses_cached_pdf(self, mock_generate_pdf):
+        media_root = tempfile.mkdtemp()
+        url = reverse('print-certificate', kwargs={
             'project_slug': self.project.slug,
             'organisation_slug': self.certifying_organisation.slug,
             'course_slug': self.course.slug,
             'pk': self.attendee.pk
-        }))
-        self.assertEqual(response.status_code, 200)
+        })
+        with override_settings(MEDIA_ROOT=media_root):
+            client = Client(HTTP_HOST='testserver')
+            client.get(url).close()
+            client.get(url).close()
+            self.assertEqual(mock_generate_pdf.call_count, 1)
+
+            # Changing a printed value marks the PDF dirty.
+            self.attendee.firstname = 'Changed'
+            self.attendee.save()
+            self.certificate.refresh_from_db()
+            self.assertEqual(self.certificate.pdf_fingerprint, '')
+            client.get(url).close()
+            self.assertEqual(mock_generate_pdf.call_count, 2)
+        shutil.rmtree(media_root)
 
     def get_temporary_image(self, temp_file):
         size = (200, 200)
@@ -123,17 +159,8 @@ class TestCertificateView(TestCase):
 
     @override_settings(MEDIA_ROOT=tempfile.gettempdir())
     @override_settings(VALID_DOMAIN=['testserver', ])
-    @patch('os.path.exists')
-    @patch('os.makedirs')
-    @patch('builtins.open', create=True)
-    @patch('reportlab.lib.utils.ImageReader')
-    def test_generate_certificate_with_signature(
-            self, mock_open, mock_make_dirs, mock_exists, mock_image):
-        mock_open.return_value = MagicMock()
-        mock_exists.return_value = False
-        mock_image.return_value = MagicMock()
-
-        temp_file = tempfile.NamedTemporaryFile()
+    def test_generate_certificate_with_signature(self):
+        temp_file = tempfile.NamedTemporaryFile(suffix='.png')
         test_image = self.get_temporary_image(temp_file)
 
         signature = test_image.name
@@ -151,6 +178,7 @@ class TestCertificateView(TestCase):
             'course_slug': self.course.slug,
             'pk': self.attendee.pk
         }))
+        response.close()
         self.assertEqual(response.status_code, 200)
         self.project.project_representative_signature = None
         self.project.save()
@@ -158,52 +186,75 @@ class TestCertificateView(TestCase):
         self.course_convener.save()
 
     @override_settings(VALID_DOMAIN=['testserver', ])
-    @patch('os.path.exists')
-    @patch('os.makedirs')
-    @patch('builtins.open', create=True)
-    def test_regenerate_certificate_allowed_user(
-            self, mock_open, mock_make_dirs, mock_exists):
-        mock_open.return_value = MagicMock()
-        mock_exists.return_value = False
+    @patch('certification.certificate_renderer.generate_pdf',
+           side_effect=fake_generate_pdf)
+    def test_regenerate_certificate_allowed_user(self, mock_generate_pdf):
+        media_root = tempfile.mkdtemp()
         request = RequestFactory(HTTP_HOST='testserver')
         request.user = self.user
         request.method = 'POST'
         request.META = {'HTTP_HOST': 'testserver'}
-        response = regenerate_certificate(
-            request,
-            project_slug=self.project.slug,
-            organisation_slug=self.certifying_organisation.slug,
-            course_slug=self.course.slug,
-            pk=self.attendee.pk
-        )
+        with override_settings(MEDIA_ROOT=media_root):
+            for _ in range(2):
+                response = regenerate_certificate(
+                    request,
+                    project_slug=self.project.slug,
+                    organisation_slug=self.certifying_organisation.slug,
+                    course_slug=self.course.slug,
+                    pk=self.attendee.pk
+                )
+                response.close()
+        shutil.rmtree(media_root)
         self.assertEqual(response.status_code, 200)
+        # Regenerating always renders the certificate again.
+        self.assertEqual(mock_generate_pdf.call_count, 2)
 
     @override_settings(VALID_DOMAIN=['testserver', ])
-    @patch('os.path.exists')
-    @patch('os.makedirs')
-    @patch('builtins.open', create=True)
-    @patch('django.contrib.messages.success')
-    @patch('os.remove')
-    @patch('certification.views.certificate.generate_pdf')
-    def test_regenerate_all_certificate_allowed_user(
-            self, mock_open, mock_make_dirs,
-            mock_exists, mock_message, mock_remove, mock_generate_pdf):
-        mock_message.return_value = MagicMock()
-        mock_open.return_value = MagicMock()
-        mock_remove.return_value = MagicMock()
-        mock_generate_pdf.return_value = MagicMock()
-        mock_exists.return_value = False
-        request = RequestFactory(HTTP_HOST='testserver')
-        request.user = self.user
-        request.method = 'POST'
-        request.META = {'HTTP_HOST': 'testserver'}
-        response = regenerate_all_certificate(
-            request,
-            project_slug=self.project.slug,
-            organisation_slug=self.certifying_organisation.slug,
-            course_slug=self.course.slug,
-        )
-        self.assertEqual(response.status_code, 302)
+    @patch('certification.certificate_renderer.generate_pdf',
+           side_effect=fake_generate_pdf)
+    def test_regenerate_all_certificate_allowed_user(self, mock_generate_pdf):
+        media_root = tempfile.mkdtemp()
+        client = Client(HTTP_HOST='testserver')
+        client.login(username='anita', password='password')
+        response = client.post(reverse('regenerate-all-certificate', kwargs={
+            'project_slug': self.project.slug,
+            'organisation_slug': self.certifying_organisation.slug,
+            'course_slug': self.course.slug,
+        }))
+        self.assertEqual(response.status_code, 200)
+        job = response.context['job']
+        self.assertEqual(job.kind, REGENERATE_CERTIFICATES)
+
+        with override_settings(MEDIA_ROOT=media_root):
+            autodiscover_jobs()
+            run_pending_jobs()
+        shutil.rmtree(media_root)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.DONE)
+        self.assertEqual(mock_generate_pdf.call_count, 1)
+
+    @override_settings(VALID_DOMAIN=['testserver', ])
+    def test_email_all_attendees(self):
+        self.certificate.is_paid = True
+        self.certificate.save()
+        self.attendee.email = 'attendee@example.com'
+        self.attendee.save()
+        client = Client(HTTP_HOST='testserver')
+        client.login(username='anita', password='password')
+        response = client.post(reverse('send_email', kwargs={
+            'project_slug': self.project.slug,
+            'organisation_slug': self.certifying_organisation.slug,
+            'course_slug': self.course.slug,
+        }))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+
+        autodiscover_jobs()
+        run_pending_jobs()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.attendee.email])
+        self.assertIn(
+            '/print/{}/'.format(self.attendee.pk), mail.outbox[0].body)
 
     @override_settings(VALID_DOMAIN=['testserver', ])
     def test_detail_certificate(self):
@@ -217,3 +268,42 @@ class TestCertificateView(TestCase):
             'certificate/detail.html'
         ]
         self.assertEqual(response.template_name, expected_templates)
+
+    @override_settings(VALID_DOMAIN=['testserver', ])
+    @patch('certification.certificate_renderer.generate_pdf',
+           side_effect=fake_generate_pdf)
+    def test_download_certificates_zip(self, mock_generate_pdf):
+        media_root = tempfile.mkdtemp()
+        result_root = tempfile.mkdtemp()
+        with override_settings(
+                MEDIA_ROOT=media_root, BACKGROUND_JOB_RESULT_ROOT=result_root):
+            client = Client(HTTP_HOST='testserver')
+            response = client.get(reverse('download_zip_all', kwargs={
+                'project_slug': self.project.slug,
+                'organisation_slug': self.certifying_organisation.slug,
+                'course_slug': self.course.slug,
+            }))
+            self.assertEqual(response.status_code, 200)
+            job = response.context['job']
+            autodiscover_jobs()
+            run_pending_jobs()
+            # The session which queued the job downloads its archive.
+            response = client.get(reverse(
+                'background-job-download', kwargs={'pk': job.pk}))
+            content = b''.join(response.streaming_content)
+        # The archive is kept out of the served media.
+        self.assertEqual(
+            os.listdir(result_root), [str(job.pk)])
+        self.assertNotIn('background_jobs', os.listdir(media_root))
+        shutil.rmtree(media_root)
+        shutil.rmtree(result_root)
+
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(BytesIO(content))
+        self.assertEqual(
+            archive.namelist(),
+            ['{}/{}.pdf'.format(
+                self.course.name, self.certificate.certificateID)])
+        self.assertEqual(
+            archive.infolist()[0].compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(mock_generate_pdf.call_count, 1)
@@ -3,8 +3,10 @@ import datetime
 import logging
 from bs4 import BeautifulSoup as Soup
 
+from django.db import connection
 from django.test import TestCase, override_settings
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from certification.tests.model_factories import (
     ProjectF,
@@ -123,6 +125,47 @@ class TestCourseView(TestCase):
             else:
                 self.assertFalse(course_attendee.editable)
 
+    def _create_course_attendees(self, course, count):
+        for index in range(count):
+            course_attendee = CourseAttendeeF.create(course=course)
+            if index % 3:
+                CertificateF.create(
+                    attendee=course_attendee.attendee,
+                    course=course,
+                    is_paid=index % 3 == 1,
+                    issue_date=datetime.date.today())
+
+    @override_settings(VALID_DOMAIN=['testserver', ])
+    def test_detail_view_constant_number_of_queries(self):
+        self.client.login(username='anita', password='password')
+        large_course = CourseF.create(
+            certifying_organisation=self.certifying_organisation
+        )
+        self._create_course_attendees(self.course, 3)
+        self._create_course_attendees(large_course, 30)
+
+        with CaptureQueriesContext(connection) as small_course_queries:
+            response = self.client.get(reverse('course-detail', kwargs={
+                'project_slug': self.project.slug,
+                'organisation_slug': self.certifying_organisation.slug,
+                'slug': self.course.slug
+            }))
+        self.assertEqual(len(response.context_data['attendees']), 3)
+
+        with CaptureQueriesContext(connection) as large_course_queries:
+            response = self.client.get(reverse('course-detail', kwargs={
+                'project_slug': self.project.slug,
+                'organisation_slug': self.certifying_organisation.slug,
+                'slug': large_course.slug
+            }))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context_data['attendees']), 30)
+        self.assertEqual(len(response.context_data['certificates']), 20)
+        self.assertEqual(len(response.context_data['paid_certificates']), 10)
+        self.assertEqual(
+            len(small_course_queries.captured_queries),
+            len(large_course_queries.captured_queries))
+
     @override_settings(VALID_DOMAIN=['testserver', ])
     def test_detail_with_duplicates(self):
         self.client.login(username='anita', password='password')
@@ -4,6 +4,7 @@
 from django.conf.urls import url
 
 from .api_views.checklist import UpdateChecklistReviewer
+from .api_views.certificate_asset_cache import CertificateAssetCacheStats
 from .views import (
     # Certifying Organisation.
     CertifyingOrganisationCreateView,
@@ -370,6 +371,9 @@ urlpatterns = [
     # API Views
     url(regex='^(?P<project_slug>[\w-]+)/get-status-list/$',
         view=GetStatus.as_view(), name='get-status-list'),
+    url(regex='^certificate-asset-cache/stats/$',
+        view=CertificateAssetCacheStats.as_view(),
+        name='certificate-asset-cache-stats'),
 
     # Feeds
     url(regex='^(?P<project_slug>[\w-]+)/feed/upcoming-course/$',
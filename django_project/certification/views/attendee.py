@@ -1,6 +1,4 @@
 # coding=utf-8
-import io
-import csv
 from datetime import timedelta, datetime
 
 from django.db import transaction
@@ -14,6 +12,8 @@ from certification.models import (
 )
 from certification.forms import (
     AttendeeForm, CsvAttendeeForm, UpdateAttendeeForm)
+from certification.attendee_import import (
+    import_attendees, read_attendee_rows)
 
 
 class AttendeeMixin(object):
@@ -177,65 +177,29 @@ class CsvUploadView(FormMessagesMixin, LoginRequiredMixin, FormView):
         form = self.get_form(form_class)
         attendees_file = request.FILES.get('file')
         attendees_file.seek(0)
-        course = Course.objects.get(slug=self.slug)
         if form.is_valid():
             if attendees_file:
-                reader = csv.DictReader(
-                    io.StringIO(attendees_file.read().decode('utf-8'))
-                )
-                fieldnames = reader.fieldnames
-                attendee_count = 0
-                course_attendee_count = 0
-                existing_attendee_count = 0
-                for row in reader:
-                    # We should have logic here to first see if the attendee
-                    # already exists and if they do, just add them to the
-                    # course
-                    try:
-                        attendee = Attendee.objects.get(
-                            firstname=row[fieldnames[0]],
-                            surname=row[fieldnames[1]],
-                            email=row[fieldnames[2]],
-                            certifying_organisation=
-                            self.certifying_organisation,
-                        )
-                    except Attendee.DoesNotExist:
-                        attendee = Attendee(
-                            firstname=row[fieldnames[0]],
-                            surname=row[fieldnames[1]],
-                            email=row[fieldnames[2]],
-                            certifying_organisation=
-                            self.certifying_organisation,
-                            author=self.request.user
-                        )
-                        attendee.save()
-                        attendee_count += 1
-
-                    try:
-                        course_attendee = CourseAttendee.objects.get(
-                            attendee=attendee,
-                            course=course,
-                        )
-                    except CourseAttendee.DoesNotExist:
-                        course_attendee = CourseAttendee(
-                            attendee=attendee,
-                            course=course,
-                            author=self.request.user
-                        )
-                        course_attendee.save()
-                        course_attendee_count += 1
-                    else:
-                        existing_attendee_count += 1
+                report = import_attendees(
+                    read_attendee_rows(attendees_file),
+                    self.course,
+                    self.certifying_organisation,
+                    self.request.user)
 
                 self.form_valid_message = (
                     'From the csv: {} attendee already exist in this course, '
                     '{} new attendees were created, and {} attendees were '
                     'added to the course: {}'.format(
-                        existing_attendee_count,
-                        attendee_count,
-                        course_attendee_count,
+                        report.existing_attendee_count,
+                        report.attendee_count,
+                        report.course_attendee_count,
                         self.course)
                 )
+                if report.invalid_rows:
+                    self.form_valid_message += (
+                        '. {} rows were skipped: {}'.format(
+                            len(report.invalid_rows),
+                            '; '.join(
+                                str(row) for row in report.invalid_rows)))
 
                 self.form_invalid_message = (
                     'Something wrong happened while running the upload. '
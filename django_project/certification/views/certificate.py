@@ -4,25 +4,22 @@ import base64
 import datetime
 from io import BytesIO
 import os
-import zipfile
 
 import stripe
 from PIL import Image
 import re
 from decimal import Decimal
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.http import (
     Http404, HttpResponse, HttpResponseRedirect, FileResponse,
     HttpResponseForbidden
 )
 from django.views.generic import (
     CreateView, DetailView, TemplateView, DeleteView)
-from django.conf import settings
 from django.urls import reverse
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
 from django.utils.translation import ugettext as _
 from braces.views import LoginRequiredMixin
 from djstripe.enums import PaymentIntentStatus
@@ -30,9 +27,6 @@ from djstripe.models import Customer, PaymentIntent
 from djstripe import settings as djstripe_settings
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.utils import ImageReader
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont, TTFError
 import djstripe.models
 import djstripe.settings
 from ..models import (
@@ -44,9 +38,24 @@ from ..models import (
     CourseConvener,
     TrainingCenter,
     CourseType,
-    CourseAttendee
+)
+from ..attendee_email import (
+    EMAIL_ATTENDEES,
+    email_attendees_key,
+    paid_attendees,
+)
+from ..certificate_issuance import issue_course_certificates
+from ..certificate_renderer import (
+    CERTIFICATES_ZIP,
+    REGENERATE_CERTIFICATES,
+    course_certificates_key,
+    ensure_certificate_pdf,
+    generate_pdf,
+    register_fonts,
 )
 from ..forms import CertificateForm
+from base.api_views.background_job import job_progress_page
+from base.models.background_job import BackgroundJob
 from base.models.project import Project
 from changes import (
     NOTICE_TOP_UP_SUCCESS
@@ -241,280 +250,65 @@ class CertificateDetailView(DetailView):
                 raise Http404('Sorry! Certificate by this ID is not exist.')
 
 
-def generate_pdf(
-        pathname, project, course, attendee, certificate, current_site,
-        wording='Has attended and completed the course:'):
-    """Create the PDF object, using the response object as its file."""
-
-    # Register new font
-    try:
-        font_folder = os.path.join(
-            settings.STATIC_ROOT, 'fonts/times-new-roman')
-        bold_ttf_file = os.path.join(
-            font_folder, 'Times New Roman Gras 700.ttf')
-        regular_ttf_file = os.path.join(
-            font_folder, 'Times New Roman 400.ttf')
-        pdfmetrics.registerFont(TTFont('Noto-Bold', bold_ttf_file))
-        pdfmetrics.registerFont(TTFont('Noto-Regular', regular_ttf_file))
-    except (TTFError, KeyError):
-        pass
-
-    page = canvas.Canvas(pathname, pagesize=landscape(A4))
-    width, height = A4
-    center = height * 0.5
-    convener_name = \
-        '{} {}'.format(
-            course.course_convener.user.first_name,
-            course.course_convener.user.last_name)
-
-    if course.course_convener.title:
-        convener_name = \
-            '{} {}'.format(
-                course.course_convener.title,
-                convener_name)
-
-    if course.course_convener.degree:
-        convener_name = \
-            '{}, {}'.format(
-                convener_name,
-                course.course_convener.degree)
-
-    course_duration = \
-        'From {} {} {} to {} {} {}'.format(
-            course.start_date.day,
-            course.start_date.strftime('%B'),
-            course.start_date.year,
-            course.end_date.day,
-            course.end_date.strftime('%B'),
-            course.end_date.year)
-
-    if course.course_type.instruction_hours:
-        course_duration = \
-            '{} ({} hours of instruction)'.format(
-                course_duration,
-                course.course_type.instruction_hours)
-
-    if project.image_file:
-        project_logo = ImageReader(project.image_file)
-    else:
-        project_logo = None
-
-    if course.certifying_organisation.logo:
-        organisation_logo = ImageReader(
-            course.certifying_organisation.logo)
-    else:
-        organisation_logo = None
-
-    if project.project_representative_signature:
-        project_representative_signature = \
-            ImageReader(project.project_representative_signature)
-    else:
-        project_representative_signature = None
-
-    if course.course_convener.signature:
-        convener_signature = ImageReader(course.course_convener.signature)
-    else:
-        convener_signature = None
-
-    if course.template_certificate:
-        background = ImageReader(course.template_certificate)
-    else:
-        background = None
-
-    # Certificate margin.
-    margin_right = height - 50
-    margin_left = 50
-    margin_bottom = 50
-    max_left = margin_right - 100
-
-    # Draw things on the PDF. Here's where the PDF generation happens.
-    # See the ReportLab documentation for the full list of functionality.
-    if background is not None:
-        page.drawImage(
-            background, 0, 0, height=width, width=height,
-            preserveAspectRatio=True, mask='auto')
-    page.setFillColorRGB(0.1, 0.1, 0.1)
-    page.setFont('Noto-Regular', 18)
-
-    if project_logo is not None:
-        page.drawImage(
-            project_logo, 50, 450, width=100, height=100,
-            preserveAspectRatio=True, mask='auto')
-
-    if organisation_logo is not None:
-        page.drawImage(
-            organisation_logo, max_left, 450, height=100, width=100,
-            preserveAspectRatio=True, anchor='c', mask='auto')
-
-    page.setFont('Noto-Bold', 26)
-    page.drawCentredString(center, 480, 'Certificate of Completion')
-
-    page.setFont('Noto-Bold', 26)
-
-    page.drawCentredString(
-        center, 400, '%s %s' % (
-            attendee.firstname,
-            attendee.surname))
-    page.setFont('Noto-Regular', 16)
-    page.drawCentredString(
-        center, 370, wording)
-    page.setFont('Noto-Bold', 20)
-    page.drawCentredString(
-            center, 335, course.course_type.name)
-    page.setFont('Noto-Regular', 16)
-    page.drawCentredString(
-        center, 300, 'With a trained competence in:')
-    page.setFont('Noto-Bold', 14)
-    page.drawCentredString(
-        center, 280, '{}'.format(course.trained_competence))
-    page.setFont('Noto-Regular', 16)
-    page.drawCentredString(
-        center, 250, '{}'.format(course_duration))
-
-    page.setFillColorRGB(0.1, 0.1, 0.1)
-    page.drawCentredString(
-        center, 220, 'Convened by {} at {}'.format(
-            convener_name,
-            course.training_center))
-
-    if project_representative_signature is not None:
-        page.drawImage(
-            project_representative_signature,
-            (margin_left + 100),
-            (margin_bottom + 70),
-            width=100,
-            height=70,
-            preserveAspectRatio=True,
-            anchor='s',
-            mask='auto')
-
-    if convener_signature is not None:
-        page.drawImage(
-            convener_signature, (margin_right - 200), (margin_bottom + 70),
-            width=100, height=70, preserveAspectRatio=True, anchor='s',
-            mask='auto')
-
-    page.setFont('Noto-Regular', 12)
-    if project.project_representative:
-        page.drawCentredString(
-            (margin_left + 150), (margin_bottom + 60),
-            '{} {}'.format(
-                project.project_representative.first_name,
-                project.project_representative.last_name))
-    page.drawCentredString(
-        (margin_right - 150), (margin_bottom + 60),
-        '{}'.format(convener_name))
-    page.line(
-        (margin_left + 70), (margin_bottom + 55),
-        (margin_left + 230), (margin_bottom + 55))
-    page.line(
-        (margin_right - 70), (margin_bottom + 55),
-        (margin_right - 230), (margin_bottom + 55))
-    page.setFont('Noto-Regular', 13)
-    page.drawCentredString(
-        (margin_left + 150),
-        (margin_bottom + 40),
-        'Project Representative')
-    page.drawCentredString(
-        (margin_right - 150), (margin_bottom + 40), 'Course Convener')
-
-    # Footnotes.
-    page.setFont('Noto-Regular', 14)
-    page.drawString(
-        margin_left,
-        margin_bottom - 10,
-        'ID: {}'.format(certificate.certificateID))
-    page.setFont('Noto-Regular', 8)
-    page.drawString(
-        margin_left, (margin_bottom - 20),
-        'You can verify this certificate by visiting '
-        'http://{}/en/{}/certificate/{}/.'
-        ''.format(current_site, project.slug, certificate.certificateID))
-
-    # Close the PDF object cleanly.
-    page.showPage()
-    page.save()
+def certificate_pdf_view(request, **kwargs):
+    """Serve the PDF of a certificate.
 
+    The cached PDF is rendered again first when anything printed on the
+    certificate changed since it was rendered.
+    """
 
-def certificate_pdf_view(request, **kwargs):
     project_slug = kwargs.pop('project_slug')
     course_slug = kwargs.pop('course_slug')
     pk = kwargs.pop('pk')
-    project = Project.objects.get(slug=project_slug)
-    course = Course.objects.get(slug=course_slug)
-    attendee = Attendee.objects.get(pk=pk)
-    certificate = Certificate.objects.get(course=course, attendee=attendee)
+    project = Project.objects.select_related(
+        'project_representative').get(slug=project_slug)
+    course = Course.objects.select_related(
+        'course_convener__user', 'course_type', 'training_center',
+        'certifying_organisation', 'certificate_type').get(slug=course_slug)
+    certificate = Certificate.objects.select_related('attendee').get(
+        course=course, attendee__pk=pk)
     current_site = request.META['HTTP_HOST']
 
-    # Create the HttpResponse object with the appropriate PDF headers.
-    filename = '{}.{}'.format(certificate.certificateID, 'pdf')
-    project_folder = (project.name.lower()).replace(' ', '_')
-    pathname = \
-        os.path.join(
-            '/home/web/media', 'pdf/{}/{}'.format(project_folder, filename))
-    found = os.path.exists(pathname)
-    if found:
-        try:
-            return FileResponse(open(pathname, 'rb'),
-                                content_type='application/pdf')
-        except FileNotFoundError:
-            raise Http404()
-    else:
-        makepath = '/home/web/media/pdf/{}/'.format(project_folder)
-        if not os.path.exists(makepath):
-            os.makedirs(makepath)
-
-        generate_pdf(
-            pathname, project, course, attendee, certificate, current_site,
-            course.certificate_type.wording
-        )
-        try:
-            return FileResponse(open(pathname, 'rb'),
-                                content_type='application/pdf')
-        except FileNotFoundError:
-            raise Http404()
+    pathname = ensure_certificate_pdf(
+        project, course, certificate, current_site)
+    try:
+        return FileResponse(open(pathname, 'rb'),
+                            content_type='application/pdf')
+    except FileNotFoundError:
+        raise Http404()
 
 
 def download_certificates_zip(request, **kwargs):
-    """Download all certificates in a course as one zip file."""
+    """Download all certificates in a course as one zip file.
+
+    The archive is built by a background job, this page polls it then
+    downloads the archive.
+    """
 
     project_slug = kwargs.pop('project_slug')
-    course_slug = kwargs.pop('course_slug')
-    course = Course.objects.get(slug=course_slug)
     organisation_slug = kwargs.pop('organisation_slug')
-
-    certificates = Certificate.objects.filter(course=course)
-
-    filenames = []
-    for certificate in certificates:
-        pdf_file = certificate_pdf_view(
-            request, pk=certificate.attendee.pk, project_slug=project_slug,
-            course_slug=course_slug, organisation_slug=organisation_slug)
-
-        with open('/tmp/%s.pdf' % certificate.certificateID, 'wb') as pdf:
-            pdf.write(pdf_file.getvalue())
-
-        filenames.append('/tmp/%s.pdf' % certificate.certificateID)
-
-    zip_subdir = '%s' % course.name
-
-    in_memory_data = BytesIO()
-    zf = zipfile.ZipFile(in_memory_data, "w")
-
-    for fpath in filenames:
-        fdir, fname = os.path.split(fpath)
-        zip_path = os.path.join(zip_subdir, fname)
-
-        zf.write(fpath, zip_path)
-
-    zf.close()
-
-    response = HttpResponse(
-        in_memory_data.getvalue(), content_type="application/x-zip-compressed")
-    response['Content-Disposition'] = \
-        'attachment; filename=certificates.zip'
-
-    return response
+    course_slug = kwargs.pop('course_slug')
+    project = get_object_or_404(Project, slug=project_slug)
+    course = get_object_or_404(Course, slug=course_slug)
+    job = BackgroundJob.enqueue(
+        CERTIFICATES_ZIP,
+        {
+            'project': project.pk,
+            'course': course.pk,
+            'site': request.META['HTTP_HOST'],
+            'filename': 'certificates.zip',
+        },
+        key=course_certificates_key(course),
+        user=request.user,
+        max_attempts=3)
+    return job_progress_page(
+        request, job, 'Preparing Download',
+        back_url=reverse('course-detail', kwargs={
+            'project_slug': project_slug,
+            'organisation_slug': organisation_slug,
+            'slug': course_slug
+        }),
+        the_project=project)
 
 
 def update_paid_status(request, **kwargs):
@@ -572,20 +366,17 @@ def top_up_unavailable(request, **kwargs):
 
 
 def email_all_attendees(request, **kwargs):
-    """Send email to all attendees in a course."""
+    """Send email to all attendees in a course.
+
+    The emails are sent by a background job, the page polls it then goes
+    back to the course.
+    """
 
     project_slug = kwargs.get('project_slug', None)
     course_slug = kwargs.get('course_slug', None)
     organisation_slug = kwargs.get('organisation_slug', None)
     project = Project.objects.get(slug=project_slug)
     course = Course.objects.get(slug=course_slug)
-    attendee_list = \
-        Certificate.objects.filter(
-            is_paid=True, course=course).values_list('attendee', flat=True)
-    attendee_list_object = []
-    for attendee_pk in attendee_list:
-        attendee = Attendee.objects.get(pk=attendee_pk)
-        attendee_list_object.append(attendee)
 
     organisation = CertifyingOrganisation.objects.filter(approved=False)
     has_pending = False
@@ -599,59 +390,22 @@ def email_all_attendees(request, **kwargs):
     })
 
     if request.method == 'POST':
-
-        site = request.get_host()
-        for attendee in attendee_list_object:
-            # Send email to each attendee with the link to his certificate.
-            data = {
-                'firstname': attendee.firstname,
-                'lastname': attendee.surname,
-                'coursetype': course.course_type,
-                'start_date': course.start_date.strftime('%d %B %Y'),
-                'end_date': course.end_date.strftime('%d %B %Y'),
-                'training_center': course.training_center,
-                'organisation': course.certifying_organisation.name,
-                'domain': site,
-                'project_slug': course.certifying_organisation.project.slug,
-                'organisation_slug': course.certifying_organisation.slug,
-                'course_slug': course.slug,
-                'pk': attendee.pk,
-                'convener_firstname':
-                    course.course_convener.user.first_name,
-                'convener_lastname':
-                    course.course_convener.user.last_name}
-
-            send_mail(
-                'Certificate from {} Course'.format(course.course_type),
-                'Dear {firstname} {lastname},\n\n'
-                'Congratulations!\n'
-                'Your certificate from the following course '
-                'has been issued.\n\n'
-                'Course type: {coursetype}\n'
-                'Course date: {start_date} to {end_date}\n'
-                'Training center: {training_center}\n'
-                'Certifying organisation: {organisation}\n\n'
-                'You may print the certificate '
-                'by visiting:\n'
-                'http://{domain}/en/{project_slug}/certifyingorganisation/'
-                '{organisation_slug}/course/'
-                '{course_slug}/print/{pk}/\n\n'
-                'Sincerely,\n{convener_firstname} {convener_lastname}'
-                ''.format(**data),
-                settings.DEFAULT_FROM_EMAIL,
-                [attendee.email],
-                fail_silently=False,
-            )
-
-        messages.success(request, 'Email sent', 'email_sent')
-        return HttpResponseRedirect(url)
+        job = BackgroundJob.enqueue(
+            EMAIL_ATTENDEES,
+            {'course': course.pk, 'site': request.get_host()},
+            key=email_attendees_key(course),
+            user=request.user,
+            max_attempts=3)
+        return job_progress_page(
+            request, job, 'Sending Emails', back_url=url, done_url=url,
+            the_project=project)
 
     return render(
         request, 'certificate/send_email_confirm.html',
         context={
             'the_project': project,
             'has_pending_organisations': has_pending,
-            'attendees': attendee_list_object})
+            'attendees': paid_attendees(course)})
 
 
 def regenerate_certificate(request, **kwargs):
@@ -677,34 +431,18 @@ def regenerate_certificate(request, **kwargs):
     else:
         raise Http404
 
-    filename = "{}.{}".format(certificate.certificateID, "pdf")
-    project_folder = (project.name.lower()).replace(' ', '_')
-
     pending_organisation = \
         CertifyingOrganisation.objects.filter(approved=False)
     has_pending = False
     if pending_organisation:
         has_pending = True
 
-    pathname = \
-        os.path.join(
-            '/home/web/media', 'pdf/{}/{}'.format(project_folder, filename))
-    found = os.path.exists(pathname)
-
     if request.method == 'POST':
-        if found:
-            # Delete existing certificate
-            os.remove(pathname)
-
-        makepath = '/home/web/media/pdf/%s/' % project_folder
-        if not os.path.exists(makepath):
-            os.makedirs(makepath)
-
+        # Forget the cached PDF so that it is rendered again.
+        certificate.pdf_fingerprint = ''
         current_site = request.META['HTTP_HOST']
-        generate_pdf(
-            pathname, project, course, attendee, certificate, current_site,
-            course.certificate_type.wording
-        )
+        pathname = ensure_certificate_pdf(
+            project, course, certificate, current_site)
         try:
             return FileResponse(open(pathname, 'rb'),
                                 content_type='application/pdf')
@@ -741,36 +479,7 @@ def generate_all_certificate(request, **kwargs):
     else:
         raise Http404
 
-    course_attendees = CourseAttendee.objects.filter(course=course)
-    for course_attendee in course_attendees:
-
-        try:
-            certificate = Certificate.objects.get(
-                author=request.user,
-                attendee=course_attendee.attendee,
-                course=course,
-            )
-        except Certificate.DoesNotExist:
-
-            remaining_credits = \
-                certifying_organisation.organisation_credits - \
-                certifying_organisation.project.certificate_credit
-
-            is_paid = False
-            if remaining_credits >= 0:
-                is_paid = True
-
-            certificate = Certificate.objects.create(
-                author=request.user,
-                attendee=course_attendee.attendee,
-                course=course,
-                is_paid=is_paid
-            )
-
-            if certificate and (remaining_credits >= 0):
-                certifying_organisation.organisation_credits = \
-                    remaining_credits
-                certifying_organisation.save()
+    issue_course_certificates(course, request.user)
 
     url = reverse('course-detail', kwargs={
         'project_slug': project_slug,
@@ -802,14 +511,6 @@ def regenerate_all_certificate(request, **kwargs):
     else:
         raise Http404
 
-    attendees_pk = \
-        Certificate.objects.filter(
-            course=course).values_list('attendee', flat=True)
-
-    attendees = []
-    for pk in attendees_pk:
-        attendees.append(Attendee.objects.get(pk=pk))
-
     pending_organisation = \
         CertifyingOrganisation.objects.filter(approved=False)
     has_pending = False
@@ -822,45 +523,30 @@ def regenerate_all_certificate(request, **kwargs):
         'slug': course_slug
     })
 
+    certificates = Certificate.objects.filter(
+        course=course).select_related('attendee')
+
     # Attendee and her certificate
     certificates_dict = {}
-    for attendee in attendees:
-        certificates_dict[attendee] = \
-            Certificate.objects.get(
-                course=course, attendee=attendee)
+    for certificate in certificates:
+        certificates_dict[certificate.attendee] = certificate
 
-    project_folder = (project.name.lower()).replace(' ', '_')
     if request.method == 'POST':
-
-        # Delete all existing certificate in a course.
-        for key, value in certificates_dict.items():
-            filename = "{}.{}".format(value.certificateID, "pdf")
-            pathname = \
-                os.path.join(
-                    '/home/web/media',
-                    'pdf/{}/{}'.format(project_folder, filename))
-            found = os.path.exists(pathname)
-            if found:
-                os.remove(pathname)
-
-        # Generate all certificates in a course
-        current_site = request.META['HTTP_HOST']
-        makepath = '/home/web/media/pdf/{}/'.format(project_folder)
-        if not os.path.exists(makepath):
-            os.makedirs(makepath)
-
-        for key, value in certificates_dict.items():
-            filename = "{}.{}".format(value.certificateID, "pdf")
-            pathname = \
-                os.path.join(
-                    '/home/web/media',
-                    'pdf/{}/{}'.format(project_folder, filename))
-            generate_pdf(
-                pathname, project, course, key, value, current_site,
-                course.certificate_type.wording)
-
-        messages.success(request, 'All certificates are updated', 'regenerate')
-        return HttpResponseRedirect(url)
+        # Certificates are rendered by a background job. Existing files are
+        # replaced atomically once their new version is rendered.
+        job = BackgroundJob.enqueue(
+            REGENERATE_CERTIFICATES,
+            {
+                'project': project.pk,
+                'course': course.pk,
+                'site': request.META['HTTP_HOST'],
+            },
+            key=course_certificates_key(course),
+            user=request.user,
+            max_attempts=3)
+        return job_progress_page(
+            request, job, 'Regenerating Certificates', back_url=url,
+            done_url=url, the_project=project)
 
     return render(
         request, 'certificate/regenerate_all_certificate.html',
@@ -907,18 +593,7 @@ class DummyCertificate(object):
 
 def preview_certificate(request, **kwargs):
     """Generate pdf for preview upon creating new course."""
-    # Register new font
-    try:
-        font_folder = os.path.join(
-            settings.STATIC_ROOT, 'fonts/times-new-roman')
-        bold_ttf_file = os.path.join(
-            font_folder, 'Times New Roman Gras 700.ttf')
-        regular_ttf_file = os.path.join(
-            font_folder, 'Times New Roman 400.ttf')
-        pdfmetrics.registerFont(TTFont('Noto-Bold', bold_ttf_file))
-        pdfmetrics.registerFont(TTFont('Noto-Regular', regular_ttf_file))
-    except (TTFError, KeyError):
-        pass
+    register_fonts()
 
     response = HttpResponse(content_type='application/pdf')
     response['Content-Disposition'] = 'filename="preview.pdf"'
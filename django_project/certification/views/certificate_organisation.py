@@ -2,59 +2,35 @@
 import os
 from datetime import datetime
 from braces.views import LoginRequiredMixin
-from django.conf import settings
 from django.urls import reverse
 from django.http import Http404, FileResponse
 from django.views.generic import CreateView, DetailView
-from reportlab.lib.utils import ImageReader
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont, TTFError
 from base.models.project import Project
 from certification.models.certifying_organisation import CertifyingOrganisation
 from certification.models.organisation_certificate import \
     CertifyingOrganisationCertificate
 from certification.forms import OrganisationCertificateForm
+from certification.certificate_assets import asset_cache
+from certification.certificate_renderer import register_fonts
 
 
 def generate_certificate_pdf(
         pathname, project, certifying_organisation, certificate, current_site):
     """Create the PDF object, using the response object as its file."""
 
-    # Register new font
-    try:
-        font_folder = os.path.join(
-            settings.STATIC_ROOT, 'fonts/times-new-roman')
-        bold_ttf_file = os.path.join(
-            font_folder, 'Times New Roman Gras 700.ttf')
-        regular_ttf_file = os.path.join(
-            font_folder, 'Times New Roman 400.ttf')
-        pdfmetrics.registerFont(TTFont('Noto-Bold', bold_ttf_file))
-        pdfmetrics.registerFont(TTFont('Noto-Regular', regular_ttf_file))
-    except TTFError:
-        pass
+    register_fonts()
 
     page = canvas.Canvas(pathname, pagesize=landscape(A4))
     width, height = A4
     center = height * 0.5
 
-    if project.image_file:
-        project_logo = ImageReader(project.image_file)
-    else:
-        project_logo = None
-
-    if project.project_representative_signature:
-        project_representative_signature = \
-            ImageReader(project.project_representative_signature)
-    else:
-        project_representative_signature = None
-
-    if project.template_certifying_organisation_certificate:
-        background = \
-            ImageReader(project.template_certifying_organisation_certificate)
-    else:
-        background = None
+    project_logo = asset_cache.image_reader(project.image_file)
+    project_representative_signature = asset_cache.image_reader(
+        project.project_representative_signature)
+    background = asset_cache.image_reader(
+        project.template_certifying_organisation_certificate)
 
     # Certificate margin.
     margin_right = height - 50
@@ -1,5 +1,4 @@
 # coding=utf-8
-from datetime import timedelta, datetime
 
 from django.urls import reverse
 from django.core.exceptions import PermissionDenied
@@ -16,8 +15,7 @@ from base.models import Project
 from ..models import (
     CertifyingOrganisation,
     Course,
-    CourseAttendee,
-    Certificate)
+    course_attendees_with_certificates)
 from ..forms import CourseForm
 from certification.utilities import check_slug
 
@@ -452,46 +450,26 @@ class CourseDetailView(CourseMixin, DetailView):
         :rtype: dict
         """
 
-        self.organisation_slug = self.kwargs.get('organisation_slug', None)
-        self.slug = self.kwargs.get('slug', None)
-        self.certifying_organisation = \
-            CertifyingOrganisation.objects.get(slug=self.organisation_slug)
-        self.course = Course.objects.get(slug=self.slug)
+        self.course = self.object
         context = super(
             CourseDetailView, self).get_context_data(**kwargs)
 
-        attendees = (
-            CourseAttendee.objects.filter(course=self.course)
-        )
-        for course_attendee in attendees:
-            course_attendee.editable = False
-            certificate = Certificate.objects.filter(
-                course=self.course,
-                attendee=course_attendee.attendee
-            ).first()
-            if certificate:
-                course_attendee.editable = (
-                    certificate.issue_date and
-                    certificate.issue_date +
-                    timedelta(days=7) > datetime.today().date()
-                )
-            else:
-                course_attendee.editable = True
+        attendees = list(course_attendees_with_certificates(self.course))
         context['attendees'] = attendees
-
         context['certificates'] = dict(
-            Certificate.objects.filter(
-                course=self.course
-            ).values_list('attendee', 'certificateID')
+            (course_attendee.attendee_id, course_attendee.certificateID)
+            for course_attendee in attendees
+            if course_attendee.certificate_pk is not None
+        )
+        context['paid_certificates'] = set(
+            course_attendee.attendee_id for course_attendee in attendees
+            if course_attendee.certificate_is_paid
         )
-        context['paid_certificates'] = \
-            Certificate.objects.filter(
-                course=self.course, is_paid=True).values_list(
-                'attendee', flat=True)
         project_slug = self.kwargs.get('project_slug', None)
         context['project_slug'] = project_slug
         if project_slug:
-            context['the_project'] = Project.objects.get(slug=project_slug)
+            context['the_project'] = Project.objects.select_related(
+                'owner').get(slug=project_slug)
             context['project'] = context['the_project']
         return context
 
@@ -503,7 +481,15 @@ class CourseDetailView(CourseMixin, DetailView):
         :rtype: QuerySet
         """
 
-        qs = Course.objects.all()
+        qs = Course.objects.select_related(
+            'certifying_organisation__project',
+            'course_convener__user',
+            'course_type',
+            'training_center',
+        ).prefetch_related(
+            'certifying_organisation__organisation_owners',
+            'certifying_organisation__project__certification_managers',
+        )
         return qs
 
     def get_object(self, queryset=None):
@@ -17,3 +17,5 @@ class ChangesConfig(AppConfig):
 
     def ready(self):
         post_migrate.connect(create_notice_types, sender=self)
+        import changes.signals.changelog  # noqa
+        import changes.signals.sustaining_membership  # noqa
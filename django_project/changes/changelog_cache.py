@@ -0,0 +1,153 @@
+# coding=utf-8
+"""Cache of the rendered changelog pages of a version.
+
+Renders of the version pages are kept in the Django cache per version,
+format and request variant (host and language). The changelog generation
+stored on every version row is part of the keys, invalidating a version
+replaces its generation in the database so no process reads its previous
+renders again, even from a cache of its own.
+
+Renders of locked versions are also pinned to files under MEDIA_ROOT, so
+released changelogs survive cache flushes and restarts. Pinned files are
+named after the generation they were rendered for too, a render finished
+after an invalidation is written under a name which is never read.
+
+The downloadable archives of a version, built by a background job, are
+kept with the job results out of the served media and are dropped with the
+pinned renders.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+from base.jobs import job_result_root
+from .models.version import Version
+
+logger = logging.getLogger(__name__)
+
+CHANGELOG_FOLDER = 'changelogs'
+
+
+def changelog_variant(request):
+    """Return the part of a request a rendered changelog depends on.
+
+    :param request: The incoming HTTP request.
+    :type request: HttpRequest
+
+    :returns: A short digest of the host and the active language.
+    :rtype: str
+    """
+
+    variant = '{}|{}'.format(request.get_host(), get_language())
+    return hashlib.sha1(variant.encode('utf-8')).hexdigest()[:12]
+
+
+def changelog_pin_folder(version_id):
+    """Return the folder holding the pinned renders of a version."""
+
+    return os.path.join(
+        settings.MEDIA_ROOT, CHANGELOG_FOLDER, str(version_id))
+
+
+def changelog_export_folder(version_id):
+    """Return the folder holding the downloadable archives of a version."""
+
+    return os.path.join(job_result_root(), CHANGELOG_FOLDER, str(version_id))
+
+
+def _pin_path(version, changelog_format, variant):
+    return os.path.join(
+        changelog_pin_folder(version.pk),
+        '{}-{}-{}'.format(
+            version.changelog_generation, changelog_format, variant))
+
+
+def _content_key(version, changelog_format, variant):
+    return 'changelog:{}:{}:{}:{}'.format(
+        version.pk, version.changelog_generation, changelog_format, variant)
+
+
+def _pin(version, changelog_format, variant, content):
+    """Atomically write a render of a locked version to disk."""
+
+    pathname = _pin_path(version, changelog_format, variant)
+    folder = os.path.dirname(pathname)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        file_descriptor, temp_pathname = tempfile.mkstemp(
+            dir=folder, prefix='.', suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as pinned:
+            pinned.write(content)
+        os.replace(temp_pathname, pathname)
+    except OSError:
+        logger.exception(
+            'Could not pin the changelog of version %s', version.pk)
+
+
+def get_changelog(version, changelog_format, variant):
+    """Return a cached render of a version, None when there is none.
+
+    :param version: The version, as read from the database by the request.
+    :type version: changes.models.Version
+
+    :param changelog_format: Name of the rendered format e.g. 'html'.
+    :type changelog_format: str
+
+    :param variant: Request variant, see changelog_variant.
+    :type variant: str
+
+    :rtype: bytes, None
+    """
+
+    if version.locked:
+        try:
+            with open(_pin_path(
+                    version, changelog_format, variant), 'rb') as pinned:
+                return pinned.read()
+        except OSError:
+            pass
+    content = cache.get(_content_key(version, changelog_format, variant))
+    if content is not None and version.locked:
+        _pin(version, changelog_format, variant, content)
+    return content
+
+
+def set_changelog(version, changelog_format, variant, content):
+    """Store a render of a version, pinning it to disk when locked.
+
+    :param content: The rendered response body.
+    :type content: bytes
+    """
+
+    cache.set(
+        _content_key(version, changelog_format, variant),
+        content,
+        getattr(settings, 'CHANGELOG_CACHE_TIMEOUT', 24 * 60 * 60))
+    if version.locked:
+        _pin(version, changelog_format, variant, content)
+
+
+def invalidate_changelogs(version_ids):
+    """Drop the cached and pinned renders of some versions.
+
+    :param version_ids: Primary keys of the versions.
+    :type version_ids: iterable
+    """
+
+    version_ids = set(version_ids)
+    # A random generation, a version saved from an instance read before
+    # the update writes back a generation which is replaced right after.
+    Version.objects.filter(pk__in=version_ids).update(
+        changelog_generation=uuid.uuid4().hex)
+    for version_id in version_ids:
+        shutil.rmtree(changelog_pin_folder(version_id), ignore_errors=True)
+        shutil.rmtree(
+            changelog_export_folder(version_id), ignore_errors=True)
@@ -0,0 +1,180 @@
+# coding=utf-8
+"""Bulk creation of the changelog entries imported from pull requests.
+
+Entries already imported are found with one indexed lookup of the incoming
+pull request URLs. The new entries get their slugs and a block of sequence
+numbers in memory and are inserted with bulk_create, so the number of
+queries of an import does not depend on its size.
+
+The pull requests matching a GitHub search are imported by the
+``changes.fetch_github_prs`` background job.
+"""
+
+import hashlib
+import warnings
+
+from django.db import models, transaction
+
+from changes.changelog_cache import invalidate_changelogs
+from changes.models.entry import Entry, entry_slug
+from changes.models.version import Version
+from changes.utils.github_client import GithubClient, pull_request_login
+from changes.utils.github_pull_request import parse_funded_by
+
+try:
+    from core.settings.secret import GIT_TOKEN
+except ImportError:
+    GIT_TOKEN = ''
+    warnings.warn(
+        "Be careful, the GIT_TOKEN is not set. Using the GitHub API will "
+        "fail.")
+
+IMPORT_BATCH_SIZE = 500
+
+# Background job importing the pull requests matching a GitHub search.
+FETCH_GITHUB_PRS = 'changes.fetch_github_prs'
+
+
+def _unique_slug(slug, used_slugs):
+    if slug not in used_slugs:
+        return slug
+    number = 1
+    while True:
+        number += 1
+        suffix = '-{}'.format(number)
+        candidate = slug[:50 - len(suffix)] + suffix
+        if candidate not in used_slugs:
+            return candidate
+
+
+def import_entries(version, category, entries, batch_size=IMPORT_BATCH_SIZE):
+    """Create imported entries of a version category in bulk.
+
+    Entries whose github_PR_url was already imported, in any project, and
+    entries titled like an existing entry of the category are skipped.
+
+    :param version: The version the entries belong to.
+    :type version: changes.models.Version
+
+    :param category: The category the entries belong to.
+    :type category: changes.models.Category
+
+    :param entries: Unsaved entries, in the order they are listed.
+    :type entries: list
+
+    :returns: The created entries.
+    :rtype: list
+    """
+
+    urls = set(entry.github_PR_url for entry in entries if entry.github_PR_url)
+    with transaction.atomic():
+        # Imports of the same version are serialised, their slugs and
+        # sequence numbers can not collide.
+        Version.objects.select_for_update().filter(pk=version.pk).exists()
+
+        imported_urls = set(Entry.objects.filter(
+            github_PR_url__in=urls).values_list('github_PR_url', flat=True))
+        used_slugs = set()
+        used_titles = set()
+        for slug, title, category_id in Entry.objects.filter(
+                version=version).values_list('slug', 'title', 'category'):
+            used_slugs.add(slug)
+            if category_id == category.pk:
+                used_titles.add(title)
+        max_number = Entry.objects.filter(
+            version=version, category=category).aggregate(
+            models.Max('sequence_number'))['sequence_number__max']
+        sequence_number = 0 if max_number is None else max_number + 1
+
+        new_entries = []
+        for entry in entries:
+            if entry.github_PR_url and entry.github_PR_url in imported_urls:
+                continue
+            if entry.title in used_titles:
+                continue
+            imported_urls.add(entry.github_PR_url)
+            used_titles.add(entry.title)
+            entry.version = version
+            entry.category = category
+            entry.slug = _unique_slug(entry_slug(entry.title), used_slugs)
+            used_slugs.add(entry.slug)
+            entry.sequence_number = sequence_number
+            sequence_number += 1
+            # bulk_create does not call save, which renders the description.
+            entry.update_description_html()
+            new_entries.append(entry)
+        Entry.objects.bulk_create(new_entries, batch_size=batch_size)
+
+    # bulk_create sends no post_save signal.
+    if new_entries:
+        invalidate_changelogs([version.pk])
+    return new_entries
+
+
+def create_entry_from_github_pr(version, category, data, user, client=None):
+    """Function to create entry objects from github PR.
+
+    The profiles of the authors are fetched once per author, concurrently,
+    the new entries are created in bulk.
+
+    :param client: GitHub client to use, a new one by default.
+    :type client: GithubClient
+
+    :return:
+    """
+
+    if client is None:
+        with GithubClient(GIT_TOKEN) as client:
+            return create_entry_from_github_pr(
+                version, category, data, user, client)
+
+    profiles = client.user_profiles(
+        pull_request_login(item) for item in data)
+    entries = []
+    for item in data:
+        name = ''
+        developer_url = ''
+        profile = profiles.get(pull_request_login(item))
+        if profile is not None:
+            developer_url = profile.html_url
+            name = profile.display_name
+
+        content, funded_by, funded_by_url = parse_funded_by(item['body'])
+
+        entries.append(Entry(
+            title=item['title'],
+            description=content,
+            developer_url=developer_url,
+            developed_by=name,
+            funded_by=funded_by,
+            funder_url=funded_by_url,
+            author=user,
+            github_PR_url=item['html_url']
+        ))
+    import_entries(version, category, entries)
+    return True
+
+
+def github_import_key(version, category, repo, query):
+    """Return the background job key of an import of pull requests."""
+
+    search = hashlib.sha1(
+        '{}|{}'.format(repo, query).encode('utf-8')).hexdigest()
+    return 'github-import:{}:{}:{}'.format(version.pk, category.pk, search)
+
+
+def import_github_pull_requests(
+        version, category, repo, query, user, progress=None):
+    """Create the entries of the pull requests matching a search.
+
+    :raises: GithubError when the search fails.
+    """
+
+    with GithubClient(GIT_TOKEN) as client:
+        if progress is not None:
+            progress(10, 'Searching the pull requests of {}'.format(repo))
+        results = client.search_pull_requests(repo, query)
+        if progress is not None:
+            progress(50, 'Importing {} pull requests'.format(len(results)))
+        create_entry_from_github_pr(version, category, results, user, client)
+    return len(results)
@@ -117,13 +117,13 @@ class RssEntryFeed(Feed):
         :param item: Entry object from the latest Version of a Project
         :type item: Entry
 
-        :returns: description of the Entry
+        :returns: description of the Entry, rendered as HTML
         :rtype: str
         """
 
-        return '<p>' + item.description + \
-               '</p><p><img src="' + settings.MEDIA_URL + \
-               item.image_file.name + '"/></p>'
+        return item.description_html + \
+            '<p><img src="' + settings.MEDIA_URL + \
+            item.image_file.name + '"/></p>'
 
 
 class AtomEntryFeed(RssEntryFeed):
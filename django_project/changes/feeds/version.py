@@ -100,10 +100,10 @@ class RssVersionFeed(Feed):
         :param item: Version object of a project
         :type item: Version
 
-        :returns: description of the Version
+        :returns: description of the Version, rendered as HTML
         :rtype: str
         """
-        return item.description
+        return item.description_html
 
 
 class AtomVersionFeed(RssVersionFeed):
@@ -0,0 +1,217 @@
+# coding=utf-8
+"""Localisation of the remote images referenced by the entries of a version.
+
+Entries imported from GitHub reference their screenshots on other sites.
+The ``changes.localise_images`` background job downloads them concurrently
+and stores each image under MEDIA_ROOT named by the SHA-1 of its content,
+like the default file storage of the site, so an image referenced several
+times is stored once.
+
+Entries are processed in chunks saved as they are done. An entry is only
+rewritten once all of its remote images are stored, a localised entry then
+references no remote image anymore and running the job again retries the
+entries whose downloads failed.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+import markdown
+import requests
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from changes.changelog_cache import invalidate_changelogs
+from changes.models.entry import Entry
+
+logger = logging.getLogger(__name__)
+
+LOCALISE_IMAGES = 'changes.localise_images'
+
+IMAGE_FOLDER = 'images/entries'
+
+CHUNK_SIZE = 20
+
+
+class ImgExtractor(Treeprocessor):
+    def run(self, doc):
+        """Find all images and append to markdown.images."""
+        self.markdown.images = []
+        for image in doc.findall('.//img'):
+            self.markdown.images.append(image.get('src'))
+
+
+class ImgExtExtension(Extension):
+    def extendMarkdown(self, md, md_globals):
+        img_ext = ImgExtractor(md)
+        md.treeprocessors.add('imgext', img_ext, '>inline')
+
+
+def localise_images_key(version):
+    """Return the background job key of the localisation of a version."""
+
+    return 'localise-images:{}'.format(version.pk)
+
+
+def _no_progress(percentage, message):
+    pass
+
+
+def _is_remote(url):
+    return bool(url) and urlparse(url).scheme in ('http', 'https')
+
+
+def _render(entry):
+    """Return the HTML of an entry and the images it references."""
+
+    md = markdown.Markdown(extensions=[ImgExtExtension()])
+    html = md.convert(entry.description or '')
+    return html, getattr(md, 'images', [])
+
+
+class ImageDownloader(object):
+    """Download images concurrently and store them by content hash."""
+
+    def __init__(self, max_workers=None, timeout=30):
+        self.max_workers = max_workers or getattr(
+            settings, 'IMAGE_DOWNLOAD_WORKERS', 8)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def store(self, url):
+        """Download an image, return its name in the storage or None."""
+
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                logger.warning(
+                    'Downloading image %s failed: %s',
+                    url, response.status_code)
+                return None
+            content = response.content
+        except requests.RequestException:
+            logger.warning('Downloading image %s failed', url)
+            return None
+        extension = os.path.splitext(urlparse(url).path)[1].lower()
+        name = '{}/{}{}'.format(
+            IMAGE_FOLDER, hashlib.sha1(content).hexdigest(), extension)
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        return name
+
+    def store_all(self, urls):
+        """Store images concurrently.
+
+        :returns: Names in the storage by URL, failed URLs are missing.
+        :rtype: dict
+        """
+
+        urls = sorted(set(urls))
+        if not urls:
+            return {}
+        workers = min(self.max_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            names = executor.map(self.store, urls)
+        return dict(
+            (url, name) for url, name in zip(urls, names) if name)
+
+
+def _localise_entry(entry, html, images, names):
+    """Point an entry to its stored images, return whether it changed.
+
+    The entry is left as it is when one of its remote images is not stored,
+    its description is rewritten as HTML in which images are not found.
+    """
+
+    missing = [
+        image for image in images
+        if _is_remote(image) and not names.get(image)]
+    if missing:
+        logger.warning(
+            'Kept the remote images of entry %s, %s could not be stored',
+            entry.pk, ', '.join(missing))
+        return False
+    changed = False
+    for index, image in enumerate(images):
+        name = names.get(image)
+        if not name:
+            continue
+        changed = True
+        if index == 0:
+            # The first image of the pull request becomes the image of
+            # the entry and is removed from the body.
+            entry.image_file = name
+            html = re.sub(
+                '<img.*?{}.*?/>'.format(re.escape(image)), '', html, 1)
+            continue
+        html = html.replace(image, urljoin(settings.MEDIA_URL, name))
+        html = re.sub(r"alt=\".*?\"", "", html)
+    if changed:
+        entry.description = html
+        entry.update_description_html()
+    return changed
+
+
+def localise_version_images(version, progress=None, chunk_size=CHUNK_SIZE):
+    """Download the remote images of the entries of a version.
+
+    :param version: The version.
+    :type version: changes.models.Version
+
+    :param progress: Called with a percentage and a message.
+    :type progress: callable
+
+    :returns: The number of localised entries.
+    :rtype: int
+    """
+
+    if progress is None:
+        progress = _no_progress
+
+    entries = []
+    for entry in Entry.objects.filter(version=version).order_by('pk'):
+        html, images = _render(entry)
+        if any(_is_remote(image) for image in images):
+            entries.append((entry, html, images))
+
+    total = len(entries)
+    localised = 0
+    downloader = ImageDownloader()
+    try:
+        for start in range(0, total, chunk_size):
+            chunk = entries[start:start + chunk_size]
+            names = downloader.store_all(
+                image for entry, html, images in chunk
+                for image in images if _is_remote(image))
+            updated = [
+                entry for entry, html, images in chunk
+                if _localise_entry(entry, html, images, names)]
+            Entry.objects.bulk_update(
+                updated, [
+                    'description', 'description_html', 'description_digest',
+                    'image_file'])
+            # bulk_update sends no post_save signal.
+            invalidate_changelogs([version.pk])
+            localised += len(updated)
+            done = start + len(chunk)
+            progress(
+                100 * done // total,
+                'Downloaded the images of {} of {} entries'.format(
+                    done, total))
+    finally:
+        downloader.close()
+    return localised
@@ -0,0 +1,40 @@
+# coding=utf-8
+"""Background jobs of the changes app, run by the run_worker command."""
+
+from base.jobs import register_job
+from .entry_import import FETCH_GITHUB_PRS, import_github_pull_requests
+from .image_localisation import LOCALISE_IMAGES, localise_version_images
+from .models import Category, Version
+from .version_export import VERSION_EXPORT, build_version_export
+
+
+@register_job(VERSION_EXPORT)
+def export_version(job):
+    """Build the downloadable archive of a version."""
+
+    version = Version.objects.select_related('project').get(
+        pk=job.payload['version'])
+    return build_version_export(
+        version, job.payload['format'], job.set_progress)
+
+
+@register_job(LOCALISE_IMAGES)
+def localise_images(job):
+    """Download the remote images referenced by the entries of a version."""
+
+    version = Version.objects.get(pk=job.payload['version'])
+    localised = localise_version_images(version, job.set_progress)
+    job.set_progress(100, 'Localised the images of {} entries'.format(
+        localised))
+
+
+@register_job(FETCH_GITHUB_PRS)
+def fetch_github_prs(job):
+    """Import the pull requests matching a GitHub search as entries."""
+
+    version = Version.objects.get(pk=job.payload['version'])
+    category = Category.objects.get(pk=job.payload['category'])
+    found = import_github_pull_requests(
+        version, category, job.payload['repo'], job.payload['query'],
+        job.created_by, job.set_progress)
+    job.set_progress(100, 'Found {} pull requests'.format(found))
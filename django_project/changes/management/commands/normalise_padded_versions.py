@@ -0,0 +1,47 @@
+# coding=utf-8
+"""A command to recompute padded versions stored with letters or dots."""
+
+from django.core.management.base import BaseCommand
+from ...models.version import (
+    UNPADDED_VERSION_REGEX,
+    Version,
+    padded_version_name,
+)
+
+
+class Command(BaseCommand):
+    """Recompute the padded version of versions which are not sortable.
+    """
+
+    help = 'Recompute padded versions containing letters or dots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the versions which would be updated.')
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+        :param args:  Not used
+        :param options: dry_run to only report the changes.
+        """
+        versions = Version.objects.filter(
+            padded_version__regex=UNPADDED_VERSION_REGEX
+        ).select_related('project').only(
+            'name', 'padded_version', 'project__name')
+        updated = []
+        for version in versions.iterator():
+            padded_version = padded_version_name(version.name)
+            if padded_version == version.padded_version:
+                continue
+            self.stdout.write('%s %s: %s -> %s' % (
+                version.project.name, version.name,
+                version.padded_version, padded_version))
+            version.padded_version = padded_version
+            updated.append(version)
+        if not options['dry_run']:
+            Version.objects.bulk_update(
+                updated, ['padded_version'], batch_size=500)
+        self.stdout.write(
+            'Successfully normalised %s padded versions.' % len(updated))
@@ -0,0 +1,54 @@
+# coding=utf-8
+"""A command to store the HTML of the entry and version descriptions."""
+
+from django.core.management.base import BaseCommand
+from ...models import Entry, Version
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    """Render the descriptions whose stored HTML is missing or stale.
+
+    Descriptions are rendered when entries and versions are saved and the
+    existing rows by a migration, this fills the HTML of rows updated in
+    bulk and renders the descriptions again after the renderer changed.
+    """
+
+    help = 'Store the HTML of the entry and version descriptions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Render every description, even the up to date ones.')
+
+    def _render(self, model, force):
+        rendered = 0
+        batch = []
+        for instance in model.objects.only(
+                'description', 'description_digest').iterator():
+            if force:
+                instance.description_digest = ''
+            if not instance.update_description_html():
+                continue
+            batch.append(instance)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(
+                    batch, ['description_html', 'description_digest'])
+                rendered += len(batch)
+                batch = []
+        model.objects.bulk_update(
+            batch, ['description_html', 'description_digest'])
+        return rendered + len(batch)
+
+    def handle(self, *args, **options):
+        """Implementation for command.
+        :param args:  Not used
+        :param options: force to render the up to date descriptions too.
+        """
+        for model in (Version, Entry):
+            rendered = self._render(model, options['force'])
+            self.stdout.write(
+                'Rendered %s %s descriptions.' % (
+                    rendered, model._meta.verbose_name))
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.13 on 2026-10-18 10:40
+
+import re
+
+from django.db import migrations, models
+
+# Copies of changes.models.version at the time of this migration, so later
+# changes to the model module do not change what it does.
+UNPADDED_VERSION_REGEX = r'[a-zA-Z,.]'
+
+
+def padded_version_name(name):
+    """Return the sortable zero padded version of a version name."""
+    numeric_name = re.sub(r'[^\d.]+', '', name)
+    # Fix the numbering of the version name to have format: 0.0.0.
+    while len(numeric_name.split('.')) < 3:
+        numeric_name += '.0'
+    tokens = numeric_name.split('.')
+    if len(tokens) != 3:
+        return numeric_name
+    return ''.join(token.zfill(3) for token in tokens)
+
+
+def normalise_padded_version(apps, schema_editor):
+    Version = apps.get_model('changes', 'Version')
+    versions = Version.objects.filter(
+        padded_version__regex=UNPADDED_VERSION_REGEX).only(
+        'name', 'padded_version')
+    updated = []
+    for version in versions.iterator():
+        padded_version = padded_version_name(version.name)
+        if padded_version != version.padded_version:
+            version.padded_version = padded_version
+            updated.append(version)
+    Version.objects.bulk_update(updated, ['padded_version'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0011_auto_20200730_0531'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            normalise_padded_version, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='version',
+            index=models.Index(fields=['project', 'padded_version'], name='changes_version_padded_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.13 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0012_normalise_padded_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GithubProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('login', models.CharField(help_text='GitHub login of the user.', max_length=100, unique=True)),
+                ('name', models.CharField(blank=True, default='', help_text='Display name of the user, may be empty.', max_length=255)),
+                ('html_url', models.CharField(blank=True, default='', help_text='URL of the GitHub page of the user.', max_length=255)),
+                ('etag', models.CharField(blank=True, default='', help_text='ETag of the last fetched profile.', max_length=255)),
+                ('date_fetched', models.DateTimeField(help_text='When the profile was last fetched or revalidated.')),
+            ],
+            options={
+                'ordering': ['login'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0013_githubprofile'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='entry',
+            name='github_PR_url',
+            field=models.CharField(blank=True, db_index=True, help_text='Input the Github PR URL when applicable.', max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.13 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0014_entry_github_pr_url_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='description_digest',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Digest of the markdown the HTML was rendered from.', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='description_html',
+            field=models.TextField(blank=True, default='', editable=False, help_text='The description rendered as HTML.'),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='description_digest',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Digest of the markdown the HTML was rendered from.', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='description_html',
+            field=models.TextField(blank=True, default='', editable=False, help_text='The description rendered as HTML.'),
+        ),
+    ]
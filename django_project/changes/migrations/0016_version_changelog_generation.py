@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0015_description_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='changelog_generation',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Replaced whenever the rendered changelog changes.', max_length=32),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2.13 on 2026-10-18 21:00
+
+import hashlib
+
+import markdown
+from django.db import migrations
+
+# Copies of base.markdown_cache at the time of this migration, so later
+# changes to the renderer do not change what it does. Rows rendered here
+# are rendered again by the render_descriptions command once the digest of
+# the renderer differs.
+EXTENSIONS = ('nl2br', 'markdown.extensions.tables', 'fenced_code')
+
+
+def markdown_digest(text):
+    """Return the digest of a text and the markdown extensions."""
+    digest = hashlib.sha1()
+    digest.update('\0'.join(EXTENSIONS).encode('utf-8'))
+    digest.update(b'\0\0')
+    digest.update((text or '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+def render_markdown(text):
+    """Return the HTML of markdown as shown by the base_markdown filter."""
+    html = markdown.Markdown(
+        extensions=list(EXTENSIONS),
+        safe_mode=True,
+        enable_attributes=False).convert(text or '')
+    return html.replace(
+        '<table>', '<table class="table table-striped table-bordered"')
+
+
+BATCH_SIZE = 500
+
+
+def render_descriptions(apps, schema_editor):
+    for model_name in ('Version', 'Entry'):
+        model = apps.get_model('changes', model_name)
+        batch = []
+        for instance in model.objects.only(
+                'description', 'description_digest').iterator():
+            digest = markdown_digest(instance.description)
+            if digest == instance.description_digest:
+                continue
+            instance.description_html = render_markdown(instance.description)
+            instance.description_digest = digest
+            batch.append(instance)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(
+                    batch, ['description_html', 'description_digest'])
+                batch = []
+        model.objects.bulk_update(
+            batch, ['description_html', 'description_digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0016_version_changelog_generation'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            render_descriptions, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,7 @@ from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 import os
 import logging
+from base.markdown_cache import markdown_digest, render_markdown
 from core.settings.contrib import STOP_WORDS
 from django.conf.global_settings import MEDIA_ROOT
 from django.db import models
@@ -14,6 +15,15 @@ from django.contrib.auth.models import User
 logger = logging.getLogger(__name__)
 
 
+def entry_slug(title):
+    """Return the slug of an entry title, without its stop words."""
+
+    words = title.split()
+    filtered_words = [t for t in words if t.lower() not in STOP_WORDS]
+    new_list = ' '.join(filtered_words)
+    return slugify(new_list)[:50]
+
+
 class Entry(models.Model):
     """An entry is the basic unit of a changelog."""
 
@@ -38,6 +48,19 @@ class Entry(models.Model):
         blank=True,
         help_text='Describe the new feature. Markdown is supported.')
 
+    description_html = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        help_text='The description rendered as HTML.')
+
+    description_digest = models.CharField(
+        max_length=40,
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Digest of the markdown the HTML was rendered from.')
+
     image_file = models.ImageField(
         help_text=(
             'A image that is related to this visual changelog entry. '
@@ -86,7 +109,8 @@ class Entry(models.Model):
         help_text='Input the Github PR URL when applicable.',
         max_length=255,
         null=True,
-        blank=True)
+        blank=True,
+        db_index=True)
 
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     slug = models.SlugField()
@@ -107,11 +131,12 @@ class Entry(models.Model):
         app_label = 'changes'
 
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.update_description_html() and update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                'description_html', 'description_digest'}
         if not self.pk:
-            words = self.title.split()
-            filtered_words = [t for t in words if t.lower() not in STOP_WORDS]
-            new_list = ' '.join(filtered_words)
-            self.slug = slugify(new_list)[:50]
+            self.slug = entry_slug(self.title)
 
             # Sequence number
             max_number = Entry.objects.all().\
@@ -125,6 +150,19 @@ class Entry(models.Model):
 
         super(Entry, self).save(*args, **kwargs)
 
+    def update_description_html(self):
+        """Render the description again if it changed since last rendered.
+
+        :returns: Whether the HTML was rendered again.
+        :rtype: bool
+        """
+        digest = markdown_digest(self.description)
+        if digest == self.description_digest:
+            return False
+        self.description_html = render_markdown(self.description)
+        self.description_digest = digest
+        return True
+
     def __unicode__(self):
         return u'%s' % self.title
 
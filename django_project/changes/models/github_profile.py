@@ -0,0 +1,56 @@
+# coding=utf-8
+"""Cached GitHub user profiles of the developers of imported entries."""
+
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class GithubProfile(models.Model):
+    """The public profile of a GitHub user, as last fetched.
+
+    Imported pull requests credit their author by name. Profiles are kept
+    with their ETag so they are only downloaded again when they changed.
+    """
+
+    login = models.CharField(
+        help_text=_('GitHub login of the user.'),
+        max_length=100,
+        unique=True
+    )
+
+    name = models.CharField(
+        help_text=_('Display name of the user, may be empty.'),
+        max_length=255,
+        blank=True,
+        default=''
+    )
+
+    html_url = models.CharField(
+        help_text=_('URL of the GitHub page of the user.'),
+        max_length=255,
+        blank=True,
+        default=''
+    )
+
+    etag = models.CharField(
+        help_text=_('ETag of the last fetched profile.'),
+        max_length=255,
+        blank=True,
+        default=''
+    )
+
+    date_fetched = models.DateTimeField(
+        help_text=_('When the profile was last fetched or revalidated.')
+    )
+
+    objects = models.Manager()
+
+    class Meta:
+        ordering = ['login']
+
+    def __str__(self):
+        return self.login
+
+    @property
+    def display_name(self):
+        return self.name or self.login
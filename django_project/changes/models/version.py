@@ -6,6 +6,7 @@ import os
 import logging
 from .entry import Entry
 from .sponsorship_period import SponsorshipPeriod
+from base.markdown_cache import markdown_digest, render_markdown
 from core.settings.contrib import STOP_WORDS
 from django.conf.global_settings import MEDIA_ROOT
 from django.contrib.auth.models import User
@@ -15,6 +16,25 @@ from ..utils.custom_slugfield import CustomSlugField
 
 logger = logging.getLogger(__name__)
 
+# Matches padded versions stored before they were computed on save.
+UNPADDED_VERSION_REGEX = r'[a-zA-Z,.]'
+
+
+def padded_version_name(name):
+    """Return the sortable zero padded version of a version name.
+
+    e.g. input: Version 2.10.1
+    e.g. output: 002010001
+
+    :param name: The version name.
+    :type name: str
+
+    :returns: Zero padded version, see Version.pad_name.
+    :rtype: str
+    """
+    version = Version(name=name)
+    return version.pad_name(str(version.get_numerical_name()))
+
 
 # noinspection PyUnresolvedReferences
 class Version(models.Model):
@@ -50,6 +70,19 @@ class Version(models.Model):
         blank=True,
         help_text='Describe the new version. Markdown is supported.')
 
+    description_html = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        help_text='The description rendered as HTML.')
+
+    description_digest = models.CharField(
+        max_length=40,
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Digest of the markdown the HTML was rendered from.')
+
     release_date = models.DateField(
         _('Release date (yyyy-mm-dd)'),
         help_text='Date of official release',
@@ -61,6 +94,13 @@ class Version(models.Model):
         help_text='Whether this version is locked for editing.',
     )
 
+    changelog_generation = models.CharField(
+        max_length=32,
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Replaced whenever the rendered changelog changes.')
+
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     slug = CustomSlugField()
     project = models.ForeignKey('base.Project', on_delete=models.CASCADE)
@@ -74,17 +114,39 @@ class Version(models.Model):
             ('slug', 'project'),
         )
         app_label = 'changes'
+        indexes = [
+            models.Index(
+                fields=['project', 'padded_version'],
+                name='changes_version_padded_idx'),
+        ]
         # ordering = ['-datetime_created']
 
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.update_description_html() and update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                'description_html', 'description_digest'}
         if not self.pk:
             words = self.name.split()
             filtered_words = [t for t in words if t.lower() not in STOP_WORDS]
             new_list = ' '.join(filtered_words)
             self.slug = version_slugify(new_list)[:50]
-        self.padded_version = self.pad_name(str(self.get_numerical_name()))
+        self.padded_version = padded_version_name(self.name)
         super(Version, self).save(*args, **kwargs)
 
+    def update_description_html(self):
+        """Render the description again if it changed since last rendered.
+
+        :returns: Whether the HTML was rendered again.
+        :rtype: bool
+        """
+        digest = markdown_digest(self.description)
+        if digest == self.description_digest:
+            return False
+        self.description_html = render_markdown(self.description)
+        self.description_digest = digest
+        return True
+
     def get_numerical_name(self):
         name = self.name
         non_decimal = re.compile(r'[^\d.]+')
@@ -136,18 +198,38 @@ class Version(models.Model):
             version=self).order_by('category__sort_number')
         return qs
 
-    def _entries_for_category(self, category):
-        """All entries for this version and filtered by the given category.
+    def grouped_entries(self):
+        """Get the entries for this version grouped by category.
 
-        :param category: Category to filter by.
-        :type category: Category
+        All entries are fetched with their category in one query, ordered
+        by category and sequence number, and grouped in a single pass.
+
+        :returns: A list of dicts with the category and the list of its
+            entries, in the order of the category sort number.
+        :rtype: list
         """
-        qs = Entry.objects.filter(version=self, category=category)
-        return qs
+        qs = self.entries().select_related('category').order_by(
+            'category__sort_number', 'category__name', 'sequence_number')
+        categories = []
+        row = None
+        for entry in qs:
+            # Entries are rendered with their version, reuse this one.
+            entry.version = self
+            if row is None or row['category'].pk != entry.category_id:
+                row = {
+                    'category': entry.category,
+                    'entries': []
+                }
+                categories.append(row)
+            row['entries'].append(entry)
+        return categories
 
     def categories(self):
         """Get a list of categories where there are one or more entries.
 
+        The list is computed once per instance, templates can iterate it
+        several times without querying again.
+
         Example use in template::
             {% for row in version.categories %}
               <h2 class="text-muted">{{ row.category.name }}</h2>
@@ -158,19 +240,9 @@ class Version(models.Model):
               </ul>
             {% endfor %}
         """
-        qs = self.entries()
-        used = []
-        categories = []
-        for entry in qs:
-            category = entry.category
-            if category not in used:
-                row = {
-                    'category': category,
-                    'entries': self._entries_for_category(category)
-                }
-                categories.append(row)
-                used.append(category)
-        return categories
+        if not hasattr(self, '_categories'):
+            self._categories = self.grouped_entries()
+        return self._categories
 
     def sponsors(self):
         """Return a list of sponsors current at time of this version release.
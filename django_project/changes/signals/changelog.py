@@ -0,0 +1,65 @@
+# coding=utf-8
+"""Signals invalidating the rendered changelog of versions."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
+
+from changes.changelog_cache import invalidate_changelogs
+from changes.models import (
+    Category,
+    Entry,
+    Sponsor,
+    SponsorshipLevel,
+    SponsorshipPeriod,
+    Version,
+)
+
+
+def _invalidate_projects(project_ids):
+    invalidate_changelogs(Version.objects.filter(
+        project_id__in=set(project_ids)).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Version)
+@receiver(post_delete, sender=Version)
+def version_changed(sender, instance, **kwargs):
+    invalidate_changelogs([instance.pk])
+
+
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+def entry_changed(sender, instance, **kwargs):
+    invalidate_changelogs([instance.version_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate_changelogs(Entry.objects.filter(
+        category_id=instance.pk).values_list('version', flat=True))
+
+
+@receiver(post_save, sender=SponsorshipPeriod)
+@receiver(post_delete, sender=SponsorshipPeriod)
+def sponsorship_period_changed(sender, instance, **kwargs):
+    # Versions list the sponsors current at their release date.
+    _invalidate_projects([instance.project_id])
+
+
+@receiver(post_save, sender=Sponsor)
+@receiver(post_delete, sender=Sponsor)
+def sponsor_changed(sender, instance, **kwargs):
+    # Versions show the name, URL and logo of their sponsors.
+    _invalidate_projects([instance.project_id] + list(
+        SponsorshipPeriod.objects.filter(
+            sponsor_id=instance.pk).values_list('project', flat=True)))
+
+
+@receiver(post_save, sender=SponsorshipLevel)
+@receiver(post_delete, sender=SponsorshipLevel)
+def sponsorship_level_changed(sender, instance, **kwargs):
+    # Versions group their sponsors by level, with its name and logo.
+    _invalidate_projects([instance.project_id] + list(
+        SponsorshipPeriod.objects.filter(
+            sponsorship_level_id=instance.pk).values_list(
+            'project', flat=True)))
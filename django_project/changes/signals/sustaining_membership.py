@@ -0,0 +1,23 @@
+# coding=utf-8
+"""Signals invalidating the cached sustaining membership of users."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch.dispatcher import receiver
+
+from changes.models import Sponsor, SponsorshipPeriod
+from changes.sustaining_membership import invalidate_sustaining_membership
+
+
+@receiver(post_save, sender=Sponsor)
+@receiver(post_delete, sender=Sponsor)
+def sponsor_changed(sender, instance, **kwargs):
+    invalidate_sustaining_membership([instance.author_id])
+
+
+@receiver(post_save, sender=SponsorshipPeriod)
+@receiver(post_delete, sender=SponsorshipPeriod)
+def sponsorship_period_changed(sender, instance, **kwargs):
+    user_ids = [instance.author_id]
+    user_ids.extend(Sponsor.objects.filter(
+        pk=instance.sponsor_id).values_list('author_id', flat=True))
+    invalidate_sustaining_membership(user_ids)
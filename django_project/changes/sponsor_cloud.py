@@ -0,0 +1,207 @@
+# coding=utf-8
+"""Rendering of the sustaining member cloud of a project.
+
+The cloud is a PNG of the logos of the current sponsors, largest sponsorship
+levels first. Its fingerprint is a digest of the logos and levels of the
+current sponsorship periods, read with one query. The rendered cloud is kept
+under MEDIA_ROOT named by its fingerprint, so it is composed again only when
+the set of current sponsors changes, e.g. when a period starts or ends.
+
+Logos are scaled once to the size of their tile. Tiles are kept under
+MEDIA_ROOT named by a digest of the logo file name, which the default file
+storage derives from the content of the logo, and the tile size.
+"""
+
+import collections
+import datetime
+import glob
+import hashlib
+import logging
+import os
+import tempfile
+
+from PIL import Image
+from django.conf import settings
+
+from changes.models import SponsorshipPeriod
+
+logger = logging.getLogger(__name__)
+
+SPONSOR_CLOUD_FOLDER = 'images/sponsors/cloud'
+
+SPONSOR_TILE_FOLDER = 'images/sponsors/tiles'
+
+# Part of the fingerprints, change it when the layout changes.
+LAYOUT_VERSION = '1'
+
+SponsorCloud = collections.namedtuple(
+    'SponsorCloud', ['path', 'fingerprint', 'last_modified'])
+
+
+def current_sponsor_logos(project):
+    """Return the logos and levels of the current sponsors of a project.
+
+    :param project: The project.
+    :type project: base.models.Project
+
+    :returns: (logo file name, sponsorship level name) tuples, largest
+        sponsorship levels first.
+    :rtype: list
+    """
+
+    today = datetime.date.today()
+    return list(SponsorshipPeriod.objects.filter(
+        project=project,
+        start_date__lte=today,
+        end_date__gte=today,
+    ).order_by('-sponsorship_level__value', 'pk').values_list(
+        'sponsor__logo', 'sponsorship_level__name'))
+
+
+def cloud_fingerprint(logos):
+    """Return the fingerprint of a cloud, None when it has no logo."""
+
+    if not logos:
+        return None
+    digest = hashlib.sha1(LAYOUT_VERSION.encode('utf-8'))
+    for logo, level in logos:
+        digest.update('\0{}\0{}'.format(logo, level).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _cloud_folder(project):
+    return os.path.join(
+        settings.MEDIA_ROOT, SPONSOR_CLOUD_FOLDER, str(project.pk))
+
+
+def _save_image(image, pathname):
+    """Atomically save an image as a PNG file."""
+
+    folder = os.path.dirname(pathname)
+    os.makedirs(folder, exist_ok=True)
+    file_descriptor, temp_pathname = tempfile.mkstemp(
+        dir=folder, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as image_file:
+            image.save(image_file, 'PNG')
+        os.replace(temp_pathname, pathname)
+    except Exception:
+        os.remove(temp_pathname)
+        raise
+
+
+def logo_tile(logo, size):
+    """Return a logo scaled to fit a square tile, None when it is missing.
+
+    :param logo: File name of the logo.
+    :type logo: str
+
+    :param size: Width and height of the tile.
+    :type size: int
+
+    :rtype: PIL.Image.Image
+    """
+
+    name = '{}-{}.png'.format(
+        hashlib.sha1(logo.encode('utf-8')).hexdigest(), size)
+    pathname = os.path.join(settings.MEDIA_ROOT, SPONSOR_TILE_FOLDER, name)
+    try:
+        return Image.open(pathname)
+    except OSError:
+        pass
+    try:
+        tile = Image.open(
+            os.path.join(settings.MEDIA_ROOT, logo)).convert('RGBA')
+    except OSError:
+        logger.warning('Could not open the sponsor logo %s', logo)
+        return None
+    tile.thumbnail((size, size), Image.ANTIALIAS)
+    _save_image(tile, pathname)
+    return tile
+
+
+def compose_cloud(logos):
+    """Compose the cloud of some logos.
+
+    Logos are laid out in rows of at most 1000 pixels, every sponsorship
+    level is laid out in tiles 25 pixels smaller than the previous one,
+    down to 25 pixels.
+
+    :param logos: (logo file name, sponsorship level name) tuples, see
+        current_sponsor_logos.
+    :type logos: list
+
+    :returns: The cloud, None when no logo could be opened.
+    :rtype: PIL.Image.Image
+    """
+
+    background = Image.new('RGB', (1200, 1000), 'white')
+    max_x = 0
+    max_y = 0
+    y = 0
+    x = 0
+    sponsor_level = ''
+    xy_size = 100
+    for logo, level in logos:
+        if level != sponsor_level:
+            if sponsor_level != '':
+                xy_size -= 25
+                y += 25
+                if xy_size < 25:
+                    xy_size = 25
+                    y -= 25
+            sponsor_level = level
+
+        tile = logo_tile(logo, xy_size)
+        if tile is None:
+            continue
+        width, height = tile.size
+        if (x + xy_size) >= 1000:
+            x = 0
+            y += xy_size
+        if max_x <= (x + xy_size):
+            max_x = x + xy_size
+        if max_y <= y:
+            max_y = y + xy_size
+        background.paste(
+            tile, box=(x, y + int((xy_size - height) / 2)), mask=tile)
+        x += xy_size
+
+    if max_x == 0:
+        return None
+    return background.crop((0, 0, max_x, max_y))
+
+
+def sponsor_cloud(project):
+    """Return the cloud of the current sponsors of a project.
+
+    The cloud is composed when the current sponsors changed since it was
+    last rendered, the clouds of the previous sponsors are removed.
+
+    :param project: The project.
+    :type project: base.models.Project
+
+    :returns: The rendered cloud, None when there is no current sponsor.
+    :rtype: SponsorCloud
+    """
+
+    logos = current_sponsor_logos(project)
+    fingerprint = cloud_fingerprint(logos)
+    if fingerprint is None:
+        return None
+    folder = _cloud_folder(project)
+    pathname = os.path.join(folder, '{}.png'.format(fingerprint))
+    if not os.path.exists(pathname):
+        cloud = compose_cloud(logos)
+        if cloud is None:
+            return None
+        _save_image(cloud, pathname)
+        for previous in glob.glob(os.path.join(folder, '*.png')):
+            if previous != pathname:
+                try:
+                    os.remove(previous)
+                except OSError:
+                    pass
+    last_modified = datetime.datetime.fromtimestamp(
+        os.path.getmtime(pathname), tz=datetime.timezone.utc)
+    return SponsorCloud(pathname, fingerprint, last_modified)
@@ -0,0 +1,58 @@
+# coding=utf-8
+"""Cached sustaining membership status of the users.
+
+Whether a user is a sustaining member of a project is needed by every page
+rendered for a logged in user. The status of each user is kept in the
+Django cache by project for SUSTAINING_MEMBER_CACHE_TIMEOUT seconds and
+dropped by the signals in changes.signals.sustaining_membership when the
+sponsors or sponsorship periods of the user change.
+
+The signals drop the status from the default cache, which has to be shared
+by every process for the other processes to see the change (see CACHES in
+core.settings.prod).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from changes.models import active_sustaining_membership
+
+
+def _user_key(user_id):
+    return 'sustaining-member:{}'.format(user_id)
+
+
+def is_sustaining_member(user, project):
+    """Whether a user has an active sustaining membership of a project.
+
+    :param user: The user.
+    :type user: django.contrib.auth.models.User
+
+    :param project: The project, None for memberships without a project.
+    :type project: base.models.Project
+
+    :rtype: bool
+    """
+
+    if user.is_anonymous:
+        return False
+    key = _user_key(user.pk)
+    project_id = project.pk if project is not None else None
+    memberships = cache.get(key) or {}
+    if project_id not in memberships:
+        memberships[project_id] = active_sustaining_membership(
+            user, project).exists()
+        cache.set(
+            key, memberships,
+            getattr(settings, 'SUSTAINING_MEMBER_CACHE_TIMEOUT', 5 * 60))
+    return memberships[project_id]
+
+
+def invalidate_sustaining_membership(user_ids):
+    """Drop the cached sustaining membership status of some users.
+
+    :param user_ids: Primary keys of the users.
+    :type user_ids: iterable
+    """
+
+    cache.delete_many([_user_key(user_id) for user_id in set(user_ids)])
@@ -0,0 +1,142 @@
+# coding=utf-8
+"""Tests for the rendered changelog cache."""
+
+import logging
+import shutil
+import tempfile
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.client import Client
+from django.urls import reverse
+from base.tests.model_factories import ProjectF
+from changes.changelog_cache import (
+    get_changelog,
+    invalidate_changelogs,
+    set_changelog,
+)
+from changes.models import Entry, Version
+from changes.tests.model_factories import (
+    CategoryF,
+    EntryF,
+    SponsorF,
+    SponsorshipLevelF,
+    SponsorshipPeriodF,
+    VersionF,
+)
+
+
+@override_settings(
+    VALID_DOMAIN=['testserver', ],
+    CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestChangelogCache(TestCase):
+    """Tests that version pages are served from the changelog cache."""
+
+    def setUp(self):
+        """Set up before each test."""
+        logging.disable(logging.CRITICAL)
+        self.media_root = tempfile.mkdtemp()
+        self.client = Client()
+        self.project = ProjectF.create(name='testproject')
+        self.version = VersionF.create(project=self.project, name='1.0.1')
+        self.category = CategoryF.create(project=self.project)
+        self.entry = EntryF.create(
+            version=self.version, category=self.category,
+            title='Original title')
+        self.url = reverse('version-download-gnu', kwargs={
+            'project_slug': self.project.slug,
+            'slug': self.version.slug
+        })
+
+    def tearDown(self):
+        """Tear down after each test."""
+        cache.clear()
+        shutil.rmtree(self.media_root)
+
+    def test_cached_until_entry_saved(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = self.client.get(self.url)
+            self.assertContains(response, 'Original title')
+
+            # Updates bypassing the signals are not seen.
+            Entry.objects.filter(pk=self.entry.pk).update(title='Hidden')
+            response = self.client.get(self.url)
+            self.assertContains(response, 'Original title')
+            self.assertEqual(
+                response['Content-Type'], 'text/plain; charset=utf-8')
+
+            self.entry.title = 'New title'
+            self.entry.save()
+            response = self.client.get(self.url)
+            self.assertContains(response, 'New title')
+
+    def test_locked_version_survives_cache_flush(self):
+        self.version.locked = True
+        self.version.save()
+        with override_settings(MEDIA_ROOT=self.media_root):
+            self.client.get(self.url)
+            cache.clear()
+            Entry.objects.filter(pk=self.entry.pk).update(title='Hidden')
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Original title')
+
+    def test_sponsor_changes_invalidate_the_project_versions(self):
+        sponsor = SponsorF.create(project=self.project)
+        level = SponsorshipLevelF.create(project=self.project)
+        SponsorshipPeriodF.create(
+            project=self.project, sponsor=sponsor, sponsorship_level=level)
+        self.version.refresh_from_db()
+        for instance in (sponsor, level):
+            generation = self.version.changelog_generation
+            instance.name = 'Renamed'
+            instance.save()
+            self.version.refresh_from_db()
+            self.assertNotEqual(
+                self.version.changelog_generation, generation)
+
+    def test_cached_page_has_project_navigation(self):
+        url = reverse('version-detail', kwargs={
+            'project_slug': self.project.slug,
+            'slug': self.version.slug
+        })
+        versions_url = reverse('version-list', kwargs={
+            'project_slug': self.project.slug})
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = self.client.get(url)
+            self.assertContains(response, versions_url)
+
+            Entry.objects.filter(pk=self.entry.pk).update(title='Hidden')
+            response = self.client.get(url)
+        # Served from the cache, with the navigation of the first render.
+        self.assertContains(response, 'Original title')
+        self.assertContains(response, versions_url)
+
+    def test_generation_is_shared_by_processes(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            self.client.get(self.url)
+            generation = Version.objects.get(
+                pk=self.version.pk).changelog_generation
+
+            # Invalidated by another process, this process still has the
+            # previous render in its own cache.
+            invalidate_changelogs([self.version.pk])
+            Entry.objects.filter(pk=self.entry.pk).update(title='New title')
+            response = self.client.get(self.url)
+        self.assertContains(response, 'New title')
+        self.assertNotEqual(
+            Version.objects.get(pk=self.version.pk).changelog_generation,
+            generation)
+
+    def test_stale_render_is_not_pinned(self):
+        self.version.locked = True
+        self.version.save()
+        with override_settings(MEDIA_ROOT=self.media_root):
+            self.client.get(self.url)
+            stale_version = Version.objects.get(pk=self.version.pk)
+            invalidate_changelogs([self.version.pk])
+            # A request which read the version before the invalidation
+            # finishes its render after it.
+            set_changelog(stale_version, 'gnu', 'variant', b'Stale')
+            stale_version.refresh_from_db()
+            self.assertIsNone(
+                get_changelog(stale_version, 'gnu', 'variant'))
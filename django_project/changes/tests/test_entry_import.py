@@ -0,0 +1,94 @@
+# coding=utf-8
+"""Tests for the bulk import of changelog entries."""
+
+import logging
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from base.tests.model_factories import ProjectF
+from changes.entry_import import import_entries
+from changes.models import Entry
+from changes.tests.model_factories import CategoryF, EntryF, VersionF
+from core.model_factories import UserF
+
+
+class TestImportEntries(TestCase):
+    """Tests the bulk creation of imported entries."""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.user = UserF.create()
+        self.project = ProjectF.create()
+        self.version = VersionF.create(project=self.project)
+        self.category = CategoryF.create(project=self.project)
+
+    def _entries(self, count, start=0):
+        return [Entry(
+            title='Imported feature {}'.format(number),
+            description='Description {}'.format(number),
+            author=self.user,
+            github_PR_url='https://github.com/test/repo/pull/{}'.format(
+                number),
+        ) for number in range(start, start + count)]
+
+    def test_new_entries_are_created(self):
+        EntryF.create(
+            version=self.version, category=self.category,
+            sequence_number=4)
+
+        created = import_entries(
+            self.version, self.category, self._entries(3))
+
+        self.assertEqual(len(created), 3)
+        entries = Entry.objects.filter(
+            github_PR_url__isnull=False).order_by('sequence_number')
+        self.assertEqual(
+            [entry.sequence_number for entry in entries], [5, 6, 7])
+        self.assertEqual(entries[0].slug, 'imported-feature-0')
+        self.assertEqual(entries[0].version, self.version)
+        self.assertEqual(entries[0].category, self.category)
+
+    def test_existing_entries_are_skipped(self):
+        other_version = VersionF.create()
+        EntryF.create(
+            version=other_version,
+            github_PR_url='https://github.com/test/repo/pull/0')
+        EntryF.create(
+            version=self.version, category=self.category,
+            title='Imported feature 1')
+        entries = self._entries(3)
+        # The same pull request listed twice.
+        entries.append(self._entries(1, start=2)[0])
+
+        created = import_entries(self.version, self.category, entries)
+
+        self.assertEqual(
+            [entry.title for entry in created], ['Imported feature 2'])
+        self.assertEqual(Entry.objects.filter(
+            github_PR_url='https://github.com/test/repo/pull/2').count(), 1)
+
+    def test_slugs_are_unique_in_the_version(self):
+        other_category = CategoryF.create(project=self.project)
+        EntryF.create(
+            version=self.version, category=other_category,
+            title='Imported feature 0')
+
+        created = import_entries(
+            self.version, self.category, self._entries(1))
+
+        self.assertEqual(created[0].slug, 'imported-feature-0-2')
+
+    def test_constant_number_of_queries(self):
+        with CaptureQueriesContext(connection) as small_import:
+            import_entries(self.version, self.category, self._entries(5))
+
+        other_category = CategoryF.create(project=self.project)
+        with CaptureQueriesContext(connection) as large_import:
+            created = import_entries(
+                self.version, other_category,
+                self._entries(300, start=1000))
+
+        self.assertEqual(len(created), 300)
+        self.assertEqual(
+            len(small_import.captured_queries),
+            len(large_import.captured_queries))
@@ -0,0 +1,179 @@
+# coding=utf-8
+"""Tests for the GitHub client, against a local fake GitHub server."""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase, override_settings
+
+from base.tests.model_factories import ProjectF
+from changes.models import Entry, GithubProfile
+from changes.tests.model_factories import CategoryF, VersionF
+from changes.utils.github_client import GithubClient, GithubError
+from changes.entry_import import create_entry_from_github_pr
+from core.model_factories import UserF
+
+PAGES = 3
+PER_PAGE = 2
+
+
+class FakeGithubHandler(BaseHTTPRequestHandler):
+    """Serves a paginated PR search and user profiles with ETags."""
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        server.requests.append(
+            (url.path, self.headers.get('If-None-Match')))
+        if url.path == '/search/issues':
+            if server.search_fails:
+                self.send_response(403)
+                self.end_headers()
+                return
+            page = int(parse_qs(url.query).get('page', ['1'])[0])
+            items = [{
+                'title': 'PR {}'.format(number),
+                'body': 'Change {}'.format(number),
+                'html_url': 'https://github.com/test/repo/pull/{}'.format(
+                    number),
+                'user': {
+                    'login': 'bob' if number == 1 else 'alice',
+                    'url': '{}/users/{}'.format(
+                        server.url, 'bob' if number == 1 else 'alice'),
+                },
+            } for number in range(
+                (page - 1) * PER_PAGE + 1, page * PER_PAGE + 1)]
+            link = '{}/search/issues?q=is:pr&per_page={}&page={{}}'.format(
+                server.url, PER_PAGE)
+            links = []
+            if page < PAGES:
+                links.append('<{}>; rel="next"'.format(link.format(page + 1)))
+            links.append('<{}>; rel="last"'.format(link.format(PAGES)))
+            self._send_json(
+                {'total_count': PAGES * PER_PAGE, 'items': items},
+                {'Link': ', '.join(links)})
+        elif url.path.startswith('/users/'):
+            login = url.path.rsplit('/', 1)[-1]
+            etag = '"{}-{}"'.format(login, server.profile_version)
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self._send_json({
+                'login': login,
+                'name': '{} {}'.format(
+                    login.title(), server.profile_version),
+                'html_url': 'https://github.com/{}'.format(login),
+            }, {'ETag': etag})
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+
+class TestGithubClient(TestCase):
+    """Tests the import of pull requests through the GitHub client."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestGithubClient, cls).setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGithubHandler)
+        cls.server.url = 'http://127.0.0.1:{}'.format(cls.server.server_port)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super(TestGithubClient, cls).tearDownClass()
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.server.requests = []
+        self.server.profile_version = 1
+        self.server.search_fails = False
+        self.client = GithubClient(
+            'token', api_url=self.server.url, max_workers=4)
+        self.project = ProjectF.create()
+        self.category = CategoryF.create(project=self.project)
+        self.version = VersionF.create(project=self.project)
+        self.user = UserF.create()
+
+    def tearDown(self):
+        self.client.close()
+
+    def _requests(self, path):
+        return [
+            request for request in self.server.requests
+            if request[0] == path]
+
+    def test_search_pull_requests_fetches_every_page(self):
+        items = self.client.search_pull_requests('test/repo', 'label:x')
+
+        self.assertEqual(
+            [item['title'] for item in items],
+            ['PR {}'.format(number)
+             for number in range(1, PAGES * PER_PAGE + 1)])
+        self.assertEqual(len(self._requests('/search/issues')), PAGES)
+
+    def test_search_pull_requests_failure(self):
+        self.server.search_fails = True
+        with self.assertRaises(GithubError):
+            self.client.search_pull_requests('test/repo')
+
+    def test_profiles_are_fetched_once_per_author(self):
+        items = self.client.search_pull_requests('test/repo')
+
+        create_entry_from_github_pr(
+            self.version, self.category, items, self.user, self.client)
+
+        self.assertEqual(len(self._requests('/users/alice')), 1)
+        self.assertEqual(len(self._requests('/users/bob')), 1)
+        entries = Entry.objects.filter(version=self.version)
+        self.assertEqual(entries.count(), PAGES * PER_PAGE)
+        entry = entries.get(title='PR 1')
+        self.assertEqual(entry.developed_by, 'Bob 1')
+        self.assertEqual(entry.developer_url, 'https://github.com/bob')
+
+    def test_profiles_are_cached(self):
+        self.client.user_profiles(['alice'])
+        self.server.requests = []
+
+        profiles = self.client.user_profiles(['alice'])
+
+        self.assertEqual(self.server.requests, [])
+        self.assertEqual(profiles['alice'].name, 'Alice 1')
+
+    def test_stale_profiles_are_revalidated(self):
+        self.client.user_profiles(['alice'])
+        self.server.requests = []
+
+        with override_settings(GITHUB_PROFILE_MAX_AGE=0):
+            profiles = self.client.user_profiles(['alice'])
+            self.assertEqual(
+                self.server.requests, [('/users/alice', '"alice-1"')])
+            self.assertEqual(profiles['alice'].name, 'Alice 1')
+
+            self.server.profile_version = 2
+            profiles = self.client.user_profiles(['alice'])
+        self.assertEqual(profiles['alice'].name, 'Alice 2')
+        self.assertEqual(
+            GithubProfile.objects.get(login='alice').etag, '"alice-2"')
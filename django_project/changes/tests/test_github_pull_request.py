@@ -1,8 +1,11 @@
 """ Tests about the GitHub harvesting. """
 
+import hashlib
+import os
+import shutil
+import tempfile
 import unittest
 import logging
-import re
 
 from unittest import mock
 
@@ -10,6 +13,8 @@ from django.test import TestCase, override_settings
 from django.test.client import Client
 from django.urls import reverse
 
+from base.jobs import autodiscover_jobs, run_pending_jobs
+from base.models import BackgroundJob
 from base.tests.model_factories import ProjectF
 from changes.utils.github_pull_request import parse_funded_by
 from changes.tests.model_factories import (
@@ -18,7 +23,7 @@ from changes.tests.model_factories import (
     VersionF)
 from core.model_factories import UserF
 
-from changes.views import create_entry_from_github_pr
+from changes.entry_import import create_entry_from_github_pr
 from changes.models import Entry
 
 
@@ -27,6 +32,7 @@ def mocked_request_get_github(*args, **kwargs):
         def __init__(self, json_data, status_code):
             self.json_data = json_data
             self.status_code = status_code
+            self.headers = {}
 
         def json(self):
             return self.json_data
@@ -182,7 +188,8 @@ class TestGithubPullRequest(unittest.TestCase):
         self.assertEqual('', url)
 
     @override_settings(VALID_DOMAIN=['testserver', ])
-    @mock.patch('requests.get', side_effect=mocked_request_get_github)
+    @mock.patch('requests.Session.get',
+                side_effect=mocked_request_get_github)
     def test_create_entry_from_github_pr_timeout(self, mock_request):
         RESULT_RESPONSE_GITHUB = [
             {
@@ -214,6 +221,31 @@ class TestGithubPullRequest(unittest.TestCase):
             self.entry_created[0].developer_url, 'https://github.com/qgis')
 
 
+FIRST_IMAGE = (
+    'https://user-images.githubusercontent.com/40058076/'
+    '106831433-dea95b80-66ca-11eb-8026-6823084d726e.png')
+SECOND_IMAGE = (
+    'https://user-images.githubusercontent.com/40058076/'
+    '106831321-a99d0900-66ca-11eb-8764-11627dcfbf17.png')
+# Another URL of the same screenshot.
+SECOND_IMAGE_COPY = 'https://example.com/copy-of-the-screenshot.png'
+# An image which is not found.
+MISSING_IMAGE = 'https://example.com/missing.png'
+
+
+def mocked_session_get_image(url, **kwargs):
+    class MockResponse:
+        def __init__(self, content, status_code):
+            self.content = content
+            self.status_code = status_code
+
+    if url == FIRST_IMAGE:
+        return MockResponse(b'first image', 200)
+    if url in (SECOND_IMAGE, SECOND_IMAGE_COPY):
+        return MockResponse(b'second image', 200)
+    return MockResponse(b'', 404)
+
+
 class TestGithubDownloadImage(TestCase):
     """Tests that Category views work."""
 
@@ -227,6 +259,7 @@ class TestGithubDownloadImage(TestCase):
         self.client.post(
             '/set_language/', data={'language': 'en'})
         logging.disable(logging.CRITICAL)
+        self.media_root = tempfile.mkdtemp()
         self.project = ProjectF.create(
             name='testproject')
         self.version = VersionF.create(
@@ -259,54 +292,111 @@ class TestGithubDownloadImage(TestCase):
         self.category.delete()
         self.user.delete()
         self.entry.delete()
+        shutil.rmtree(self.media_root, ignore_errors=True)
 
-    @override_settings(VALID_DOMAIN=['testserver', ])
-    def test_download_all_referenced_images(self):
+    def _download_images(self):
+        self.client.login(username='timlinux', password='password')
+        with override_settings(
+                VALID_DOMAIN=['testserver', ], MEDIA_ROOT=self.media_root):
+            response = self.client.get(
+                reverse('download-referenced-images', kwargs={
+                    'slug': self.version.slug,
+                    'project_slug': self.project.slug
+                }),
+                content_type='application/json',
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            )
+            self.assertEqual(response.status_code, 200)
+            job = BackgroundJob.objects.get(pk=response.json()['job'])
+            self.assertEqual(
+                response.json()['status_url'],
+                reverse('background-job-status', kwargs={'pk': job.pk}))
+            autodiscover_jobs()
+            run_pending_jobs()
+        job.refresh_from_db()
+        return job
+
+    @mock.patch('requests.Session.get', side_effect=mocked_session_get_image)
+    def test_download_all_referenced_images(self, mock_get):
         self.entry.description = (
-            '![image](https://user-images.githubusercontent.com/40058076/'
-            '106831433-dea95b80-66ca-11eb-8026-6823084d726e.png)'
-            ' this should be in description '
-            '![image](https://user-images.githubusercontent.com/40058076/'
-            '106831321-a99d0900-66ca-11eb-8764-11627dcfbf17.png)'
+            '![image]({}) this should be in description '
+            '![image]({})'.format(FIRST_IMAGE, SECOND_IMAGE)
         )
         self.entry.image_file = None
         self.entry.save()
         # Ensure the image_file is None
         self.assertFalse(self.entry.image_file)
-        self.client.login(username='timlinux', password='password')
-        response = self.client.get(
-            reverse('download-referenced-images', kwargs={
-                'slug': self.version.slug,
-                'project_slug': self.project.slug
-            }),
-            content_type='application/json',
-            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
-        )
 
-        entry = self.Entry.objects.last()
-        self.assertEqual(response.status_code, 200)
-        self.assertJSONEqual(
-            str(response.content, encoding='utf8'),
-            {'status': 'success'}
-        )
+        job = self._download_images()
+
+        self.assertEqual(job.status, BackgroundJob.DONE)
+        entry = self.Entry.objects.get(pk=self.entry.pk)
         self.assertTrue(entry.image_file)
 
         #  check if image removed from description
-        rgx = ('<img.*?https://user-images.githubusercontent.com/40058076/'
-               '106831433-dea95b80-66ca-11eb-8026-6823084d726e.png.*?/>')
-        is_match = re.match(rgx, entry.description)
-        self.assertIsNone(
-            is_match,
-            msg=f'image regex pattern {rgx} must be not in description '
-                f'{entry.description}'
-        )
+        self.assertNotIn(FIRST_IMAGE, entry.description)
 
-        # check if another image is in description
-        self.assertIn(
-            ('/media/images/entries/106831321-a99d0900-66ca-11eb-8764-'
-             '11627dcfbf17'),
-            entry.description
-        )
+        # check if another image is in description, named by its content
+        second_name = 'images/entries/{}.png'.format(
+            hashlib.sha1(b'second image').hexdigest())
+        self.assertNotIn(SECOND_IMAGE, entry.description)
+        self.assertIn('/media/' + second_name, entry.description)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.media_root, second_name)))
 
         # chek if text is in description
         self.assertIn('this should be in description', entry.description)
+
+    @mock.patch('requests.Session.get', side_effect=mocked_session_get_image)
+    def test_same_image_is_stored_once(self, mock_get):
+        self.entry.description = (
+            '![image]({}) ![image]({})'.format(FIRST_IMAGE, SECOND_IMAGE))
+        self.entry.save()
+        EntryF.create(
+            category=self.category,
+            version=self.version,
+            description='![image]({}) ![image]({})'.format(
+                FIRST_IMAGE, SECOND_IMAGE_COPY))
+
+        self._download_images()
+
+        self.assertEqual(
+            sorted(os.listdir(
+                os.path.join(self.media_root, 'images/entries'))),
+            sorted([
+                '{}.png'.format(hashlib.sha1(b'first image').hexdigest()),
+                '{}.png'.format(hashlib.sha1(b'second image').hexdigest()),
+            ]))
+        # A second run finds no remote image left.
+        mock_get.reset_mock()
+        self._download_images()
+        self.assertFalse(mock_get.called)
+
+    @mock.patch('requests.Session.get', side_effect=mocked_session_get_image)
+    def test_failed_images_are_retried(self, mock_get):
+        description = '![image]({}) ![image]({})'.format(
+            FIRST_IMAGE, MISSING_IMAGE)
+        self.entry.description = description
+        self.entry.image_file = None
+        self.entry.save()
+
+        self._download_images()
+
+        # The entry keeps its remote images until all of them are stored.
+        entry = self.Entry.objects.get(pk=self.entry.pk)
+        self.assertEqual(entry.description, description)
+        self.assertFalse(entry.image_file)
+
+        def get_image(url, **kwargs):
+            if url == MISSING_IMAGE:
+                return mocked_session_get_image(SECOND_IMAGE)
+            return mocked_session_get_image(url)
+
+        mock_get.side_effect = get_image
+        self._download_images()
+
+        entry = self.Entry.objects.get(pk=self.entry.pk)
+        self.assertTrue(entry.image_file)
+        self.assertNotIn(MISSING_IMAGE, entry.description)
+        self.assertIn(
+            hashlib.sha1(b'second image').hexdigest(), entry.description)
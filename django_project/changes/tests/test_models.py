@@ -151,6 +151,21 @@ class TestEntryCRUD(TestCase):
         for key, val in new_model_data.items():
             self.assertEqual(model.__dict__.get(key), val)
 
+    def test_Entry_description_html(self):
+        """
+        Tests the description of an Entry is stored as HTML
+        """
+        model = EntryF.create(description=u'Some *new* feature')
+        self.assertEqual(
+            model.description_html, '<p>Some <em>new</em> feature</p>')
+
+        model.description = u'Some **new** feature'
+        model.save(update_fields=['description'])
+        model.refresh_from_db()
+        self.assertEqual(
+            model.description_html,
+            '<p>Some <strong>new</strong> feature</p>')
+
     def test_Entry_delete(self):
         """
         Tests Entry model delete
@@ -211,6 +226,19 @@ class TestVersionCRUD(TestCase):
         for key, val in new_model_data.items():
             self.assertEqual(model.__dict__.get(key), val)
 
+    def test_Version_description_html(self):
+        """
+        Tests the description of a Version is only rendered when it changed
+        """
+        model = VersionF.create(description=u'A *minor* release')
+        self.assertEqual(
+            model.description_html, '<p>A <em>minor</em> release</p>')
+        self.assertFalse(model.update_description_html())
+
+        model.description = None
+        self.assertTrue(model.update_description_html())
+        self.assertEqual(model.description_html, '')
+
     def test_formatted_release_date(self):
         """Tests we can get, set and present the release date nicely."""
         model = VersionF.create(
@@ -231,6 +259,43 @@ class TestVersionCRUD(TestCase):
         self.assertTrue(model.pk is None)
 
 
+class TestVersionCategories(TestCase):
+    """
+    Tests the entries of a version grouped by category.
+    """
+
+    def test_Version_categories(self):
+        """
+        Tests the entries are grouped by category in one query
+        """
+        version = VersionF.create()
+        first = CategoryF.create(project=version.project, sort_number=1)
+        second = CategoryF.create(project=version.project, sort_number=2)
+        entries = [
+            EntryF.create(
+                version=version, category=second, sequence_number=1),
+            EntryF.create(
+                version=version, category=first, sequence_number=2),
+            EntryF.create(
+                version=version, category=first, sequence_number=1),
+        ]
+
+        with self.assertNumQueries(1):
+            categories = version.categories()
+            for row in categories:
+                for entry in row['entries']:
+                    self.assertFalse(entry.version.locked)
+        self.assertEqual(
+            [row['category'] for row in categories], [first, second])
+        self.assertEqual(
+            [row['entries'] for row in categories],
+            [[entries[2], entries[1]], [entries[0]]])
+
+        # The grouped entries are reused for this version.
+        with self.assertNumQueries(0):
+            version.categories()
+
+
 class TestVersionSponsors(TestCase):
     """
     Tests that we can filter sponsors for a version.
@@ -0,0 +1,34 @@
+# coding=utf-8
+"""Tests for the normalise_padded_versions command."""
+
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+
+from changes.models import Version
+from changes.tests.model_factories import VersionF
+
+
+class NormalisePaddedVersionsTest(TestCase):
+    """Tests that unsortable padded versions are recomputed."""
+
+    def setUp(self):
+        """Set up before each test."""
+        self.version = VersionF.create(name='2.10.1')
+        Version.objects.filter(pk=self.version.pk).update(
+            padded_version='2.10.1')
+
+    def test_command_output(self):
+        """Tests the updated versions are listed and saved."""
+        out = StringIO()
+        call_command('normalise_padded_versions', stdout=out)
+        self.assertIn('2.10.1 -> 002010001', out.getvalue())
+        self.version.refresh_from_db()
+        self.assertEqual(self.version.padded_version, '002010001')
+
+    def test_command_dry_run(self):
+        """Tests a dry run does not save the versions."""
+        call_command('normalise_padded_versions', dry_run=True,
+                     stdout=StringIO())
+        self.version.refresh_from_db()
+        self.assertEqual(self.version.padded_version, '2.10.1')
@@ -0,0 +1,46 @@
+# coding=utf-8
+"""Tests for the render_descriptions command."""
+
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+
+from changes.models import Entry, Version
+from changes.tests.model_factories import EntryF
+
+
+class RenderDescriptionsTest(TestCase):
+    """Tests that the HTML of the descriptions is stored."""
+
+    def setUp(self):
+        """Set up before each test."""
+        self.entry = EntryF.create(description='A *new* feature')
+        self.version = self.entry.version
+        # Rows added before the HTML was stored, or updated in bulk.
+        Entry.objects.filter(pk=self.entry.pk).update(
+            description_html='', description_digest='')
+        Version.objects.filter(pk=self.version.pk).update(
+            description='A *minor* release')
+
+    def test_command_output(self):
+        """Tests the stale descriptions are rendered and counted."""
+        out = StringIO()
+        call_command('render_descriptions', stdout=out)
+        self.assertIn('Rendered 1 version descriptions.', out.getvalue())
+        self.assertIn('Rendered 1 entry descriptions.', out.getvalue())
+        self.entry.refresh_from_db()
+        self.assertEqual(
+            self.entry.description_html, '<p>A <em>new</em> feature</p>')
+        self.version.refresh_from_db()
+        self.assertEqual(
+            self.version.description_html, '<p>A <em>minor</em> release</p>')
+
+    def test_up_to_date_descriptions_are_skipped(self):
+        """Tests only force renders the up to date descriptions again."""
+        call_command('render_descriptions', stdout=StringIO())
+        out = StringIO()
+        call_command('render_descriptions', stdout=out)
+        self.assertIn('Rendered 0 entry descriptions.', out.getvalue())
+        out = StringIO()
+        call_command('render_descriptions', force=True, stdout=out)
+        self.assertIn('Rendered 1 entry descriptions.', out.getvalue())
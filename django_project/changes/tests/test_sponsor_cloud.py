@@ -0,0 +1,112 @@
+# coding=utf-8
+"""Tests for the rendering of the sponsor cloud."""
+
+import datetime
+import logging
+import os
+import shutil
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.test.client import Client
+from django.urls import reverse
+
+from base.tests.model_factories import ProjectF
+from changes.sponsor_cloud import (
+    SPONSOR_CLOUD_FOLDER,
+    SPONSOR_TILE_FOLDER,
+    compose_cloud,
+    sponsor_cloud)
+from changes.tests.model_factories import (
+    SponsorF,
+    SponsorshipLevelF,
+    SponsorshipPeriodF)
+
+
+class TestSponsorCloud(TestCase):
+    """Tests the cached sponsor cloud."""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.client = Client()
+        self.project = ProjectF.create()
+        gold = SponsorshipLevelF.create(project=self.project, value=1000)
+        silver = SponsorshipLevelF.create(project=self.project, value=100)
+        today = datetime.date.today()
+        self.periods = [SponsorshipPeriodF.create(
+            project=self.project,
+            sponsor=SponsorF.create(project=self.project),
+            sponsorship_level=level,
+            start_date=today - datetime.timedelta(days=10),
+            end_date=today + datetime.timedelta(days=10),
+        ) for level in (gold, silver, silver)]
+        # A previous sponsor.
+        SponsorshipPeriodF.create(
+            project=self.project,
+            sponsor=SponsorF.create(project=self.project),
+            sponsorship_level=gold,
+            start_date=today - datetime.timedelta(days=30),
+            end_date=today - datetime.timedelta(days=20))
+
+    def tearDown(self):
+        for folder in (SPONSOR_CLOUD_FOLDER, SPONSOR_TILE_FOLDER):
+            shutil.rmtree(
+                os.path.join(settings.MEDIA_ROOT, folder),
+                ignore_errors=True)
+
+    def test_cloud_is_composed_once(self):
+        cloud = sponsor_cloud(self.project)
+        self.assertTrue(os.path.exists(cloud.path))
+
+        with mock.patch(
+                'changes.sponsor_cloud.compose_cloud',
+                wraps=compose_cloud) as compose:
+            self.assertEqual(sponsor_cloud(self.project), cloud)
+        self.assertFalse(compose.called)
+
+    def test_cloud_follows_the_current_sponsors(self):
+        cloud = sponsor_cloud(self.project)
+
+        self.periods[1].end_date = (
+            datetime.date.today() - datetime.timedelta(days=1))
+        self.periods[1].save()
+        new_cloud = sponsor_cloud(self.project)
+
+        self.assertNotEqual(new_cloud.fingerprint, cloud.fingerprint)
+        self.assertTrue(os.path.exists(new_cloud.path))
+        self.assertFalse(os.path.exists(cloud.path))
+
+    def test_no_current_sponsor(self):
+        project = ProjectF.create()
+
+        self.assertIsNone(sponsor_cloud(project))
+
+    @override_settings(VALID_DOMAIN=['testserver', ])
+    def test_image_is_revalidated(self):
+        url = reverse(
+            'sponsor-cloud-image',
+            kwargs={'project_slug': self.project.slug})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(reverse(
+            'sponsor-cloud-image',
+            kwargs={'project_slug': ProjectF.create().slug}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(VALID_DOMAIN=['testserver', ])
+    def test_cloud_page(self):
+        response = self.client.get(reverse(
+            'sponsor-cloud', kwargs={'project_slug': self.project.slug}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['image'], reverse(
+            'sponsor-cloud-image',
+            kwargs={'project_slug': self.project.slug}))
@@ -0,0 +1,61 @@
+# coding=utf-8
+"""Tests for the cached sustaining membership status."""
+
+import logging
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory, override_settings
+from base.tests.model_factories import ProjectF
+from changes.tests.model_factories import SponsorF
+from core.context_processors import sustaining_member_context
+from core.model_factories import UserF
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestSustainingMembership(TestCase):
+    """Tests the sustaining member flag of the context."""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        cache.clear()
+        self.factory = RequestFactory()
+        self.user = UserF.create()
+        self.project = ProjectF.create()
+
+    def tearDown(self):
+        cache.clear()
+
+    def _context(self):
+        request = self.factory.get('/')
+        request.user = self.user
+        request.the_project = self.project
+        return request, sustaining_member_context(request)
+
+    def test_flag_is_memoised(self):
+        SponsorF.create(
+            author=self.user, project=self.project,
+            sustaining_membership=True, active=True)
+        with self.assertNumQueries(1):
+            request, context = self._context()
+            self.assertTrue(context['is_sustaining_member'])
+            # Another template rendered for the same request.
+            self.assertEqual(sustaining_member_context(request), context)
+
+        with self.assertNumQueries(0):
+            request, context = self._context()
+        self.assertTrue(context['is_sustaining_member'])
+
+    def test_flag_is_invalidated(self):
+        request, context = self._context()
+        self.assertFalse(context['is_sustaining_member'])
+
+        sponsor = SponsorF.create(
+            author=self.user, project=self.project,
+            sustaining_membership=True, active=True)
+        request, context = self._context()
+        self.assertTrue(context['is_sustaining_member'])
+
+        sponsor.active = False
+        sponsor.save()
+        request, context = self._context()
+        self.assertFalse(context['is_sustaining_member'])
@@ -3,13 +3,22 @@
 
 import datetime
 import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO
 from datetime import timedelta
 from mock import mock
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.http import HttpResponse
+from django.db import connection
 from django.test import TestCase, override_settings
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from base.jobs import autodiscover_jobs, run_pending_jobs
+from base.models import BackgroundJob
 from base.tests.model_factories import ProjectF
 from changes.tests.model_factories import (
     CategoryF,
@@ -18,6 +27,7 @@ from changes.tests.model_factories import (
     SponsorshipLevelF,
     SponsorF,
     SponsorshipPeriodF)
+from changes.models import Version
 from core.model_factories import UserF
 import logging
 
@@ -566,6 +576,43 @@ class TestVersionViews(TestCase):
         self.assertEqual(response.context_data['object_list'][0],
                          self.version)
 
+    def create_versions(self, start, count):
+        Version.objects.bulk_create([
+            Version(
+                name='2.%s' % number,
+                slug='2-%s' % number,
+                padded_version='002%06d' % number,
+                author=self.user,
+                project=self.project)
+            for number in range(start, start + count)])
+
+    @override_settings(VALID_DOMAIN=['testserver', ])
+    def test_VersionListView_query_count(self):
+        """The list view runs the same queries whatever the version count."""
+
+        url = reverse('version-list', kwargs={
+            'project_slug': self.project.slug
+        })
+        self.create_versions(1, 20)
+        with CaptureQueriesContext(connection) as few_versions:
+            self.client.get(url)
+
+        self.create_versions(21, 980)
+        with CaptureQueriesContext(connection) as many_versions:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context_data['num_versions'], 1001)
+        self.assertEqual(
+            response.context_data['object_list'][0].name, '2.1000')
+        self.assertEqual(
+            len(few_versions.captured_queries),
+            len(many_versions.captured_queries))
+        # Listing versions never writes them.
+        self.assertFalse([
+            query for query in many_versions.captured_queries
+            if query['sql'].startswith('UPDATE')])
+
     @override_settings(VALID_DOMAIN=['testserver', ])
     def test_VersionCreateView_with_login(self):
 
@@ -773,6 +820,44 @@ class TestVersionViews(TestCase):
             version_same_name_from_other_project)
         self.assertEqual(response.status_code, 200)
 
+    @override_settings(VALID_DOMAIN=['testserver', ])
+    @mock.patch('pypandoc.convert', side_effect=mocked_convert)
+    def test_VersionDownload_background_export(self, mocked_convert):
+        self.client.login(username='timlinux', password='password')
+        url = reverse('version-download', kwargs={
+            'slug': self.version.slug,
+            'project_slug': self.project.slug
+        })
+        media_root = tempfile.mkdtemp()
+        with override_settings(
+                MEDIA_ROOT=media_root,
+                BACKGROUND_JOB_RESULT_ROOT=os.path.join(
+                    media_root, 'job_results')):
+            response = self.client.get(url)
+            job = response.context.get('job')
+            self.assertEqual(job.status, BackgroundJob.QUEUED)
+            # The same export is only queued once.
+            response = self.client.get(url)
+            self.assertEqual(response.context.get('job'), job)
+
+            autodiscover_jobs()
+            self.assertEqual(run_pending_jobs(), 1)
+            job.refresh_from_db()
+            self.assertEqual(job.status, BackgroundJob.DONE)
+
+            response = self.client.get(url)
+            archive = zipfile.ZipFile(
+                BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual(archive.namelist(), ['index.rst'])
+            self.assertEqual(mocked_convert.call_count, 1)
+
+            # Changing the version drops the stored archive.
+            self.version.description = 'New description'
+            self.version.save()
+            response = self.client.get(url)
+            self.assertNotEqual(response.context.get('job'), job)
+        shutil.rmtree(media_root)
+
     @override_settings(VALID_DOMAIN=['testserver', ])
     @mock.patch('pypandoc.convert', side_effect=mocked_convert)
     def test_VersionDownload_login_notfound(self, mocked_convert):
@@ -91,6 +91,7 @@ from .views import (
     ApproveSponsorshipPeriodView,
 
     generate_sponsor_cloud,
+    sponsor_cloud_image,
     FetchGithubPRs,
     FetchRepoLabels,
     FetchCategory,
@@ -354,6 +355,9 @@ urlpatterns = [
     url(regex='^(?P<project_slug>[\w-]+)/member-cloud/$',
         view=generate_sponsor_cloud,
         name='sponsor-cloud'),
+    url(regex='^(?P<project_slug>[\w-]+)/member-cloud\.png$',
+        view=sponsor_cloud_image,
+        name='sponsor-cloud-image'),
 
     # Sustaining member
     url(
@@ -0,0 +1,227 @@
+# coding=utf-8
+"""Client of the GitHub API used to import pull requests.
+
+All the requests of an import share one pooled HTTP session. The pages of a
+search and the profiles of the authors are fetched concurrently by a
+bounded thread pool, the threads only do HTTP, the database is read and
+written from the calling thread.
+
+Author profiles are stored as GithubProfile rows with their ETag. A profile
+fetched less than GITHUB_PROFILE_MAX_AGE seconds ago is used as is, older
+ones are revalidated with a conditional request.
+"""
+
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.utils import timezone
+
+from changes.models.github_profile import GithubProfile
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = 'https://api.github.com'
+
+
+class GithubError(Exception):
+    """Raised when GitHub does not return the requested data."""
+
+
+def pull_request_login(item):
+    """Return the login of the author of a pull request search item."""
+
+    user = item.get('user') or {}
+    login = user.get('login')
+    if not login and user.get('url'):
+        login = user['url'].rstrip('/').rsplit('/', 1)[-1]
+    return login or ''
+
+
+def _page_url(url, page):
+    return re.sub(r'([?&]page=)\d+', r'\g<1>{}'.format(page), url)
+
+
+def _page_number(url):
+    match = re.search(r'[?&]page=(\d+)', url)
+    return int(match.group(1)) if match else 1
+
+
+class GithubClient(object):
+    """Pooled and concurrent access to the GitHub API."""
+
+    def __init__(self, token='', api_url=None, max_workers=None, timeout=30):
+        """
+        :param token: GitHub token sent with every request.
+        :type token: str
+
+        :param api_url: Root of the API, GITHUB_API_URL by default.
+        :type api_url: str
+
+        :param max_workers: Maximum number of concurrent requests.
+        :type max_workers: int
+
+        :param timeout: Seconds to wait for each response.
+        :type timeout: int
+        """
+
+        self.api_url = (
+            api_url or getattr(settings, 'GITHUB_API_URL', GITHUB_API_URL)
+        ).rstrip('/')
+        self.max_workers = max_workers or getattr(
+            settings, 'GITHUB_FETCH_WORKERS', 8)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Accept'] = 'application/vnd.github.v3+json'
+        if token:
+            self.session.headers['Authorization'] = 'token {}'.format(token)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def get(self, url, headers=None):
+        return self.session.get(url, headers=headers, timeout=self.timeout)
+
+    def _map(self, function, items):
+        """Call function on every item, concurrently, keeping the order."""
+
+        items = list(items)
+        if len(items) < 2:
+            return [function(item) for item in items]
+        workers = min(self.max_workers, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(function, items))
+
+    def _page_items(self, url):
+        try:
+            return self.get(url).json()['items']
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            logger.warning('Could not fetch the GitHub page %s', url)
+            return []
+
+    def search_pull_requests(self, repo, query=None, per_page=100):
+        """Return every pull request of a repository matching a query.
+
+        The first page gives the number of pages, the others are fetched
+        concurrently.
+
+        :param repo: Repository e.g. qgis/QGIS.
+        :type repo: str
+
+        :param query: Extra search qualifiers e.g. label:Feature.
+        :type query: str
+
+        :returns: The search items, in the order of the pages.
+        :rtype: list
+        :raises: GithubError when the search fails.
+        """
+
+        url = '{}/search/issues?q=is:pr+repo:{}+{}&per_page={}'.format(
+            self.api_url, repo, query, per_page)
+        try:
+            response = self.get(url)
+            items = list(response.json()['items'])
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            raise GithubError('The GitHub search of {} failed.'.format(repo))
+
+        if 'last' in response.links:
+            last_url = response.links['last']['url']
+            urls = [
+                _page_url(last_url, page)
+                for page in range(2, _page_number(last_url) + 1)]
+            for page_items in self._map(self._page_items, urls):
+                items.extend(page_items)
+        else:
+            while 'next' in response.links:
+                try:
+                    response = self.get(response.links['next']['url'])
+                    items.extend(response.json()['items'])
+                except (requests.RequestException, ValueError, KeyError,
+                        TypeError):
+                    break
+        return items
+
+    def _fetch_profile(self, login_profile):
+        """Fetch a profile, None on failure, {} when it did not change."""
+
+        login, profile = login_profile
+        headers = {}
+        if profile is not None and profile.etag:
+            headers['If-None-Match'] = profile.etag
+        try:
+            response = self.get(
+                '{}/users/{}'.format(self.api_url, login), headers=headers)
+            if response.status_code == 304:
+                return {}
+            if response.status_code != 200:
+                return None
+            data = response.json()
+        except (requests.RequestException, ValueError):
+            logger.warning('Could not fetch the GitHub user %s', login)
+            return None
+        return {
+            'name': data.get('name') or '',
+            'html_url': data.get('html_url') or '',
+            'etag': response.headers.get('ETag', ''),
+        }
+
+    def user_profiles(self, logins):
+        """Return the profiles of some users, fetching the stale ones.
+
+        :param logins: GitHub logins, duplicates are fetched once.
+        :type logins: iterable
+
+        :returns: GithubProfile by login. Users whose profile could not be
+            fetched are missing.
+        :rtype: dict
+        """
+
+        logins = set(login for login in logins if login)
+        profiles = dict(
+            (profile.login, profile) for profile in
+            GithubProfile.objects.filter(login__in=logins))
+        now = timezone.now()
+        fresh_since = now - timedelta(seconds=getattr(
+            settings, 'GITHUB_PROFILE_MAX_AGE', 24 * 60 * 60))
+        fresh = set(
+            login for login, profile in profiles.items()
+            if profile.date_fetched >= fresh_since)
+        stale = sorted(logins - fresh)
+
+        fetched = self._map(
+            self._fetch_profile,
+            [(login, profiles.get(login)) for login in stale])
+
+        new_profiles = []
+        updated_profiles = []
+        for login, data in zip(stale, fetched):
+            if data is None:
+                continue
+            profile = profiles.get(login)
+            if profile is None:
+                profile = GithubProfile(login=login)
+                profiles[login] = profile
+                new_profiles.append(profile)
+            else:
+                updated_profiles.append(profile)
+            for field, value in data.items():
+                setattr(profile, field, value)
+            profile.date_fetched = now
+        GithubProfile.objects.bulk_create(new_profiles, ignore_conflicts=True)
+        GithubProfile.objects.bulk_update(
+            updated_profiles, ['name', 'html_url', 'etag', 'date_fetched'])
+        return profiles
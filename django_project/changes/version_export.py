@@ -0,0 +1,152 @@
+# coding=utf-8
+"""Downloadable archives of a version changelog.
+
+Archives are built off-request by the ``changes.version_export`` background
+job and stored with the job results, so they are reused until the version
+changes and are dropped with its pinned renders.
+"""
+
+import os
+import re
+import tempfile
+import zipfile
+
+import pypandoc
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from base.jobs import job_result_root
+from .changelog_cache import changelog_export_folder
+
+VERSION_EXPORT = 'changes.version_export'
+
+RST_EXPORT = 'rst'
+SPONSOR_EXPORT = 'sponsor'
+
+
+def version_export_path(version, export_format):
+    """Return the absolute path of the archive of a version."""
+
+    return os.path.join(
+        changelog_export_folder(version.pk),
+        'export-{}-{}.zip'.format(
+            version.changelog_generation, export_format))
+
+
+def version_export_filename(version, export_format):
+    """Return the file name the archive of a version is downloaded as."""
+
+    if export_format == SPONSOR_EXPORT:
+        return '{}-SustainingMember-{}.zip'.format(
+            version.project.name, version.name)
+    return '{}-{}.zip'.format(version.project.name, version.name)
+
+
+def version_export_key(version, export_format):
+    """Return the background job key of the archive of a version."""
+
+    return 'version-export:{}:{}'.format(version.pk, export_format)
+
+
+def version_sponsors(version):
+    """Group the sponsors of a version by sponsorship level.
+
+    :rtype: dict
+    """
+
+    sponsors = {}
+    for sponsor in version.sponsors() or []:
+        sponsors.setdefault(sponsor.sponsorship_level, []).append(
+            sponsor.sponsor)
+    return sponsors
+
+
+def _no_progress(percentage, message):
+    pass
+
+
+def _rst_document(version):
+    html = render_to_string('version/detail-content-rst.html', {
+        'version': version,
+        'sponsors': version_sponsors(version),
+        'rst_download': True,
+    })
+    document = pypandoc.convert(
+        html.encode('utf8', 'ignore'),
+        'rst', format='html', extra_args=['--no-wrap'])
+    document = document.replace('/media/images/', 'images/')
+
+    images = []
+    for line in document.split('\n'):
+        if 'image::' in line:
+            images.extend(re.findall(r'images.+', line))
+    return 'index.rst', document, images
+
+
+def _sponsor_document(version):
+    html = render_to_string('version/includes/version-sponsors.html', {
+        'version': version,
+        'object': version,
+        'html_download': True,
+    })
+    document = pypandoc.convert(
+        html.encode('utf8', 'ignore'), 'html', format='html')
+    document = document.replace('/media/images/', 'images/')
+
+    page = BeautifulSoup(document, 'html.parser')
+    images = [image['src'] for image in page.findAll('img')]
+    document_name = '{}-SustainingMember-{}.html'.format(
+        version.project.name, version.name)
+    return document_name, document, images
+
+
+def build_version_export(version, export_format, progress=None):
+    """Build the archive of a version with its referenced images.
+
+    :param version: The version.
+    :type version: changes.models.Version
+
+    :param export_format: RST_EXPORT or SPONSOR_EXPORT.
+    :type export_format: str
+
+    :param progress: Called with a percentage and a message.
+    :type progress: callable
+
+    :returns: Path of the archive relative to the job result root.
+    :rtype: str
+    """
+
+    if progress is None:
+        progress = _no_progress
+
+    progress(10, 'Rendering the changelog')
+    if export_format == SPONSOR_EXPORT:
+        document_name, document, images = _sponsor_document(version)
+    else:
+        document_name, document, images = _rst_document(version)
+
+    progress(50, 'Writing the archive')
+    pathname = version_export_path(version, export_format)
+    folder = os.path.dirname(pathname)
+    os.makedirs(folder, exist_ok=True)
+    file_descriptor, temp_pathname = tempfile.mkstemp(
+        dir=folder, prefix='.', suffix='.zip.tmp')
+    os.close(file_descriptor)
+    try:
+        with zipfile.ZipFile(temp_pathname, 'w') as zip_file:
+            for index, image in enumerate(images):
+                # write the image files which are stored locally
+                image_path = os.path.join(settings.MEDIA_ROOT, image)
+                if os.path.isfile(image_path):
+                    zip_file.write(image_path, image)
+                progress(
+                    50 + 45 * (index + 1) // len(images),
+                    'Adding image {} of {}'.format(index + 1, len(images)))
+            zip_file.writestr(document_name, document)
+        os.replace(temp_pathname, pathname)
+    except BaseException:
+        if os.path.exists(temp_pathname):
+            os.remove(temp_pathname)
+        raise
+    return os.path.relpath(pathname, job_result_root())
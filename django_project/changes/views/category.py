@@ -4,7 +4,6 @@
 """
 # noinspection PyUnresolvedReferences
 import logging
-import json
 from base.models import Project
 from django.urls import reverse
 from django.shortcuts import get_object_or_404
@@ -22,7 +21,9 @@ from django.db.models import Q
 from django.core.exceptions import ValidationError
 from braces.views import LoginRequiredMixin
 from changes.models import Category, Version
+from changes.changelog_cache import invalidate_changelogs
 from changes.forms import CategoryForm
+from lesson.utilities import re_order_features
 
 logger = logging.getLogger(__name__)
 
@@ -372,22 +373,12 @@ class CategoryOrderSubmitView(LoginRequiredMixin, CategoryMixin, UpdateView):
         project_slug = kwargs.get('project_slug')
         project = Project.objects.get(slug=project_slug)
         categories = Category.objects.filter(project=project)
-        categories_json = request.body
-
-        try:
-            categories_request = json.loads(categories_json)
-        except ValueError:
-            raise Http404(
-                'Error json values'
-            )
-
-        for cat in categories_request:
-            category = categories.get(id=cat['id'])
-            if category:
-                category.sort_number = cat['sort_number']
-                category.save()
-
-        return HttpResponse('')
+        response = re_order_features(
+            request, categories, field='sort_number')
+        # The categories are reordered in bulk, without post_save signal.
+        invalidate_changelogs(Version.objects.filter(
+            project=project).values_list('pk', flat=True))
+        return response
 
 
 # noinspection PyAttributeOutsideInit
@@ -15,6 +15,7 @@ from django.views.generic import (
     UpdateView,
 )
 from braces.views import LoginRequiredMixin
+from ..changelog_cache import invalidate_changelogs
 from ..models import Version, Entry, Category
 from ..forms import EntryForm
 from lesson.utilities import re_order_features
@@ -243,4 +244,7 @@ class EntryOrderSubmitView(LoginRequiredMixin, EntryMixin, UpdateView):
         version = get_object_or_404(Version, pk=version_pk)
         category = get_object_or_404(Category, pk=category_pk)
         queryset = Entry.objects.filter(version=version, category=category)
-        return re_order_features(request, queryset)
+        response = re_order_features(request, queryset)
+        # The entries are reordered in bulk, without post_save signal.
+        invalidate_changelogs([version.pk])
+        return response
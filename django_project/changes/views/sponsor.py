@@ -1,15 +1,14 @@
 __author__ = 'rischan'
 
 
-import os
 import time
 import logging
 
-from django.conf import settings
 from django.urls import reverse
 from django.db.models import Q
 from django.shortcuts import get_object_or_404, render
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse
+from django.views.decorators.http import condition
 from django.views.generic import (
     TemplateView,
     ListView,
@@ -26,13 +25,13 @@ from django.template.loader import get_template
 
 from braces.views import LoginRequiredMixin
 from pure_pagination.mixins import PaginationMixin
-from PIL import Image
 from pinax.notifications.models import send
 
 from base.models import Project
 from ..models import Sponsor, SponsorshipPeriod, active_sustaining_membership  # noqa
 from ..models import SponsorshipLevel  # noqa
 from ..forms import SponsorForm
+from ..sponsor_cloud import sponsor_cloud
 
 from ..utils import render_to_pdf
 from changes import (
@@ -756,62 +755,34 @@ class RejectSponsorView(LoginRequiredMixin, SponsorMixin, RedirectView):
         })
 
 
-def generate_sponsor_cloud(request, **kwargs):
-    """Generate image for sponsor logos."""
+def _request_sponsor_cloud(request, project_slug):
+    """Return the sponsor cloud of a project, once per request."""
 
-    project_slug = kwargs.pop('project_slug')
-    project = Project.objects.get(slug=project_slug)
-    project_name = project.name.lower().replace(' ', '_')
-    queryset = SponsorshipPeriod.objects.filter(
-        project=project).order_by('-sponsorship_level__value')
-    background = Image.new("RGB", (1200, 1000), "white")
-    max_x = 0
-    max_y = 0
-    y = 0
-    x = 0
-    sponsor_level = ''
-    xy_size = 100
-    for sponsor in queryset:
-        if sponsor.current_sponsor():
-            if sponsor.sponsorship_level.name != sponsor_level:
-                if sponsor_level != '':
-                    sponsor_level = sponsor.sponsorship_level.name
-                    xy_size -= 25
-                    y += 25
-                    if xy_size < 25:
-                        xy_size = 25
-                        y -= 25
-                else:
-                    sponsor_level = sponsor.sponsorship_level.name
-
-            im = Image.open(
-                sponsor.sponsor.logo).convert("RGBA")
-            size = xy_size, xy_size
-            im.thumbnail(size, Image.ANTIALIAS)
-            width, height = im.size
-            if (x + xy_size) >= 1000:
-                x = 0
-                y += xy_size
-            if max_x <= (x + xy_size):
-                max_x = x + xy_size
-            if max_y <= y:
-                max_y = y + xy_size
-            background.paste(
-                im, box=(x, y + int((xy_size - height) / 2)), mask=im)
-            x += xy_size
+    if not hasattr(request, '_sponsor_cloud'):
+        project = get_object_or_404(Project, slug=project_slug)
+        request._sponsor_cloud = sponsor_cloud(project)
+    return request._sponsor_cloud
 
-    image_path = 'none'
-    if max_x != 0:
-        filepath = '/home/web/media/images/sponsors/'
-        if not os.path.exists(filepath):
-            os.makedirs(filepath)
 
-        background.crop(
-            (0, 0, max_x, max_y)).save(
-            filepath + '{}.png'.format(project_name))
+def _sponsor_cloud_etag(request, project_slug):
+    cloud = _request_sponsor_cloud(request, project_slug)
+    return cloud.fingerprint if cloud else None
+
 
-        image_path = \
-            settings.MEDIA_URL + 'images/sponsors/{}.png'.format(project_name)
+def _sponsor_cloud_last_modified(request, project_slug):
+    cloud = _request_sponsor_cloud(request, project_slug)
+    return cloud.last_modified if cloud else None
+
+
+def generate_sponsor_cloud(request, **kwargs):
+    """Show the image of the sponsor logos."""
+
+    project_slug = kwargs.pop('project_slug')
+    project = get_object_or_404(Project, slug=project_slug)
+    image_path = 'none'
+    if _request_sponsor_cloud(request, project_slug):
+        image_path = reverse(
+            'sponsor-cloud-image', kwargs={'project_slug': project_slug})
 
     return render(
         request, 'sponsor/sponsor_cloud.html',
@@ -820,6 +791,18 @@ def generate_sponsor_cloud(request, **kwargs):
             'the_project': project})
 
 
+@condition(
+    etag_func=_sponsor_cloud_etag,
+    last_modified_func=_sponsor_cloud_last_modified)
+def sponsor_cloud_image(request, project_slug):
+    """Serve the image of the sponsor logos."""
+
+    cloud = _request_sponsor_cloud(request, project_slug)
+    if cloud is None:
+        raise Http404('No current sustaining member found.')
+    return FileResponse(open(cloud.path, 'rb'), content_type='image/png')
+
+
 class GenerateSponsorPDFView(LoginRequiredMixin, SponsorMixin, TemplateView):
     """Template View for invoice generation."""
     context_object_name = 'sponsors'
@@ -5,14 +5,9 @@
 
 # noinspection PyUnresolvedReferences
 # import logging
-from base.models import Project
+from base.models import BackgroundJob, Project
 # LOGGER = logging.getLogger(__name__)
-import re
-import zipfile
-from io import BytesIO
-import pypandoc
-from bs4 import BeautifulSoup
-from django.conf import settings
+import os
 from django.urls import reverse
 from django.http import Http404
 from django.shortcuts import get_object_or_404
@@ -23,14 +18,27 @@ from django.views.generic import (
     DetailView,
     UpdateView,
 )
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse
 from django.db import IntegrityError
 from django.db.models import Q
 from django.core.exceptions import ValidationError
 from braces.views import LoginRequiredMixin, StaffuserRequiredMixin
 from pure_pagination.mixins import PaginationMixin
+from ..changelog_cache import (
+    changelog_variant,
+    get_changelog,
+    set_changelog,
+)
 from ..models import Version
 from ..forms import VersionForm
+from ..version_export import (
+    RST_EXPORT,
+    SPONSOR_EXPORT,
+    VERSION_EXPORT,
+    version_export_filename,
+    version_export_key,
+    version_export_path,
+)
 
 __author__ = 'Tim Sutton <tim@kartoza.com>'
 __revision__ = '$Format:%H$'
@@ -46,6 +54,51 @@ class VersionMixin(object):
     form_class = VersionForm
 
 
+class ChangelogCacheMixin(object):
+
+    """Serve anonymous requests from the rendered changelog cache.
+
+    Changelog pages depend on the user for edit links, only anonymous
+    requests (e.g. release announcement traffic) are cached.
+    """
+    changelog_format = None
+    changelog_content_type = 'text/html; charset=utf-8'
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super(ChangelogCacheMixin, self).get(
+                request, *args, **kwargs)
+        self.object = self.get_object()
+        variant = changelog_variant(request)
+        content = get_changelog(self.object, self.changelog_format, variant)
+        if content is not None:
+            return self.changelog_response(content)
+        context = self.get_context_data(object=self.object)
+        response = self.render_to_response(context)
+
+        # Stored once rendered, after the template response middleware
+        # (e.g. the navigation of NavContextMiddleware) updated the context.
+        def store_changelog(rendered):
+            if rendered.status_code == 200:
+                set_changelog(
+                    self.object, self.changelog_format, variant,
+                    rendered.content)
+
+        response.add_post_render_callback(store_changelog)
+        return response
+
+    def changelog_response(self, content):
+        """Build the response for a cached render.
+
+        :param content: The cached response body.
+        :type content: bytes
+
+        :rtype: HttpResponse
+        """
+        return HttpResponse(
+            content, content_type=self.changelog_content_type)
+
+
 class CustomStaffuserRequiredMixin(StaffuserRequiredMixin):
 
     """Fix redirect loop when user is already authenticated but non staff."""
@@ -84,7 +137,7 @@ class VersionListView(VersionMixin, PaginationMixin, ListView):
         context['user_can_edit'] = False
         context['user_can_delete'] = False
 
-        context['num_versions'] = self.get_queryset().count()
+        context['num_versions'] = context['paginator'].count
         context['rst_download'] = False
         project_slug = self.kwargs.get('project_slug', None)
         context['project_slug'] = project_slug
@@ -119,14 +172,6 @@ class VersionListView(VersionMixin, PaginationMixin, ListView):
 
         :raises: Http404
         """
-        versions_qs = Version.objects.all()
-
-        # fix padded version if there is padded name with alphabet.
-        for version in versions_qs:
-            is_alphabet = re.search('[a-zA-Z,.]', str(version.padded_version))
-            if is_alphabet is not None:
-                version.save()
-
         project_slug = self.kwargs.get('project_slug', None)
         if project_slug:
             try:
@@ -135,17 +180,19 @@ class VersionListView(VersionMixin, PaginationMixin, ListView):
                 raise Http404(
                     'The requested project does not exist.'
                 )
-            versions_qs = versions_qs.filter(
-                project=project).order_by('-padded_version')
+            versions_qs = Version.objects.filter(
+                project=project).select_related(
+                'project').order_by('-padded_version')
             return versions_qs
         else:
             raise Http404('Sorry! We could not find your version!')
 
 
-class VersionDetailView(VersionMixin, DetailView):
+class VersionDetailView(ChangelogCacheMixin, VersionMixin, DetailView):
     """A tabular list style view for a Version."""
     context_object_name = 'version'
     template_name = 'version/detail.html'
+    changelog_format = 'html'
 
     def get_context_data(self, **kwargs):
         """Get the context data which is passed to a template.
@@ -233,6 +280,8 @@ class VersionDetailView(VersionMixin, DetailView):
 class VersionMarkdownView(VersionDetailView):
     """Return a markdown Version detail."""
     template_name = 'version/detail.md'
+    changelog_format = 'markdown'
+    changelog_content_type = 'application/text'
 
     def render_to_response(self, context, **response_kwargs):
         """Render this Version as markdown.
@@ -253,11 +302,19 @@ class VersionMarkdownView(VersionDetailView):
         response['Content-Disposition'] = 'attachment; filename="foo.md"'
         return response
 
+    def changelog_response(self, content):
+        """Build the markdown attachment for a cached render."""
+        response = super(VersionMarkdownView, self).changelog_response(
+            content)
+        response['Content-Disposition'] = 'attachment; filename="foo.md"'
+        return response
+
 
-class VersionThumbnailView(VersionMixin, DetailView):
+class VersionThumbnailView(ChangelogCacheMixin, VersionMixin, DetailView):
     """A contact sheet style list of thumbs per entry."""
     context_object_name = 'version'
     template_name = 'version/detail-thumbs.html'
+    changelog_format = 'thumbs'
 
     def get_context_data(self, **kwargs):
         """Get the context data which is passed to a template.
@@ -510,114 +567,46 @@ class VersionUpdateView(LoginRequiredMixin, VersionMixin, UpdateView):
                 'ERROR: Version by this name already exists!')
 
 
-class VersionDownload(CustomStaffuserRequiredMixin, VersionMixin, DetailView):
-    """View to allow staff users to download Version page in RST format."""
-    template_name = 'version/detail-content-rst.html'
-
-    def get_context_data(self, **kwargs):
-        """Get the context data which is passed to a template.
+class VersionExportMixin(object):
 
-        :param kwargs: Any arguments to pass to the superclass.
-        :type kwargs: dict
+    """Serve the archive of a version, building it in the background.
 
-        :returns: Context data which will be passed to the template.
-        :rtype: dict
-        """
-        context = super(VersionDownload, self).get_context_data(**kwargs)
-        versions = self.get_object()
-        sponsors = {}
+    The first request queues a background job and renders a page polling
+    its progress. The stored archive is served until the version changes.
+    """
+    export_format = None
+    template_name = 'version/export.html'
 
-        # group sponsors by sponsorship level
-        if versions.sponsors():
-            for sponsor in versions.sponsors():
-                if sponsor.sponsorship_level not in sponsors:
-                    sponsors[sponsor.sponsorship_level] = []
-
-                sponsors[sponsor.sponsorship_level].append(sponsor.sponsor)
-
-        context['sponsors'] = sponsors
-        return context
-
-    def render_to_response(self, context, **response_kwargs):
-        """Returns a RST document for a project Version page.
-
-        :param context:
-        :type context: dict
-
-        :param response_kwargs: Keyword Arguments
-        :param response_kwargs: dict
-
-        :returns: a RST document for a project Version page.
-        :rtype: HttpResponse
-        """
-        version_obj = context.get('version')
-        # set the context flag for 'rst_download'
-        context['rst_download'] = True
-        # render the template
-        document = self.response_class(
-            request=self.request,
-            template=self.get_template_names(),
-            context=context,
-            **response_kwargs
-        )
-        # convert the html to rst
-        converted_doc = pypandoc.convert(
-            document.rendered_content.encode('utf8', 'ignore'),
-            'rst', format='html', extra_args=['--no-wrap'])
-        converted_doc = converted_doc.replace('/media/images/', 'images/')
-
-        # prepare the ZIP file
-        zip_file = self._prepare_zip_archive(converted_doc, version_obj)
-
-        # Grab the ZIP file from memory, make response with correct MIME-type
-        response = HttpResponse(
-            zip_file.getvalue(), content_type="application/x-zip-compressed")
-        # ..and correct content-disposition
-        response['Content-Disposition'] = (
-            'attachment; filename="{}-{}.zip"'.format(
-                version_obj.project.name, version_obj.name)
-        )
-
-        return response
-
-    # noinspection PyMethodMayBeStatic
-    def _prepare_zip_archive(self, document, version_obj):
-        """Prepare a ZIP file with the document and referenced images.
-
-        :param document:
-        :param version_obj: Instance of a version object.
-
-        :returns temporary path for the created zip file
-        :rtype: string
-        """
-        # create in memory file-like object
-        temp_path = BytesIO()
-
-        # grab all of the images from document
-        images = []
-        for line in document.split('\n'):
-            if 'image::' in line:
-                matches = re.findall(r'images.+', line)
-                images.extend(matches)
-
-        # create the ZIP file
-        with zipfile.ZipFile(temp_path, 'w') as zip_file:
-            # write all of the image files (read from disk)
-            for image in images:
-                try:
-                    image_url = '{}/{}'.format(settings.MEDIA_ROOT, image)
-                    zip_file.write(
-                        image_url,
-                        '{0}'.format(image)
-                    )
-                except FileNotFoundError:
-                    pass
-            # write the actual RST document
-            zip_file.writestr(
-                'index.rst',
-                document)
-
-        return temp_path
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        pathname = version_export_path(self.object, self.export_format)
+        if os.path.exists(pathname):
+            return FileResponse(
+                open(pathname, 'rb'),
+                as_attachment=True,
+                filename=version_export_filename(
+                    self.object, self.export_format))
+        job = BackgroundJob.enqueue(
+            VERSION_EXPORT,
+            {
+                'version': self.object.pk,
+                'format': self.export_format,
+                'filename': version_export_filename(
+                    self.object, self.export_format),
+            },
+            key=version_export_key(self.object, self.export_format),
+            user=request.user,
+            max_attempts=3)
+        context = self.get_context_data(object=self.object, job=job)
+        context['project'] = self.object.project
+        return self.render_to_response(context)
+
+
+class VersionDownload(
+    CustomStaffuserRequiredMixin, VersionExportMixin, VersionMixin,
+    DetailView):
+    """View to allow staff users to download Version page in RST format."""
+    export_format = RST_EXPORT
 
     def get_queryset(self):
         """Get the queryset for download.
@@ -648,10 +637,12 @@ class VersionDownload(CustomStaffuserRequiredMixin, VersionMixin, DetailView):
         return self.queryset
 
 
-class VersionDownloadGnu(VersionMixin, DetailView):
+class VersionDownloadGnu(ChangelogCacheMixin, VersionMixin, DetailView):
     """A tabular list style view for a Version."""
     context_object_name = 'version'
     template_name = 'version/detail-titles.txt'
+    changelog_format = 'gnu'
+    changelog_content_type = 'text/plain; charset=utf-8'
 
     def get_object(self, queryset=None):
         """Get the object for this view.
@@ -688,100 +679,21 @@ class VersionDownloadGnu(VersionMixin, DetailView):
         else:
             raise Http404('Sorry! We could not find your version!')
 
-    def get(self, request, *args, **kwargs):
+    def render_to_response(self, context, **response_kwargs):
         """We overload this so we can return a text document instead of html.
 
-        :param request: An HttpRequest object.
+        :param context: Context data to use with template.
+        :type context: dict
         """
-        self.object = self.get_object()
-        context = self.get_context_data()
-
-        return self.render_to_response(
-            context,
-            content_type="text/plain; charset=utf-8")
+        response_kwargs.setdefault(
+            'content_type', self.changelog_content_type)
+        return super(VersionDownloadGnu, self).render_to_response(
+            context, **response_kwargs)
 
 
 class VersionSponsorDownload(
-    CustomStaffuserRequiredMixin, VersionMixin, DetailView):
+    CustomStaffuserRequiredMixin, VersionExportMixin, VersionMixin,
+    DetailView):
 
     """View to allow staff users to download Version page in html format."""
-
-    template_name = 'version/includes/version-sponsors.html'
-
-    def render_to_response(self, context, **response_kwargs):
-        """Returns a html document for a project Version page.
-
-        :param context:
-        :type context: dict
-
-        :param response_kwargs: Keyword Arguments
-        :param response_kwargs: dict
-
-        :returns: a html document for a project Version page.
-        :rtype: HttpResponse
-        """
-        version_obj = context.get('version')
-        # set the context flag for 'html_download'
-        context['html_download'] = True
-        # render the template
-        document = self.response_class(
-            request=self.request,
-            template=self.get_template_names(),
-            context=context,
-            **response_kwargs
-        )
-        # convert the html to html
-        converted_doc = pypandoc.convert(
-            document.rendered_content.encode(
-                'utf8', 'ignore'), 'html', format='html')
-        converted_doc = converted_doc.replace('/media/images/', 'images/')
-
-        # prepare the ZIP file
-        zip_file = self._prepare_zip_archive(converted_doc, version_obj)
-
-        # Grab the ZIP file from memory, make response with correct MIME-type
-        response = HttpResponse(
-            zip_file.getvalue(), content_type="application/x-zip-compressed")
-        # ..and correct content-disposition
-        response['Content-Disposition'] = (
-            'attachment; filename="{}-SustainingMember-{}.zip"'.format(
-                version_obj.project.name, version_obj.name)
-        )
-
-        return response
-
-    # noinspection PyMethodMayBeStatic
-    def _prepare_zip_archive(self, document, version_obj):
-        """Prepare a ZIP file with the document and referenced images.
-        :param document:
-        :param version_obj: Instance of a version object.
-
-        :returns temporary path for the created zip file
-        :rtype: string
-        """
-        # create in memory file-like object
-        temp_path = BytesIO()
-
-        # grab all of the images from document
-        images = []
-        page = BeautifulSoup(document, 'html.parser')
-        pages = page.findAll('img')
-        for image in pages:
-            img = image['src']
-            images.append(img)
-
-        # create the ZIP file
-        with zipfile.ZipFile(temp_path, 'w') as zip_file:
-            # write all of the image files (read from disk)
-            for image in images:
-                zip_file.write(
-                    '../media/{0}'.format(image),
-                    '{0}'.format(image)
-                )
-            # write the actual html document
-            zip_file.writestr(
-                '{}-SustainingMember-{}.html'.format(
-                    version_obj.project.name, version_obj.name),
-                document)
-
-        return temp_path
+    export_format = SPONSOR_EXPORT
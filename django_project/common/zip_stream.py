@@ -0,0 +1,81 @@
+# coding=utf-8
+"""Build zip archives chunk by chunk, for streaming responses.
+
+The archive is written to an unseekable buffer which is drained after
+every chunk, so memory use does not grow with the size of the archive and
+the first bytes can be sent before the last file is even read.
+"""
+
+import zipfile
+
+# Size of the chunks read from the archived files.
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZipStreamBuffer(object):
+    """Write-only, unseekable file object collecting what zipfile writes.
+
+    zipfile detects that it cannot seek and writes data descriptors after
+    each member instead of going back to patch the local headers.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Return and forget everything written since the last drain."""
+
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(files, compression=zipfile.ZIP_STORED):
+    """Yield the bytes of a zip archive of files, chunk by chunk.
+
+    :param files: Iterable of (name in archive, path on disk) tuples. It is
+        consumed lazily, so files may be created while the archive is
+        streamed.
+    :type files: iterable
+
+    :param compression: zipfile compression of the members. Defaults to
+        storing them uncompressed.
+    :type compression: int
+
+    :returns: Generator of bytes.
+    """
+
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=compression) as archive:
+        for arcname, pathname in files:
+            zip_info = zipfile.ZipInfo.from_file(pathname, arcname)
+            zip_info.compress_type = compression
+            with open(pathname, 'rb') as source, \
+                    archive.open(zip_info, 'w') as member:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    member.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    # Central directory.
+    data = buffer.drain()
+    if data:
+        yield data
@@ -35,22 +35,30 @@ def stripe_public_key(request):
 
 def sustaining_member_context(request):
     """Context processor for sustaining member data.
+
+    The project of the page is the one NavContextMiddleware found in the
+    view context, or the project of the URL. The result is kept on the
+    request for the other templates it renders.
+
     :param request: Http request object
     :returns: A dict containing the following:
         * is_sustaining_member: Whether user is a sustaining member or not
     :rtype: dict
     """
-    from changes.models import active_sustaining_membership
+    from changes.sustaining_membership import is_sustaining_member
     from base.models import Project
 
+    context_data = getattr(request, '_sustaining_member_context', None)
+    if context_data is not None:
+        return context_data
     context_data = {
         'is_sustaining_member': False
     }
     user = request.user
-    project = None
     if not user or user.is_anonymous:
         return context_data
-    if hasattr(request, 'resolver_match'):
+    project = getattr(request, 'the_project', None)
+    if project is None and hasattr(request, 'resolver_match'):
         try:
             project_slug = request.resolver_match.kwargs.get('project_slug')
             if not project_slug:
@@ -60,11 +68,11 @@ def sustaining_member_context(request):
                     slug=project_slug
                 )
             except Project.DoesNotExist:
+                request._sustaining_member_context = context_data
                 return context_data
         except AttributeError:
             return context_data
-    context_data['is_sustaining_member'] = active_sustaining_membership(
-                user,
-                project
-            ).exists()
+    context_data['is_sustaining_member'] = is_sustaining_member(
+        user, project)
+    request._sustaining_member_context = context_data
     return context_data
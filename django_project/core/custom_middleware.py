@@ -3,7 +3,6 @@
 """
 core.custom_middleware
 """
-from django.contrib.flatpages.models import FlatPage
 from django.conf import settings
 from django.urls import reverse
 from django.http import HttpResponseRedirect
@@ -15,11 +14,10 @@ try:
 except ImportError:  # Django < 1.10
     MiddlewareBase = object
 
-from base.models import Project, Version, Domain, ProjectFlatpage
-from changes.models import (
-    SponsorshipLevel, SponsorshipPeriod, Sponsor
-)
-from certification.models import CertifyingOrganisation
+from base.domain_routing import routing_table
+from base.models import Project
+from core.nav_cache import (
+    project_nav_state, project_pending_state, site_nav_state)
 
 
 class NavContextMiddleware(MiddlewareBase):
@@ -46,39 +44,35 @@ class NavContextMiddleware(MiddlewareBase):
             return response
 
         if context.get('project', None):
-            context['the_project'] = context.get('project')
-            versions = Version.objects.filter(project=context.get('project'))
-            context['has_pending_sponsor_lvl'] = (
-                SponsorshipLevel.unapproved_objects.filter(
-                    project=context.get('project')).exists())
-            context['has_pending_sponsor_period'] = (
-                SponsorshipPeriod.unapproved_objects.filter(
-                    project=context.get('project')).exists())
-            context['has_pending_organisations'] = (
-                CertifyingOrganisation.unapproved_objects.filter(
-                    project=context.get('project')).exists())
-
-            # Check if user is a sustaining member manager
+            project = context.get('project')
+            context['the_project'] = project
+            context.update(project_nav_state(project))
+
+            # Pending approvals are only shown to logged in users, pending
+            # sustaining members to the sponsorship managers.
             if request.user.is_anonymous:
+                context['has_pending_sponsor_lvl'] = False
+                context['has_pending_sponsor_period'] = False
+                context['has_pending_organisations'] = False
                 context['has_pending_sustaining_members'] = False
             else:
+                pending = project_pending_state(project)
+                context['has_pending_sponsor_lvl'] = (
+                    pending['has_pending_sponsor_lvl'])
+                context['has_pending_sponsor_period'] = (
+                    pending['has_pending_sponsor_period'])
+                context['has_pending_organisations'] = (
+                    pending['has_pending_organisations'])
                 context['has_pending_sustaining_members'] = (
-                    Sponsor.unapproved_objects.filter(
-                        project=context.get('project'),
-                        project__sponsorship_managers__in=[request.user]
-                    ).exists()
-                )
-            context['project_flatpages'] = ProjectFlatpage.objects.filter(
-                project=context['the_project']
-            )
+                    pending['has_pending_sponsors'] and
+                    request.user.pk in pending['sponsorship_manager_ids'])
 
         else:
             if request.user.is_staff:
                 context['the_projects'] = Project.objects.all()
             else:
-                context['the_projects'] = Project.approved_objects.filter(
-                    private=False
-                )
+                context['the_projects'] = (
+                    site_nav_state()['public_projects'])
 
         if context.get('version', None):
             context['the_version'] = context.get('version')
@@ -134,10 +128,11 @@ class NavContextMiddleware(MiddlewareBase):
             except (KeyError, IndexError):
                 pass
 
-        project_flatpage_ids = (
-            ProjectFlatpage.objects.all().values_list('id', flat=True))
-        context['flatpages'] = (
-            FlatPage.objects.exclude(id__in=project_flatpage_ids))
+        context['flatpages'] = site_nav_state()['flatpages']
+
+        # Reused by the context processors rendering the response.
+        if context.get('the_project', None):
+            request.the_project = context['the_project']
 
         return response
 
@@ -147,42 +142,42 @@ class CheckDomainMiddleware(MiddlewareBase):
     Custom middleware to check if domain is valid.
     """
     def process_request(self, request):
-        try:
-            domain = request.get_host().split(':')[0]
-            if domain in settings.VALID_DOMAIN:
-                return None
-            else:
-                custom_domain = Domain.objects.get(
-                    domain=domain, approved=True)
-                request.site = custom_domain.domain
-                activate('en')
-                url = reverse('project-list')
-                home_url = reverse('home')
-                if custom_domain.role == 'Project':
-                    # Get current project path
-                    try:
-                        project_url_path = request.path.split(home_url)[1]
-                    except IndexError:
-                        project_url_path = '/'
-                    project_url_path = project_url_path.split('/')[0]
-                    is_different_project = (
-                        Project.objects.filter(
-                            name__iexact=project_url_path
-                        ).exclude(id=custom_domain.project.id).exists()
-                    )
-
-                    if (
-                            request.path == url or
-                            request.path == home_url or
-                            project_url_path == '' or
-                            is_different_project):
-                        return redirect(
-                            'project-detail', custom_domain.project.slug)
-                elif custom_domain.role == 'Organisation':
-                    return None
-        except Domain.DoesNotExist:
+        domain = request.get_host().split(':')[0]
+        if domain in settings.VALID_DOMAIN:
+            request.domain_route = None
+            return None
+
+        routes = routing_table()
+        custom_domain = routes.route(domain)
+        request.domain_route = custom_domain
+        if custom_domain is None:
             if not settings.DEBUG:
                 # for production the domain is hardcoded for consistency
                 return HttpResponseRedirect(
                     'http://changelog.kartoza.com/en/domain-not-found/'
                 )
+            return None
+
+        request.site = custom_domain.domain
+        activate('en')
+        url = reverse('project-list')
+        home_url = reverse('home')
+        if custom_domain.role == 'Project':
+            # Get current project path
+            try:
+                project_url_path = request.path.split(home_url)[1]
+            except IndexError:
+                project_url_path = '/'
+            project_url_path = project_url_path.split('/')[0]
+            is_different_project = routes.is_other_project(
+                project_url_path, custom_domain.project_id)
+
+            if (
+                    request.path == url or
+                    request.path == home_url or
+                    project_url_path == '' or
+                    is_different_project):
+                return redirect(
+                    'project-detail', custom_domain.project_slug)
+        elif custom_domain.role == 'Organisation':
+            return None
@@ -0,0 +1,126 @@
+# coding=utf-8
+"""Cache of the navigation state added to every page.
+
+NavContextMiddleware needs the info pages and the pending approval flags of
+the current project on every template response. They rarely change, so they
+are kept in the Django cache for NAV_CACHE_TIMEOUT seconds and dropped by
+the signals in base.signals.navigation when the models they are read from
+change.
+
+The pending approval flags are cached apart from the rest of the project
+state, they are only computed for users who are shown them.
+
+The signals only drop the state from the cache of the process saving the
+models, so the default cache has to be shared by the processes (see CACHES
+in core.settings.prod). With a cache per process, e.g. the LocMemCache of
+the development settings, the other processes show the previous state for
+up to NAV_CACHE_TIMEOUT seconds.
+"""
+
+from django.conf import settings
+from django.contrib.flatpages.models import FlatPage
+from django.core.cache import cache
+
+from base.models import Project, ProjectFlatpage
+from changes.models import SponsorshipLevel, SponsorshipPeriod, Sponsor
+from certification.models import CertifyingOrganisation
+
+SITE_NAV_KEY = 'nav:site'
+
+
+def _project_key(project_id):
+    return 'nav:project:{}'.format(project_id)
+
+
+def _pending_key(project_id):
+    return 'nav:pending:{}'.format(project_id)
+
+
+def _timeout():
+    return getattr(settings, 'NAV_CACHE_TIMEOUT', 5 * 60)
+
+
+def site_nav_state():
+    """Return the navigation state of the pages outside of a project.
+
+    :returns: The site info pages as ``flatpages`` and the public projects
+        as ``public_projects``.
+    :rtype: dict
+    """
+
+    state = cache.get(SITE_NAV_KEY)
+    if state is None:
+        state = {
+            'flatpages': list(FlatPage.objects.exclude(
+                id__in=ProjectFlatpage.objects.values('id'))),
+            'public_projects': list(Project.approved_objects.filter(
+                private=False)),
+        }
+        cache.set(SITE_NAV_KEY, state, _timeout())
+    return state
+
+
+def project_nav_state(project):
+    """Return the navigation state of a project.
+
+    :param project: The project of the page.
+    :type project: base.models.Project
+
+    :returns: The info pages of the project as ``project_flatpages``.
+    :rtype: dict
+    """
+
+    key = _project_key(project.pk)
+    state = cache.get(key)
+    if state is None:
+        state = {
+            'project_flatpages': list(
+                ProjectFlatpage.objects.filter(project=project)),
+        }
+        cache.set(key, state, _timeout())
+    return state
+
+
+def project_pending_state(project):
+    """Return what is waiting for approval in a project.
+
+    :param project: The project of the page.
+    :type project: base.models.Project
+
+    :returns: A flag per kind of pending object and the ids of the
+        sponsorship managers of the project.
+    :rtype: dict
+    """
+
+    key = _pending_key(project.pk)
+    state = cache.get(key)
+    if state is None:
+        state = {
+            'has_pending_sponsor_lvl': (
+                SponsorshipLevel.unapproved_objects.filter(
+                    project=project).exists()),
+            'has_pending_sponsor_period': (
+                SponsorshipPeriod.unapproved_objects.filter(
+                    project=project).exists()),
+            'has_pending_organisations': (
+                CertifyingOrganisation.unapproved_objects.filter(
+                    project=project).exists()),
+            'has_pending_sponsors': (
+                Sponsor.unapproved_objects.filter(project=project).exists()),
+            'sponsorship_manager_ids': set(
+                project.sponsorship_managers.values_list('pk', flat=True)),
+        }
+        cache.set(key, state, _timeout())
+    return state
+
+
+def invalidate_site_nav():
+    """Drop the cached navigation state of the pages outside projects."""
+
+    cache.delete(SITE_NAV_KEY)
+
+
+def invalidate_project_nav(project_id):
+    """Drop the cached navigation state of a project."""
+
+    cache.delete_many([_project_key(project_id), _pending_key(project_id)])
@@ -29,6 +29,21 @@ PIPELINE['PIPELINE_ENABLED'] = True
 PIPELINE['CSS_COMPRESSOR'] = 'pipeline.compressors.yuglify.YuglifyCompressor'
 PIPELINE['JS_COMPRESSOR'] = 'pipeline.compressors.yuglify.YuglifyCompressor'
 
+# The cache is shared by every uWSGI worker and the background worker. It
+# holds the stamps and the navigation state that signals invalidate, a
+# cache per process would keep serving stale state on the other processes.
+# The table is created by the base app migrations (createcachetable).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'TIMEOUT': 5 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    }
+}
+
 # Comment if you are not running behind proxy
 USE_X_FORWARDED_HOST = True
 
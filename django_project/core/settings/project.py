@@ -89,3 +89,60 @@ LOGIN_URL = '/en/accounts/login/'
 
 # The numeric mode (i.e. 0o644) to set newly uploaded files to.
 FILE_UPLOAD_PERMISSIONS = 0o644
+
+# Number of processes used to render certificate PDFs in batch.
+# None uses up to 4 processes depending on the available CPUs.
+CERTIFICATE_RENDER_WORKERS = None
+
+# Maximum size in bytes of the decoded logos, signatures and backgrounds
+# kept in memory by each process to render certificates.
+CERTIFICATE_ASSET_CACHE_BYTES = 64 * 1024 * 1024
+
+# Seconds a rendered changelog page is kept in the cache. Renders of locked
+# versions are also kept on disk under MEDIA_ROOT/changelogs.
+CHANGELOG_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Seconds the navigation state of the pages (info pages and pending
+# approvals) is kept in the cache, changes to those models drop it earlier
+# from the shared cache of core.settings.prod.
+NAV_CACHE_TIMEOUT = 5 * 60
+
+# Seconds the sustaining membership status of a user is kept in the cache,
+# changes to their sponsors and sponsorship periods drop it earlier from the
+# shared cache of core.settings.prod.
+SUSTAINING_MEMBER_CACHE_TIMEOUT = 5 * 60
+
+# Concurrent requests made to the GitHub API when importing pull requests,
+# and seconds a fetched GitHub user profile is used without revalidation.
+GITHUB_FETCH_WORKERS = 8
+GITHUB_PROFILE_MAX_AGE = 24 * 60 * 60
+
+# Concurrent downloads of the images referenced by changelog entries.
+IMAGE_DOWNLOAD_WORKERS = 8
+
+# Background jobs run by the run_worker command: jobs run at the same time
+# by a worker, seconds without progress after which a running job is given
+# to another worker, and seconds before a failed job is retried, doubled
+# after every attempt.
+BACKGROUND_JOB_CONCURRENCY = 2
+BACKGROUND_JOB_VISIBILITY_TIMEOUT = 10 * 60
+BACKGROUND_JOB_RETRY_DELAY = 60
+
+# Folder of the files produced by background jobs, outside MEDIA_ROOT as
+# only the user who queued a job may download its file. Finished jobs and
+# their files are deleted after some days, checked every hour by the worker.
+BACKGROUND_JOB_RESULT_ROOT = '/home/web/job_results'
+BACKGROUND_JOB_RETENTION_DAYS = 7
+BACKGROUND_JOB_PRUNE_INTERVAL = 60 * 60
+
+# Certificate emails sent to course attendees over one mail connection
+# between pauses, and seconds paused between those batches.
+CERTIFICATE_EMAIL_BATCH_SIZE = 50
+CERTIFICATE_EMAIL_BATCH_DELAY = 1
+
+# Maximum size in characters of the HTML rendered from markdown kept in
+# memory by each process, and the cache alias and seconds renders are
+# shared between processes through. None does not share them.
+MARKDOWN_CACHE_BYTES = 8 * 1024 * 1024
+MARKDOWN_CACHE_ALIAS = None
+MARKDOWN_CACHE_TIMEOUT = 24 * 60 * 60
@@ -20,6 +20,10 @@ NOSE_ARGS = (
 )
 
 
+# Render certificates in the test process, rendering processes would not
+# see the test database transaction.
+CERTIFICATE_RENDER_WORKERS = 1
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # change this to a proper location
 EMAIL_FILE_PATH = '/tmp/'
@@ -19,4 +19,5 @@ DATABASES = {
 }
 
 MEDIA_ROOT = '/tmp/media'
+BACKGROUND_JOB_RESULT_ROOT = '/tmp/job_results'
 STATIC_ROOT = '/tmp/static'
@@ -1,8 +1,13 @@
 # coding=utf-8
 import logging
 from django.urls import reverse
-from django.test import TestCase, override_settings
+from django.test import TestCase, RequestFactory, override_settings
 from django.test.client import Client
+from django.core.cache import cache
+from base.domain_routing import ROUTING_VERSION_KEY, invalidate_routing_table
+from base.models import Domain
+from base.tests.model_factories import DomainF, ProjectF
+from core.custom_middleware import CheckDomainMiddleware
 
 
 class TestCheckDomainMiddleware(TestCase):
@@ -43,3 +48,65 @@ class TestCheckDomainMiddleware(TestCase):
             expected_url='http://changelog.kartoza.com/en/domain-not-found/',
             fetch_redirect_response=False,
         )
+
+
+@override_settings(VALID_DOMAIN=['testserver', ], ALLOWED_HOSTS=['*'])
+class TestDomainRouting(TestCase):
+    """Test that custom domains are routed from the routing table."""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        invalidate_routing_table()
+        self.factory = RequestFactory()
+        self.middleware = CheckDomainMiddleware(lambda request: None)
+        self.project = ProjectF.create(name='Routed')
+        self.other_project = ProjectF.create(name='Other')
+
+    def tearDown(self):
+        # The table outlives the rolled back test data.
+        invalidate_routing_table()
+
+    def _process(self, host, path):
+        request = self.factory.get(path, HTTP_HOST=host)
+        return request, self.middleware.process_request(request)
+
+    def test_project_domain_is_routed_without_queries(self):
+        DomainF.create(
+            domain='routed.example.com', role='Project',
+            project=self.project, approved=True)
+        home_url = reverse('home')
+        self._process('routed.example.com', home_url)
+
+        with self.assertNumQueries(0):
+            request, response = self._process(
+                'routed.example.com', home_url + 'other/')
+
+        self.assertEqual(request.domain_route.project_id, self.project.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse(
+            'project-detail', kwargs={'slug': self.project.slug}))
+
+    def test_routing_table_is_refreshed(self):
+        domain = DomainF.create(
+            domain='pending.example.com', role='Project',
+            project=self.project, approved=False)
+        request, response = self._process('pending.example.com', '/')
+        self.assertIsNone(request.domain_route)
+
+        domain.approved = True
+        domain.save()
+        request, response = self._process('pending.example.com', '/')
+        self.assertEqual(request.domain_route.project_id, self.project.pk)
+
+    def test_missing_routing_stamp_reloads(self):
+        domain = DomainF.create(
+            domain='pending.example.com', role='Project',
+            project=self.project, approved=False)
+        request, response = self._process('pending.example.com', '/')
+        self.assertIsNone(request.domain_route)
+
+        # Approved by another process whose stamp is not in the cache.
+        Domain.objects.filter(pk=domain.pk).update(approved=True)
+        cache.delete(ROUTING_VERSION_KEY)
+        request, response = self._process('pending.example.com', '/')
+        self.assertEqual(request.domain_route.project_id, self.project.pk)
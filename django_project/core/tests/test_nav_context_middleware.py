@@ -0,0 +1,81 @@
+# coding=utf-8
+import logging
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.flatpages.models import FlatPage
+from django.core.cache import cache
+from django.template.response import TemplateResponse
+from django.test import TestCase, RequestFactory, override_settings
+from base.models import ProjectFlatpage
+from base.tests.model_factories import ProjectF
+from changes.tests.model_factories import SponsorF
+from core.custom_middleware import NavContextMiddleware
+from core.model_factories import UserF
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestNavContextMiddleware(TestCase):
+    """Test the cached navigation context of the pages."""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = NavContextMiddleware(lambda request: None)
+        self.project = ProjectF.create()
+        self.manager = UserF.create()
+        self.project.sponsorship_managers.add(self.manager)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _context(self, user, **context):
+        request = self.factory.get('/')
+        request.user = user
+        response = TemplateResponse(request, 'base.html', context)
+        return self.middleware.process_template_response(
+            request, response).context_data
+
+    def test_anonymous_project_page_is_served_from_cache(self):
+        self._context(AnonymousUser(), project=self.project)
+
+        with self.assertNumQueries(0):
+            context = self._context(AnonymousUser(), project=self.project)
+
+        self.assertEqual(context['the_project'], self.project)
+        self.assertFalse(context['has_pending_sponsor_lvl'])
+        self.assertFalse(context['has_pending_sustaining_members'])
+
+    def test_anonymous_site_page_is_served_from_cache(self):
+        self._context(AnonymousUser())
+
+        with self.assertNumQueries(0):
+            context = self._context(AnonymousUser())
+
+        self.assertIn(self.project, context['the_projects'])
+
+    def test_flatpages_are_invalidated(self):
+        context = self._context(AnonymousUser(), project=self.project)
+        self.assertEqual(context['project_flatpages'], [])
+
+        project_page = ProjectFlatpage.objects.create(
+            project=self.project, url='/about/', title='About')
+        site_page = FlatPage.objects.create(url='/help/', title='Help')
+
+        context = self._context(AnonymousUser(), project=self.project)
+        self.assertEqual(context['project_flatpages'], [project_page])
+        self.assertEqual(context['flatpages'], [site_page])
+
+    def test_pending_sustaining_members(self):
+        sponsor = SponsorF.create(project=self.project, approved=False)
+        other_user = UserF.create()
+
+        context = self._context(self.manager, project=self.project)
+        self.assertTrue(context['has_pending_sustaining_members'])
+        context = self._context(other_user, project=self.project)
+        self.assertFalse(context['has_pending_sustaining_members'])
+
+        sponsor.approved = True
+        sponsor.save()
+        context = self._context(self.manager, project=self.project)
+        self.assertFalse(context['has_pending_sustaining_members'])
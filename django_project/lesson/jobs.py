@@ -0,0 +1,18 @@
+# coding=utf-8
+"""Background jobs of the lesson app, run by the run_worker command."""
+
+import os
+
+from base.jobs import job_result_path, job_result_root, register_job
+from .worksheet_export import WORKSHEETS_ZIP, build_worksheets_zip
+
+
+@register_job(WORKSHEETS_ZIP)
+def worksheets_zip(job):
+    """Build the zip archive of some worksheets."""
+
+    pathname = job_result_path(job, 'worksheets.zip')
+    build_worksheets_zip(
+        pathname, job.payload['worksheets'], job.payload['site'],
+        job.payload.get('language'), job.set_progress)
+    return os.path.relpath(pathname, job_result_root())
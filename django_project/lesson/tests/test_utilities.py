@@ -1,14 +1,20 @@
 """Test for lesson utilities."""
 
+import json
 from unittest import mock
-from django.test import TestCase
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase, RequestFactory
 from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
 
 from lesson.tests.model_factories import (FurtherReadingF,
                                           SectionF,
                                           WorksheetF)
 from base.tests.model_factories import ProjectF
+from lesson.models.section import Section
+from lesson.utilities import re_order_features, reorder_features
 from lesson.utilities import validate_zipfile
 from lesson.utilities import GetAllFurtherReadingLink
 from lesson.utilities import get_ignore_file_list, ZIP_IGNORE_FILE
@@ -115,3 +121,61 @@ class TestGetIgnoreFileList(SimpleTestCase):
 
     def test_get_ignore_file_list_file_not_found(self):
         self.assertEqual(get_ignore_file_list('no_file'), [])
+
+
+class TestReorderFeatures(TestCase):
+    """Test the bulk reordering of features."""
+
+    def setUp(self):
+        self.project = ProjectF.create()
+        self.sections = [
+            SectionF.create(project=self.project) for _ in range(3)]
+        self.factory = RequestFactory()
+
+    def _order(self):
+        return list(Section.objects.filter(
+            project=self.project).order_by(
+            'sequence_number').values_list('pk', flat=True))
+
+    def test_re_order_features(self):
+        post_data = [
+            {'id': str(section.pk), 'sort_number': str(number)}
+            for number, section in enumerate(reversed(self.sections))]
+        request = self.factory.post(
+            '/', json.dumps(post_data), content_type='application/json')
+        response = re_order_features(
+            request, Section.objects.filter(project=self.project))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self._order(), [section.pk for section in self.sections[::-1]])
+
+    def test_re_order_features_invalid_json(self):
+        request = self.factory.post(
+            '/', '[{"id": 1}]', content_type='application/json')
+        with self.assertRaises(Http404):
+            re_order_features(request, Section.objects.all())
+
+    def test_features_missing_from_the_order_come_last(self):
+        first, second, third = self.sections
+        reorder_features(
+            Section.objects.filter(project=self.project),
+            {third.pk: 0, first.pk: 1})
+        self.assertEqual(self._order(), [third.pk, first.pk, second.pk])
+
+    def test_constant_number_of_queries(self):
+        features = Section.objects.filter(project=self.project)
+        with CaptureQueriesContext(connection) as few_sections:
+            reorder_features(features, {
+                section.pk: number
+                for number, section in enumerate(self.sections)})
+
+        self.sections += [
+            SectionF.create(project=self.project) for _ in range(10)]
+        with CaptureQueriesContext(connection) as many_sections:
+            reorder_features(features, {
+                section.pk: number
+                for number, section in enumerate(self.sections)})
+
+        self.assertEqual(
+            len(few_sections.captured_queries),
+            len(many_sections.captured_queries))
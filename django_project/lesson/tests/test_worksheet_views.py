@@ -16,6 +16,7 @@ from django.urls import reverse
 from lesson.tests.model_factories import WorksheetF
 from lesson.tests.model_factories import SectionF
 from lesson.tests.model_factories import LicenseF
+from base.jobs import autodiscover_jobs, run_pending_jobs
 from base.tests.model_factories import ProjectF
 from core.model_factories import UserF
 
@@ -329,12 +330,19 @@ class TestViews(TestCase):
             'download-multiple-worksheets', kwargs=self.kwargs_project
         ) + worksheet_obj)
         self.assertEqual(response.status_code, 200)
+        job = response.context['job']
+        autodiscover_jobs()
+        run_pending_jobs()
+        response = self.client.get(reverse(
+            'background-job-download', kwargs={'pk': job.pk}))
+        self.assertEqual(response.status_code, 200)
         self.assertEquals(
             response.get('Content-Disposition'),
-            'attachment; '
-            'filename=Test project name multiple zip-worksheet module 1.1.zip'
+            'attachment; filename="Test project name multiple '
+            'zip-worksheet module 1.1.zip"'
         )
-        with io.BytesIO(response.content) as file:
+        content = b''.join(response.streaming_content)
+        with io.BytesIO(content) as file:
             zip_file = zipfile.ZipFile(file, 'r')
             self.assertIsNone(zip_file.testzip())
             self.assertIn('1. Section Multiple Download/Test License.txt',
@@ -9,6 +9,8 @@ import re
 from unidecode import unidecode
 
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
 from django.http import Http404, HttpResponse
 from django.urls import reverse
 from django.utils.text import slugify
@@ -39,10 +41,45 @@ def custom_slug(name):
     return new_slug
 
 
-def re_order_features(request, features):
-    """Helper to reorder a set of features.
+def reorder_features(features, sort_numbers, field='sequence_number'):
+    """Apply a new order to a set of features in two UPDATE statements.
 
-    The column must be called `sequence_number` in your model.
+    The features missing from the new order are first shifted by the number
+    of ordered features, so they sort after them when the new numbers start
+    at 0 as the order views post them, then the new numbers are set with one
+    CASE statement. Rows are updated in bulk, no save() or signal is run.
+
+    :param features: A queryset of features to update.
+    :type features: QuerySet
+
+    :param sort_numbers: The new sort number by primary key. Keys which are
+        not in the queryset are ignored.
+    :type sort_numbers: dict
+
+    :param field: The name of the sort number column.
+    :type field: str
+
+    :return: The number of features given a new sort number.
+    :rtype: int
+    """
+    if not sort_numbers:
+        return 0
+    with transaction.atomic():
+        features.exclude(pk__in=list(sort_numbers)).update(
+            **{field: F(field) + len(sort_numbers)})
+        new_numbers = Case(
+            *[When(pk=pk, then=Value(number))
+              for pk, number in sort_numbers.items()],
+            output_field=IntegerField())
+        return features.filter(pk__in=list(sort_numbers)).update(
+            **{field: new_numbers})
+
+
+def re_order_features(request, features, field='sequence_number'):
+    """Helper to reorder a set of features from the posted JSON order.
+
+    The request body is a list of objects with the `id` and the new
+    `sort_number` of the features, applied with reorder_features.
 
     :param request: HTTP request object.
     :type request: HttpRequest
@@ -50,26 +87,22 @@ def re_order_features(request, features):
     :param features: A queryset of features to update.
     :type features: QuerySet
 
+    :param field: The name of the sort number column.
+    :type field: str
+
     :return: An empty HTTP 200 response.
     :rtype: HttpResponse
     :raises: Http404
     """
     try:
         sequence_order_request = json.loads(request.body)
-    except ValueError:
+        sort_numbers = {
+            int(order_request['id']): int(order_request['sort_number'])
+            for order_request in sequence_order_request}
+    except (ValueError, TypeError, KeyError):
         raise Http404('Error JSON values')
 
-    # Add dummy shift in the DB to avoid Integrity about unique_together
-    for feature in features:
-        feature.sequence_number += len(sequence_order_request)
-        feature.save()
-
-    for order_request in sequence_order_request:
-        feature = features.get(id=order_request['id'])
-        if feature:
-            feature.sequence_number = order_request['sort_number']
-            feature.save()
-
+    reorder_features(features, sort_numbers, field)
     return HttpResponse('')
 
 
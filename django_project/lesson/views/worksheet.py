@@ -16,8 +16,8 @@ from django.views.generic import (
     DeleteView,
     ListView,
 )
-from django.shortcuts import get_object_or_404, render
-from django.utils.translation import ugettext_lazy as _
+from django.shortcuts import get_object_or_404
+from django.utils.translation import get_language, ugettext_lazy as _
 
 from braces.views import LoginRequiredMixin
 from weasyprint import HTML
@@ -30,6 +30,14 @@ from lesson.models.worksheet import Worksheet
 from lesson.models.worksheet_question import WorksheetQuestion
 from lesson.utilities import re_order_features
 
+from lesson.worksheet_export import (
+    WORKSHEETS_ZIP,
+    worksheets_zip_filename,
+    worksheets_zip_key,
+)
+
+from base.api_views.background_job import job_progress_page
+from base.models.background_job import BackgroundJob
 from base.models.project import Project
 from ..models.section import Section
 
@@ -499,130 +507,29 @@ class WorksheetModuleQuestionAnswersPDF(WorksheetModuleQuestionAnswers):
 
 
 def download_multiple_worksheet(request, **kwargs):
-    """Download pdf and sample zip file from multiple worksheets."""
-
-    project_slug = kwargs.pop('project_slug')
-    project = Project.objects.get(slug=project_slug)
-    worksheets_obj = request.GET.get('worksheet')
-    worksheets = json.loads(worksheets_obj)
-
-    def get_context_data(pk):
-        """Get the context data which is passed to a template.
-
-        :param kwargs: Any arguments to pass to the superclass.
-        :type kwargs: dict
-
-        :returns: Context data which will be passed to the template.
-        :rtype: dict
-        """
-        context = {}
-        context['worksheet'] = Worksheet.objects.get(pk=pk)
-        context['requirements'] = Specification.objects.filter(worksheet=pk)
-
-        questions = WorksheetQuestion.objects.filter(worksheet=pk)
-        context['questions'] = OrderedDict()
-        for question in questions:
-            context['questions'][question] = Answer.objects.filter(
-                question=question)
-
-        context['further_reading'] = FurtherReading.objects.filter(
-            worksheet=pk)
-
-        context['file_title'] = \
-            context['worksheet'].section.name \
-            + '_' + context['worksheet'].title
-        context['file_title'] = context['file_title'].encode("utf8")
-        return context
-
-    s = BytesIO()
-    zf = zipfile.ZipFile(s, "w")
-    initial_numbering = ''
-    final_numbering = ''
-
-    for pk in worksheets:
-        numbering = worksheets[pk]
-        array_numbering = numbering.split('.')
-
-        if initial_numbering == '':
-            initial_numbering = numbering
-        else:
-            array_initial_numbering = initial_numbering.split('.')
-            if int(array_numbering[0]) < int(array_initial_numbering[0]):
-                initial_numbering = numbering
-            elif int(array_numbering[0]) == int(array_initial_numbering[0]):
-                if int(array_numbering[1]) < int(array_initial_numbering[1]):
-                    initial_numbering = numbering
-
-        if final_numbering == '':
-            final_numbering = numbering
-        else:
-            array_final_numbering = final_numbering.split('.')
-            if int(array_numbering[0]) > int(array_final_numbering[0]):
-                final_numbering = numbering
-            elif int(array_numbering[0]) == int(array_final_numbering[0]):
-                if int(array_numbering[1]) > int(array_final_numbering[1]):
-                    final_numbering = numbering
-
-        pk = int(pk)
-        worksheet = Worksheet.objects.get(pk=pk)
-        pdf_title = '{}. {}'.format(numbering, worksheet.module)
-        context = get_context_data(pk)
-        context['section_number'] = numbering.split('.')[0]
-        context['module_number'] = numbering
-        response = render(
-            request, 'worksheet/print.html', context=context)
-
-        pdf_response = HttpResponse(content_type='application/pdf')
-        pdf_response['Content-Disposition'] = \
-            'attachment; filename={}'.format(pdf_title)
-
-        html_object = HTML(
-            string=response.content,
-            base_url='file://',
-        )
-        html_object.write_pdf(pdf_response)
-
-        with open('/tmp/{}.pdf'.format(pdf_title), 'wb') as pdf:
-            pdf.write(pdf_response.content)
+    """Download pdf and sample zip file from multiple worksheets.
 
-        fpath = '/tmp/{}.pdf'.format(pdf_title)
-
-        dir_number = numbering.split('.')[0]
-        zip_subdir = '{}. {}'.format(dir_number, worksheet.section.name)
-
-        fdir, fname = os.path.split(fpath)
-        zip_path = os.path.join(zip_subdir, fname)
-
-        zf.write(fpath, zip_path)
-
-        if worksheet.external_data:
-            data_path = worksheet.external_data.url
-            zip_data_path = settings.MEDIA_ROOT + data_path[6:]
-            zip_path = os.path.join(zip_subdir, pdf_title + '.zip')
-            zf.write(zip_data_path, zip_path)
-
-        # license
-        if worksheet.license:
-            data_path = context['worksheet'].license.file.url
-            zip_data_path = settings.MEDIA_ROOT + data_path[6:]
-            zip_path = os.path.join(zip_subdir,
-                                    context['worksheet'].license.name + '.txt')
-            zf.write(zip_data_path, zip_path)
-
-    zf.close()
+    The archive is built by a background job, this page polls it then
+    downloads the archive.
+    """
 
-    downloaded_module = ''
-    if len(worksheets) > 0:
-        if len(worksheets) == 1:
-            downloaded_module = 'module {}'.format(initial_numbering)
-        else:
-            downloaded_module = 'module {} to {}'.format(
-                initial_numbering,
-                final_numbering)
-
-    zip_response = HttpResponse(
-        s.getvalue(), content_type="application/x-zip-compressed")
-    zip_response['Content-Disposition'] = \
-        'attachment; filename={}-worksheet {}.zip'.format(
-            project.name, downloaded_module)
-    return zip_response
+    project_slug = kwargs.pop('project_slug')
+    project = get_object_or_404(Project, slug=project_slug)
+    worksheets = json.loads(request.GET.get('worksheet'))
+
+    job = BackgroundJob.enqueue(
+        WORKSHEETS_ZIP,
+        {
+            'worksheets': worksheets,
+            'site': request.get_host(),
+            'language': get_language(),
+            'filename': worksheets_zip_filename(project, worksheets),
+        },
+        key=worksheets_zip_key(project, worksheets),
+        user=request.user,
+        max_attempts=3)
+    return job_progress_page(
+        request, job, 'Preparing Download',
+        back_url=reverse('section-list', kwargs={
+            'project_slug': project_slug}),
+        the_project=project)
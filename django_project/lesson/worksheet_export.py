@@ -0,0 +1,159 @@
+# coding=utf-8
+"""Zip archives of the PDFs and sample data of several worksheets.
+
+Archives are built off-request by the ``lesson.worksheets_zip`` background
+job, rendering a PDF per worksheet can take a few seconds.
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+from django.utils import translation
+from weasyprint import HTML
+
+from lesson.models.answer import Answer
+from lesson.models.further_reading import FurtherReading
+from lesson.models.specification import Specification
+from lesson.models.worksheet import Worksheet
+from lesson.models.worksheet_question import WorksheetQuestion
+
+WORKSHEETS_ZIP = 'lesson.worksheets_zip'
+
+
+def _no_progress(percentage, message):
+    pass
+
+
+def _numbering_key(numbering):
+    section, module = (numbering.split('.') + ['0'])[:2]
+    return int(section), int(module)
+
+
+def worksheets_zip_key(project, worksheets):
+    """Return the background job key of an archive of worksheets.
+
+    :param worksheets: Numbering of the worksheets by primary key.
+    :type worksheets: dict
+    """
+
+    digest = hashlib.sha1(
+        json.dumps(worksheets, sort_keys=True).encode('utf-8')).hexdigest()
+    return 'worksheets-zip:{}:{}'.format(project.pk, digest)
+
+
+def worksheets_zip_filename(project, worksheets):
+    """Return the file name an archive of worksheets is downloaded as.
+
+    :param worksheets: Numbering of the worksheets by primary key.
+    :type worksheets: dict
+    """
+
+    downloaded_module = ''
+    if len(worksheets) > 0:
+        numberings = sorted(worksheets.values(), key=_numbering_key)
+        if len(worksheets) == 1:
+            downloaded_module = 'module {}'.format(numberings[0])
+        else:
+            downloaded_module = 'module {} to {}'.format(
+                numberings[0], numberings[-1])
+    return '{}-worksheet {}.zip'.format(project.name, downloaded_module)
+
+
+def _worksheet_context(worksheet):
+    """Get the context data of the printed worksheet.
+
+    :returns: Context data which will be passed to the template.
+    :rtype: dict
+    """
+
+    context = {}
+    context['worksheet'] = worksheet
+    context['requirements'] = Specification.objects.filter(
+        worksheet=worksheet)
+
+    questions = WorksheetQuestion.objects.filter(worksheet=worksheet)
+    context['questions'] = OrderedDict()
+    for question in questions:
+        context['questions'][question] = Answer.objects.filter(
+            question=question)
+
+    context['further_reading'] = FurtherReading.objects.filter(
+        worksheet=worksheet)
+
+    context['file_title'] = \
+        worksheet.section.name + '_' + worksheet.title
+    context['file_title'] = context['file_title'].encode("utf8")
+    return context
+
+
+def build_worksheets_zip(
+        pathname, worksheets, site, language=None, progress=None):
+    """Write a zip archive of the PDFs and sample data of worksheets.
+
+    :param pathname: Absolute path of the archive.
+    :type pathname: str
+
+    :param worksheets: Numbering of the worksheets by primary key.
+    :type worksheets: dict
+
+    :param site: Domain of the links printed in the PDFs.
+    :type site: str
+
+    :param language: Language the worksheets are printed in.
+    :type language: str
+
+    :param progress: Called with a percentage and a message.
+    :type progress: callable
+    """
+
+    if progress is None:
+        progress = _no_progress
+
+    # The printed worksheet links to the sample data on this domain.
+    request = HttpRequest()
+    request.META['HTTP_HOST'] = site
+
+    with zipfile.ZipFile(pathname, 'w') as zf, \
+            translation.override(language):
+        for index, (pk, numbering) in enumerate(worksheets.items()):
+            worksheet = Worksheet.objects.select_related(
+                'section', 'license').get(pk=int(pk))
+            pdf_title = '{}. {}'.format(numbering, worksheet.module)
+            context = _worksheet_context(worksheet)
+            context['section_number'] = numbering.split('.')[0]
+            context['module_number'] = numbering
+            context['request'] = request
+            html = render_to_string('worksheet/print.html', context)
+
+            dir_number = numbering.split('.')[0]
+            zip_subdir = '{}. {}'.format(dir_number, worksheet.section.name)
+
+            zip_path = os.path.join(zip_subdir, '{}.pdf'.format(pdf_title))
+            zf.writestr(
+                zip_path,
+                HTML(string=html, base_url='file://').write_pdf())
+
+            if worksheet.external_data:
+                data_path = worksheet.external_data.url
+                zip_data_path = settings.MEDIA_ROOT + data_path[6:]
+                zip_path = os.path.join(zip_subdir, pdf_title + '.zip')
+                zf.write(zip_data_path, zip_path)
+
+            # license
+            if worksheet.license:
+                data_path = worksheet.license.file.url
+                zip_data_path = settings.MEDIA_ROOT + data_path[6:]
+                zip_path = os.path.join(
+                    zip_subdir, worksheet.license.name + '.txt')
+                zf.write(zip_data_path, zip_path)
+
+            progress(
+                100 * (index + 1) // len(worksheets),
+                'Added {} of {} worksheets'.format(
+                    index + 1, len(worksheets)))